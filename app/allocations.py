@@ -0,0 +1,170 @@
+"""
+Allocation tracking with tracemalloc, shared between the allocation
+middleware and the debug routes.
+
+Tracing is off until an admin starts it, since tracemalloc slows every
+allocation down while it runs. Meanwhile the middleware records how much
+traced memory each request leaves behind, per route, and snapshots taken
+through the debug routes can be diffed, grouped by the line in `app/` that
+made the allocation.
+"""
+
+import asyncio
+import collections
+import itertools
+import os
+import time
+import tracemalloc
+import typing
+
+# Directory holding the app package, lines are reported relative to it
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_APP = os.path.join(_ROOT, "app") + os.sep
+
+# Snapshots kept for diffs, the oldest one is dropped beyond this
+_MAX_SNAPSHOTS = 10
+
+
+def _app_line(traceback: tracemalloc.Traceback) -> typing.Optional[tuple[str, int]]:
+    """Returns the innermost frame of `traceback` in `app/`, None if it has none."""
+
+    # Frames are ordered from the oldest to the most recent
+    for frame in reversed(traceback):
+        if frame.filename.startswith(_APP):
+            return os.path.relpath(frame.filename, _ROOT), frame.lineno
+    return None
+
+
+class RouteAllocations:
+    def __init__(self, route: str):
+        self.route = route
+        self.requests = 0
+        self.total_bytes = 0
+        self.max_bytes = 0
+
+
+class AllocationSnapshot:
+    """Traced memory at one point in time, by the line in `app/` that allocated it.
+
+    Allocations made outside `app/` count for the `app/` line that called
+    into the library making them, provided tracing keeps enough frames.
+    Only traces with a frame in `app/` are grouped, by tracemalloc, first
+    by traceback, so the lines are found once per distinct traceback.
+    """
+
+    def __init__(
+        self, snapshot_id: int, snapshot: tracemalloc.Snapshot, traced_bytes: int
+    ):
+        self.id = snapshot_id
+        self.taken_at = time.time()
+        self.traced_bytes = traced_bytes
+        self.lines: dict[tuple[str, int], list[int]] = collections.defaultdict(
+            lambda: [0, 0]
+        )
+        app_traces = snapshot.filter_traces(
+            [tracemalloc.Filter(True, _APP + "*", all_frames=True)]
+        )
+        for statistic in app_traces.statistics("traceback"):
+            line = _app_line(statistic.traceback)
+            if line is not None:
+                self.lines[line][0] += statistic.size
+                self.lines[line][1] += statistic.count
+
+
+def _take_snapshot(snapshot_id: int) -> AllocationSnapshot:
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    return AllocationSnapshot(snapshot_id, tracemalloc.take_snapshot(), traced_bytes)
+
+
+class AllocationDiffLine(typing.NamedTuple):
+    file: str
+    line: int
+    size_diff: int
+    size: int
+    count_diff: int
+    count: int
+
+
+def diff(
+    start: AllocationSnapshot, end: AllocationSnapshot
+) -> list[AllocationDiffLine]:
+    """Returns the lines whose traced memory changed between two snapshots.
+
+    The biggest changes come first.
+    """
+
+    lines = []
+    for key in start.lines.keys() | end.lines.keys():
+        start_size, start_count = start.lines.get(key, (0, 0))
+        end_size, end_count = end.lines.get(key, (0, 0))
+        if end_size != start_size or end_count != start_count:
+            lines.append(
+                AllocationDiffLine(
+                    file=key[0],
+                    line=key[1],
+                    size_diff=end_size - start_size,
+                    size=end_size,
+                    count_diff=end_count - start_count,
+                    count=end_count,
+                )
+            )
+    return sorted(lines, key=lambda line: abs(line.size_diff), reverse=True)
+
+
+class AllocationTracker:
+    """Per-route traced memory deltas and snapshots of this worker.
+
+    The delta of a request is the traced memory after it minus before it,
+    which includes what concurrent requests allocated in the meantime, so
+    it is meaningful averaged over many requests.
+    """
+
+    def __init__(self):
+        self.routes: dict[str, RouteAllocations] = {}
+        self.snapshots: typing.OrderedDict[int, AllocationSnapshot] = (
+            collections.OrderedDict()
+        )
+        self._snapshot_ids = itertools.count(1)
+
+    @staticmethod
+    def tracing() -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 25):
+        """Starts tracing `frames` frames per allocation, discarding prior results."""
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.routes.clear()
+        self.snapshots.clear()
+        tracemalloc.start(frames)
+
+    @staticmethod
+    def stop():
+        """Stops tracing, the route deltas and snapshots taken so far are kept."""
+
+        tracemalloc.stop()
+
+    def record(self, route: str, delta_bytes: int):
+        allocations = self.routes.get(route)
+        if allocations is None:
+            allocations = self.routes[route] = RouteAllocations(route)
+        allocations.requests += 1
+        allocations.total_bytes += delta_bytes
+        allocations.max_bytes = max(allocations.max_bytes, delta_bytes)
+
+    async def snapshot(self) -> AllocationSnapshot:
+        """Takes a snapshot of the traced memory, tracing must be started.
+
+        Taking and grouping it walks every trace, so it runs in the default
+        executor rather than on the event loop.
+        """
+
+        snapshot_id = next(self._snapshot_ids)
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, _take_snapshot, snapshot_id
+        )
+        self.snapshots[snapshot.id] = snapshot
+        if len(self.snapshots) > _MAX_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+        return snapshot
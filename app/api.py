@@ -4,28 +4,196 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 
-from app.handlers import movie_v1
+from app import gc_tuning
+from app.allocations import AllocationTracker
+from app.capture import TrafficCapture
+from app.config import Settings, settings_instance
+from app.handlers import batch_v1, debug, health, movie_v1
+from app.handlers.handler_dependencies import _make_movie_repository, movie_repository
+from app.lifecycle import Lifecycle
+from app.loop_monitor import LoopMonitor
+from app.middleware.admission import AdmissionBudget, AdmissionControlMiddleware
+from app.middleware.allocations import AllocationTrackingMiddleware
+from app.middleware.capture import CaptureMiddleware
+from app.middleware.consistency import CausalConsistencyMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.drain import DrainMiddleware
+from app.middleware.loop_monitor import LoopMonitorMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.profiling import SamplingProfiler
 
 
-def create_app():
-    app = FastAPI(title="Movie Tracker", docs_url="/", middleware=[Middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )])
+def create_app(settings: Settings = None):
+    """Creates the API.
+
+    Settings default to `settings_instance()`, settings passed explicitly are
+    also used for every route depending on `settings_instance`.
+    """
+
+    app = FastAPI(
+        title="Movie Tracker",
+        docs_url="/",
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=["*"],
+                allow_credentials=True,
+                allow_methods=["*"],
+                allow_headers=["*"],
+            )
+        ],
+    )
+
+    if settings is None:
+        settings = settings_instance()
+    else:
+        app.dependency_overrides[settings_instance] = lambda: settings
 
     Instrumentator().instrument(app).expose(app)
 
     app.include_router(movie_v1.router)
+    app.include_router(batch_v1.router)
+
+    lifecycle = Lifecycle(drain_timeout_s=settings.shutdown_drain_timeout_s)
+
+    middleware = [
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        ),
+        Middleware(ServerTimingMiddleware, always=settings.server_timing_enabled),
+        Middleware(DrainMiddleware, lifecycle=lifecycle),
+    ]
+    capture = None
+    if settings.capture_path is not None:
+        capture = TrafficCapture(
+            settings.capture_path,
+            max_bytes=settings.capture_max_bytes,
+            backup_count=settings.capture_backup_count,
+        )
+        middleware.append(
+            Middleware(
+                CaptureMiddleware,
+                capture=capture,
+                sample_rate=settings.capture_sample_rate,
+                max_body_bytes=settings.capture_max_body_bytes,
+            )
+        )
+    loop_monitor = None
+    if settings.loop_monitor_enabled:
+        loop_monitor = LoopMonitor(
+            interval_s=settings.loop_lag_interval_ms / 1000,
+            block_threshold_s=settings.loop_block_threshold_ms / 1000,
+        )
+        middleware.append(Middleware(LoopMonitorMiddleware, monitor=loop_monitor))
+    pause_exporter = None
+    if settings.gc_metrics_enabled:
+        pause_exporter = gc_tuning.PauseExporter()
+    profiler = None
+    if settings.profiling_sample_every or settings.profiling_token:
+        profiler = SamplingProfiler(interval_s=settings.profiling_interval_ms / 1000)
+        middleware.append(
+            Middleware(
+                ProfilingMiddleware,
+                profiler=profiler,
+                sample_every=settings.profiling_sample_every,
+                token=settings.profiling_token,
+            )
+        )
+    allocation_tracker = None
+    if settings.allocation_tracking_enabled:
+        allocation_tracker = AllocationTracker()
+        middleware.append(
+            Middleware(AllocationTrackingMiddleware, tracker=allocation_tracker)
+        )
+    if settings.request_timeout_ms:
+        middleware.append(
+            Middleware(
+                DeadlineMiddleware, default_timeout_ms=settings.request_timeout_ms
+            )
+        )
+    if settings.admission_control_enabled:
+        middleware.append(
+            Middleware(
+                AdmissionControlMiddleware,
+                read_budget=AdmissionBudget(
+                    "read",
+                    max_in_flight=settings.admission_read_max_in_flight,
+                    max_queued=settings.admission_read_max_queued,
+                    queue_timeout_s=settings.admission_queue_timeout_ms / 1000,
+                ),
+                write_budget=AdmissionBudget(
+                    "write",
+                    max_in_flight=settings.admission_write_max_in_flight,
+                    max_queued=settings.admission_write_max_queued,
+                    queue_timeout_s=settings.admission_queue_timeout_ms / 1000,
+                ),
+            )
+        )
+    if settings.mongo_causal_consistency:
+        middleware.append(Middleware(CausalConsistencyMiddleware))
+
+    versioned_app = VersionedFastAPI(
+        app,
+        version_format="{major}",
+        prefix_format="/api/v{major}",
+        middleware=middleware,
+    )
+    # Routes resolve overrides through the app they were included in, share them
+    # with the served app.
+    versioned_app.dependency_overrides = app.dependency_overrides
+
+    # Health and debug routes stay outside the versioned API, so probes don't
+    # depend on its version.
+    versioned_app.state.lifecycle = lifecycle
+    versioned_app.state.profiler = profiler
+    versioned_app.state.allocation_tracker = allocation_tracker
+    versioned_app.include_router(health.router)
+    versioned_app.include_router(debug.router)
+
+    @versioned_app.on_event("startup")
+    async def start():
+        if loop_monitor is not None:
+            loop_monitor.start()
+        if pause_exporter is not None:
+            pause_exporter.start()
+        if capture is not None:
+            capture.start()
+        repository_provider = versioned_app.dependency_overrides.get(
+            movie_repository, lambda: _make_movie_repository(settings)
+        )
+        lifecycle.start(
+            repository_provider(),
+            warm_up=settings.warm_up_enabled,
+            connections=settings.mongo_min_pool_size,
+            documents=settings.warm_up_documents,
+            retry_interval_s=settings.warm_up_retry_interval_s,
+        )
+
+    @versioned_app.on_event("shutdown")
+    async def stop():
+        await lifecycle.shutdown()
+        if profiler is not None:
+            profiler.close()
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+        if pause_exporter is not None:
+            await pause_exporter.stop()
+        if capture is not None:
+            capture.stop()
 
-    app = VersionedFastAPI(app, version_format="{major}", prefix_format="/api/v{major}", middleware=[Middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )])
+    if pause_exporter is not None:
+        gc_tuning.record_pauses()
+    gc_tuning.set_thresholds(
+        settings.gc_threshold_gen0,
+        settings.gc_threshold_gen1,
+        settings.gc_threshold_gen2,
+    )
+    if settings.gc_freeze:
+        gc_tuning.freeze(versioned_app)
 
-    return app
+    return versioned_app
@@ -0,0 +1,70 @@
+"""
+Traffic capture to JSON lines, replayed by `benchmarks.replay`.
+
+Captured requests are handed to a queue and written by a listener thread,
+so a slow disk never holds the event loop. The file is rotated by size;
+each worker writes its own file, since rotating a file shared between
+processes loses lines.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class TrafficCapture:
+    """Appends captured requests to `path` as JSON lines, rotating it every `max_bytes`.
+
+    `{pid}` in `path` is replaced by the worker's process ID when capture
+    starts, which happens after the workers fork.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5
+    ):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(self._queue))
+        self._listener: logging.handlers.QueueListener | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path.format(pid=os.getpid())
+
+    def start(self):
+        """Starts writing captured requests, including those captured before."""
+
+        path = self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=self._max_bytes,
+            backupCount=self._backup_count,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def stop(self):
+        """Writes the requests captured so far and closes the file."""
+
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+    def record(self, request: dict):
+        self._logger.info(
+            json.dumps(request, ensure_ascii=False, separators=(",", ":"))
+        )
@@ -1,6 +1,7 @@
 from functools import lru_cache
+from typing import Literal
 
-from pydantic import BaseSettings
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
@@ -8,9 +9,158 @@ class Settings(BaseSettings):
     mongo_connection_string: str
     mongo_database_name: str
     server_selection_timeout_ms: float
+    # Store the movie ID as the document _id instead of a separate id field
+    mongo_id_as_primary_key: bool = False
+    # Address movies in both layouts while app.repository.movie.migration runs
+    mongo_legacy_id_fallback: bool = False
+    mongo_migration_batch_size: int = 500
+    mongo_migration_max_documents_per_second: float | None = None
+    # Reads by ID and list reads have their own client, pool and read preference
+    mongo_read_connection_string: str | None = None
+    mongo_read_preference: str = "primary"
+    # Not allowed with the primary read preference
+    mongo_read_max_staleness_s: int | None = None
+    mongo_max_pool_size: int = 100
+    mongo_read_max_pool_size: int = 100
+    # Connections kept open by each client and opened during warm-up
+    mongo_min_pool_size: int = 10
+    # Read-your-writes across requests through the X-Consistency-Token header
+    mongo_causal_consistency: bool = False
+    # JSON object of WriteConcern arguments per write operation,
+    # e.g. {"update_watched": {"w": 1}}
+    mongo_write_concerns: str = "{}"
+    # Prometheus metrics of repository calls, and of MongoDB commands and pools
+    repository_metrics_enabled: bool = True
+    mongo_monitoring_enabled: bool = True
+    # Repository calls slower than this are logged by query shape, None disables it.
+    # A sample of them can be explained, which reruns the query, 0 disables it.
+    slow_operation_threshold_ms: float | None = 100
+    slow_operation_explain_sample_rate: float = 0.0
+    slow_operation_max_shapes: int = 1000
+    # Per-worker cache of movie searches, cleared by the worker's own writes. Other
+    # workers' writes are seen once entries are older than query_cache_ttl_s, they are
+    # then served for query_cache_stale_s more while refreshed.
+    query_cache_enabled: bool = False
+    query_cache_ttl_s: float = 5.0
+    query_cache_stale_s: float = 30.0
+    query_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Listings of at least min_rows movies, or min_bytes estimated bytes, are built and
+    # encoded on a pool of serialization_workers threads instead of the event loop
+    offload_serialization_enabled: bool = True
+    offload_serialization_min_rows: int = 200
+    offload_serialization_min_bytes: int = 262144
+    serialization_workers: int = 2
+
+    # Server-Timing header on every response, otherwise only for requests with an
+    # X-Server-Timing header
+    server_timing_enabled: bool = False
+
+    # Event loop lag histogram, and a warning with the route and stack of callbacks
+    # holding the loop past the threshold
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_ms: float = 100
+    loop_block_threshold_ms: float = 250
+
+    # Sampling profiler, off unless one of the first two is set. Profiles one request in
+    # profiling_sample_every, and those whose X-Profile-Token matches profiling_token.
+    profiling_sample_every: int | None = None
+    profiling_token: str | None = None
+    profiling_interval_ms: float = 5
+
+    # Per-route tracemalloc deltas and heap snapshot diffs, tracing is started and
+    # stopped through /debug/allocations
+    allocation_tracking_enabled: bool = False
+
+    # Traffic capture for benchmarks.replay, off if capture_path is None. Samples
+    # capture_sample_rate of the requests to capture_path, where {pid} is replaced by
+    # the worker's process ID, rotated every capture_max_bytes.
+    capture_path: str | None = None
+    capture_sample_rate: float = 0.01
+    capture_max_bytes: int = 100 * 1024 * 1024
+    capture_backup_count: int = 5
+    capture_max_body_bytes: int = 65536
+
+    # Token expected in the X-Admin-Token header by /debug routes, None disables them
+    admin_token: str | None = None
+
+    # Mass update and delete refuse to touch more movies than this
+    bulk_operation_max_matched: int = 10000
+
+    # Batch endpoint limits
+    batch_max_operations: int = 100
+    batch_max_concurrency: int = 10
+
+    # Circuit breaker around the movie repository
+    circuit_breaker_enabled: bool = True
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_probe_interval_s: float = 5.0
+    circuit_breaker_half_open_max_calls: int = 1
+
+    # Request deadline, also the upper bound for the X-Request-Timeout header. None
+    # disables deadlines.
+    request_timeout_ms: float | None = 30000
+
+    # Per-worker admission control in front of the movie routes
+    admission_control_enabled: bool = True
+    admission_read_max_in_flight: int = 64
+    admission_read_max_queued: int = 256
+    admission_write_max_in_flight: int = 32
+    admission_write_max_queued: int = 128
+    admission_queue_timeout_ms: float = 1000
+
+    # Concurrency limit on repository calls, tuned from their latency. Algorithm is
+    # "gradient" or "aimd".
+    adaptive_concurrency_enabled: bool = False
+    adaptive_concurrency_algorithm: Literal["aimd", "gradient"] = "gradient"
+    adaptive_concurrency_initial_limit: int = 20
+    adaptive_concurrency_min_limit: int = 1
+    adaptive_concurrency_max_limit: int = 200
+
+    # Startup warm-up, the process reports ready once it has finished. Warm-up reads
+    # this many index entries and movies into the MongoDB cache, none if 0.
+    warm_up_enabled: bool = True
+    warm_up_documents: int = 0
+    warm_up_retry_interval_s: float = 2.0
+    # How long shutdown waits for in-flight requests before closing the database clients
+    shutdown_drain_timeout_s: float = 20
+
+    # Garbage collector. Thresholds of generations 0, 1 and 2 are Python's own where
+    # None. With gc_freeze, the objects built with the app are frozen out of
+    # collections, before the workers fork when Gunicorn preloads it.
+    gc_freeze: bool = False
+    gc_threshold_gen0: int | None = None
+    gc_threshold_gen1: int | None = None
+    gc_threshold_gen2: int | None = None
+    gc_metrics_enabled: bool = True
+
+    # Production launcher, one worker per available CPU if server_workers is None.
+    # Workers are recycled after max_requests, plus up to max_requests_jitter, requests;
+    # 0 disables recycling.
+    server_host: str = "0.0.0.0"
+    server_port: int = 8080
+    server_workers: int | None = None
+    server_max_requests: int = 10000
+    server_max_requests_jitter: int = 1000
+    server_graceful_timeout_s: int = 30
+    # Directory the workers' metrics are kept in, a new temporary one if None. Emptied
+    # on start.
+    metrics_multiprocess_dir: str | None = None
+
+    @validator("mongo_read_max_staleness_s")
+    def max_staleness_needs_secondary_reads(cls, v, values):
+        # pymongo only rejects the combination on the first read
+        if v is not None and values.get("mongo_read_preference") == "primary":
+            raise ValueError(
+                "mongo_read_max_staleness_s can't be used with the primary read"
+                " preference."
+            )
+        return v
 
     class Config:
         env_file = "settings.env"
+        # Hashable, so the repository built from it can be cached per settings instance
+        frozen = True
 
 
 class TestSettings(BaseSettings):
@@ -0,0 +1,92 @@
+"""
+Causal consistency tokens shared by the consistency middleware and the repositories.
+
+A token carries the cluster and operation time of the latest operation a
+client has seen. Reads that start from it wait until the server they hit
+has caught up, so a client reading from a secondary sees its own writes.
+"""
+
+import base64
+import binascii
+import contextvars
+import typing
+
+import bson
+from bson.errors import BSONError
+
+
+class CausalToken:
+    """Latest cluster and operation time seen while handling one request."""
+
+    def __init__(
+        self, cluster_time: dict = None, operation_time: bson.Timestamp = None
+    ):
+        self.cluster_time = cluster_time
+        self.operation_time = operation_time
+        self.advanced = False
+
+    def advance(
+        self,
+        cluster_time: typing.Optional[dict],
+        operation_time: typing.Optional[bson.Timestamp],
+    ):
+        """Moves the token forward, older times are ignored."""
+
+        if cluster_time is not None and (
+            self.cluster_time is None
+            or cluster_time["clusterTime"] > self.cluster_time["clusterTime"]
+        ):
+            self.cluster_time = cluster_time
+            self.advanced = True
+        if operation_time is not None and (
+            self.operation_time is None or operation_time > self.operation_time
+        ):
+            self.operation_time = operation_time
+            self.advanced = True
+
+    def encode(self) -> str:
+        document = {}
+        if self.cluster_time is not None:
+            document["clusterTime"] = self.cluster_time
+        if self.operation_time is not None:
+            document["operationTime"] = self.operation_time
+        return base64.urlsafe_b64encode(bson.encode(document)).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> typing.Optional["CausalToken"]:
+        """Parses an encoded token, returns None if it is malformed."""
+
+        try:
+            document = bson.decode(base64.urlsafe_b64decode(value))
+        except (binascii.Error, BSONError, ValueError):
+            return None
+        cluster_time = document.get("clusterTime")
+        operation_time = document.get("operationTime")
+        if not isinstance(operation_time, (bson.Timestamp, type(None))) or not (
+            cluster_time is None
+            or isinstance(cluster_time, dict)
+            and isinstance(cluster_time.get("clusterTime"), bson.Timestamp)
+        ):
+            return None
+        return cls(cluster_time=cluster_time, operation_time=operation_time)
+
+
+_token: contextvars.ContextVar[typing.Optional[CausalToken]] = contextvars.ContextVar(
+    "causal_token", default=None
+)
+
+
+def set_token(token: CausalToken) -> contextvars.Token:
+    """Sets the causal token of the current request."""
+
+    return _token.set(token)
+
+
+def reset_token(token: contextvars.Token):
+    _token.reset(token)
+
+
+def current() -> typing.Optional[CausalToken]:
+    """Returns the causal token of the current request, None outside a request."""
+
+    return _token.get()
@@ -0,0 +1,35 @@
+"""
+Request deadlines shared between the deadline middleware and the repositories.
+"""
+
+import contextvars
+import time
+import typing
+
+_deadline: contextvars.ContextVar[typing.Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+def set_deadline(timeout_s: float) -> contextvars.Token:
+    """Sets the deadline of the current request to timeout_s from now."""
+
+    return _deadline.set(time.monotonic() + timeout_s)
+
+
+def reset_deadline(token: contextvars.Token):
+    _deadline.reset(token)
+
+
+def remaining() -> typing.Optional[float]:
+    """Returns the seconds left until the current request deadline, None without one."""
+
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    time_left = remaining()
+    return time_left is not None and time_left <= 0
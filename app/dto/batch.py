@@ -0,0 +1,35 @@
+import typing
+
+from pydantic import BaseModel, validator
+
+
+class BatchOperation(BaseModel):
+    """BatchOperation is a single movie route call inside a batch request."""
+
+    method: str
+    path: str
+    body: typing.Optional[dict] = None
+    # Only Prefer is read, by PATCH /movie/{movie_id}
+    headers: typing.Optional[dict[str, str]] = None
+
+    @validator("method")
+    def method_supported(cls, v):
+        v = v.upper()
+        if v not in ("GET", "POST", "PATCH", "DELETE"):
+            raise ValueError("The method should be one of GET, POST, PATCH or DELETE.")
+        return v
+
+
+class BatchRequestBody(BaseModel):
+    """BatchRequestBody is used as the body for the batch endpoint."""
+
+    operations: list[BatchOperation]
+
+
+class BatchOperationResult(BaseModel):
+    status: int
+    body: typing.Any = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchOperationResult]
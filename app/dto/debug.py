@@ -0,0 +1,65 @@
+import typing
+
+from pydantic import BaseModel
+
+
+class SlowQueryShape(BaseModel):
+    """SlowQueryShape aggregates the slow repository operations of one query shape."""
+
+    operation: str
+    shape: str
+    count: int
+    total_ms: float
+    max_ms: float
+    plan: typing.Optional[dict] = None
+
+
+class SlowQueriesResponse(BaseModel):
+    shapes: list[SlowQueryShape]
+
+
+class ProfiledRoutesResponse(BaseModel):
+    """ProfiledRoutesResponse maps each profiled route to its profiled requests."""
+
+    routes: dict[str, int]
+
+
+class RouteAllocationsResponse(BaseModel):
+    """RouteAllocationsResponse is the traced memory a route's requests left behind."""
+
+    route: str
+    requests: int
+    mean_bytes: float
+    max_bytes: int
+    total_bytes: int
+
+
+class AllocationSnapshotResponse(BaseModel):
+    id: int
+    taken_at: float
+    traced_bytes: int
+
+
+class AllocationsResponse(BaseModel):
+    tracing: bool
+    traced_bytes: int
+    peak_bytes: int
+    routes: list[RouteAllocationsResponse]
+    snapshots: list[AllocationSnapshotResponse]
+
+
+class AllocationDiffLineResponse(BaseModel):
+    """AllocationDiffLineResponse is the change in memory traced to a line in `app/`."""
+
+    file: str
+    line: int
+    size_diff_bytes: int
+    size_bytes: int
+    count_diff: int
+    count: int
+
+
+class AllocationDiffResponse(BaseModel):
+    start: int
+    end: int
+    lines: list[AllocationDiffLineResponse]
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class HealthResponse(BaseModel):
+    """HealthResponse represents the lifecycle state of the process."""
+
+    status: str
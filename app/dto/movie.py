@@ -14,17 +14,13 @@ class CreateMovieBody(BaseModel):
     @validator("title")
     def title_length_gt_one(cls, v):
         if not 221 > len(v) > 2:
-            raise ValueError(
-                "The movie title should be 2 to 220 characters long."
-            )
+            raise ValueError("The movie title should be 2 to 220 characters long.")
         return v
 
     @validator("description")
     def description_length_gt_one(cls, v):
         if not 5001 > len(v) > 2:
-            raise ValueError(
-                "The movie title should be 2 to 5000 characters long."
-            )
+            raise ValueError("The movie title should be 2 to 5000 characters long.")
         return v
 
     @validator("release_year")
@@ -59,17 +55,13 @@ class MovieUpdateBody(BaseModel):
     @validator("title")
     def title_length_gt_one(cls, v):
         if not 221 > len(v) > 2:
-            raise ValueError(
-                "The movie title should be 2 to 220 characters long."
-            )
+            raise ValueError("The movie title should be 2 to 220 characters long.")
         return v
 
     @validator("description")
     def description_length_gt_one(cls, v):
         if not 5001 > len(v) > 2:
-            raise ValueError(
-                "The movie title should be 2 to 5000 characters long."
-            )
+            raise ValueError("The movie title should be 2 to 5000 characters long.")
         return v
 
     @validator("release_year")
@@ -79,7 +71,14 @@ class MovieUpdateBody(BaseModel):
         return v
 
 
-
-
 class MovieDeleteResponse(BaseModel):
     movie_id: str
+
+
+class MovieBulkUpdateResponse(BaseModel):
+    matched_count: int
+    modified_count: int
+
+
+class MovieBulkDeleteResponse(BaseModel):
+    deleted_count: int
@@ -0,0 +1,134 @@
+"""
+Garbage collector policy and pause metrics.
+
+List requests allocate thousands of short-lived objects, which trigger
+frequent generation 0 and 1 collections, and the occasional full
+collection that scans every object of the process. Freezing the objects
+built at startup keeps full collections from scanning them again, and
+from writing to their pages, which Gunicorn's preloaded workers share with
+the master copy-on-write.
+
+Pauses are only queued by the collector callback and exported to
+prometheus_client by a task of the event loop. In multiprocess mode every
+metric value is guarded by one non-reentrant lock, and a collection that
+starts while it is held would deadlock the worker if the callback
+observed the pause itself.
+"""
+
+import asyncio
+import collections
+import gc
+import time
+import typing
+
+from fastapi import FastAPI
+from prometheus_client import Histogram
+
+GC_PAUSE = Histogram(
+    "gc_pause_seconds",
+    "Duration of garbage collections, per generation collected.",
+    ["generation"],
+    buckets=(
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+    ),
+)
+
+_collection_started = 0.0
+# Generation and duration of the collections not exported yet, the oldest are
+# dropped when nothing exports them
+_pauses: collections.deque[tuple[int, float]] = collections.deque(maxlen=10_000)
+
+
+def _record_pause(phase: str, info: dict):
+    global _collection_started
+    # Collections run one at a time, holding the GIL. Nothing here may take a lock.
+    if phase == "start":
+        _collection_started = time.perf_counter()
+    else:
+        _pauses.append((info["generation"], time.perf_counter() - _collection_started))
+
+
+def record_pauses():
+    """Exports the duration of every garbage collection of this process.
+
+    Callbacks are installed once, however often it is called.
+    """
+
+    if _record_pause not in gc.callbacks:
+        gc.callbacks.append(_record_pause)
+
+
+def export_pauses():
+    """Observes the pauses recorded since the last export."""
+
+    while _pauses:
+        generation, duration_s = _pauses.popleft()
+        GC_PAUSE.labels(generation=str(generation)).observe(duration_s)
+
+
+class PauseExporter:
+    """Exports the recorded pauses every `interval_s` from the running loop."""
+
+    def __init__(self, interval_s: float = 1.0):
+        self._interval_s = interval_s
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._export())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        export_pauses()
+
+    async def _export(self):
+        while True:
+            await asyncio.sleep(self._interval_s)
+            export_pauses()
+
+
+def set_thresholds(
+    gen0: int | None = None, gen1: int | None = None, gen2: int | None = None
+):
+    """Sets the collection thresholds of the generations given, keeping the others'."""
+
+    current = gc.get_threshold()
+    gc.set_threshold(
+        gen0 if gen0 is not None else current[0],
+        gen1 if gen1 is not None else current[1],
+        gen2 if gen2 is not None else current[2],
+    )
+
+
+def freeze(app: FastAPI):
+    """Builds what the app builds lazily, then freezes every live object.
+
+    Frozen objects are moved to the permanent generation and never
+    collected, so this is meant to run once, when the app has been built and
+    before it serves requests.
+    """
+
+    # OpenAPI schemas, the versioned ones included, are generated on their first
+    # request otherwise
+    app.openapi()
+    for route in app.routes:
+        if isinstance(getattr(route, "app", None), FastAPI):
+            route.app.openapi()
+    gc.collect()
+    gc.freeze()
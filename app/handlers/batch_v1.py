@@ -0,0 +1,302 @@
+import asyncio
+import re
+import urllib.parse
+import uuid
+
+from fastapi import APIRouter, Body, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi_versioning import versioned_api_route
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+from starlette.responses import JSONResponse
+
+from app.config import Settings, settings_instance
+from app.dto.batch import (
+    BatchOperation,
+    BatchOperationResult,
+    BatchRequestBody,
+    BatchResponse,
+)
+from app.dto.detail import DetailResponse
+from app.dto.movie import CreateMovieBody, MovieUpdateBody
+from app.entities.movie import Movie
+from app.handlers import movie_v1
+from app.handlers.handler_dependencies import movie_repository
+from app.handlers.timed_route import TimedRoute
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryDeadlineExceededException,
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+    RepositoryUnavailableException,
+)
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    route_class=versioned_api_route(1, route_class=TimedRoute),
+)
+
+_MOVIE_PATH = re.compile(r"^(?:/api/v1)?/movie(?:/(?P<movie_id>[^/]+))?/?$")
+
+_CREATE = "create"
+_DELETE = "delete"
+_SINGLE = "single"
+
+
+def _database_unreachable() -> BatchOperationResult:
+    return BatchOperationResult(
+        status=500,
+        body=jsonable_encoder(
+            DetailResponse(
+                message="The database is currently unreachable. Please try again later."
+            )
+        ),
+    )
+
+
+def _deadline_exceeded() -> BatchOperationResult:
+    return BatchOperationResult(
+        status=504,
+        body=jsonable_encoder(
+            DetailResponse(message="The request took longer than its deadline.")
+        ),
+    )
+
+
+def _unavailable(e: RepositoryUnavailableException) -> BatchOperationResult:
+    return BatchOperationResult(
+        status=503, body=jsonable_encoder(DetailResponse(message=str(e)))
+    )
+
+
+def _detail(status: int, message: str) -> BatchOperationResult:
+    return BatchOperationResult(
+        status=status, body=jsonable_encoder(DetailResponse(message=message))
+    )
+
+
+def _classify(operation: BatchOperation) -> tuple[str, str]:
+    """Returns how an operation is executed and the movie ID it targets.
+
+    Creates and deletes are grouped into repository bulk calls, reads and
+    updates run one by one.
+    """
+
+    match = _MOVIE_PATH.match(urllib.parse.urlsplit(operation.path).path)
+    if match is None:
+        return _SINGLE, ""
+    movie_id = urllib.parse.unquote(match.group("movie_id") or "")
+    if operation.method == "POST" and not movie_id:
+        return _CREATE, ""
+    if operation.method == "DELETE" and movie_id:
+        return _DELETE, movie_id
+    return _SINGLE, movie_id
+
+
+def _segments(operations: list[BatchOperation]) -> list[tuple[str, list[int]]]:
+    """Splits the operations into consecutive runs that can execute together.
+
+    A run of single operations is cut when a movie ID repeats, so operations
+    on the same movie keep their order.
+    """
+
+    segments = []
+    seen_ids = set()
+    for index, operation in enumerate(operations):
+        kind, movie_id = _classify(operation)
+        if (
+            not segments
+            or segments[-1][0] != kind
+            or (kind == _SINGLE and movie_id and movie_id in seen_ids)
+        ):
+            segments.append((kind, []))
+            seen_ids = set()
+        segments[-1][1].append(index)
+        seen_ids.add(movie_id)
+    return segments
+
+
+async def _run_creates(
+    operations: list[BatchOperation],
+    indexes: list[int],
+    repo: MovieRepository,
+    results: list,
+):
+    movies = []
+    created_indexes = []
+    for index in indexes:
+        try:
+            body = CreateMovieBody.parse_obj(operations[index].body or {})
+        except ValidationError as e:
+            results[index] = BatchOperationResult(
+                status=422, body={"detail": jsonable_encoder(e.errors())}
+            )
+            continue
+        movies.append(
+            Movie(
+                id=str(uuid.uuid4()),
+                title=body.title,
+                description=body.description,
+                release_year=body.release_year,
+                watched=body.watched,
+            )
+        )
+        created_indexes.append(index)
+
+    try:
+        await repo.create_many(movies)
+    except RepositoryDeadlineExceededException as _:
+        for index in created_indexes:
+            results[index] = _deadline_exceeded()
+        return
+    except RepositoryUnavailableException as e:
+        for index in created_indexes:
+            results[index] = _unavailable(e)
+        return
+    except PyMongoError as _:
+        for index in created_indexes:
+            results[index] = _database_unreachable()
+        return
+    for index, movie in zip(created_indexes, movies):
+        results[index] = BatchOperationResult(status=201, body={"id": movie.id})
+
+
+async def _run_deletes(
+    operations: list[BatchOperation],
+    indexes: list[int],
+    repo: MovieRepository,
+    results: list,
+):
+    try:
+        await repo.delete_many([_classify(operations[index])[1] for index in indexes])
+    except RepositoryDeadlineExceededException as _:
+        for index in indexes:
+            results[index] = _deadline_exceeded()
+        return
+    except RepositoryUnavailableException as e:
+        for index in indexes:
+            results[index] = _unavailable(e)
+        return
+    except PyMongoError as _:
+        for index in indexes:
+            results[index] = _database_unreachable()
+        return
+    for index in indexes:
+        results[index] = BatchOperationResult(status=204)
+
+
+async def _run_single(
+    operation: BatchOperation, repo: MovieRepository
+) -> BatchOperationResult:
+    _, movie_id = _classify(operation)
+    # Only GET and PATCH /movie/{movie_id} run one by one, like the routes
+    if not movie_id or operation.method not in ("GET", "PATCH"):
+        return BatchOperationResult(
+            status=405,
+            body=jsonable_encoder(
+                DetailResponse(
+                    message=(
+                        f"{operation.method} {operation.path} is not supported in a"
+                        " batch."
+                    )
+                )
+            ),
+        )
+
+    try:
+        if operation.method == "GET":
+            movie = await movie_v1.find_movie(repo, movie_id)
+            if movie is None:
+                return BatchOperationResult(
+                    status=404,
+                    body=jsonable_encoder(movie_v1.movie_not_found(movie_id)),
+                )
+            return BatchOperationResult(status=200, body=jsonable_encoder(movie))
+
+        try:
+            update_parameters = MovieUpdateBody.parse_obj(operation.body or {})
+        except ValidationError as e:
+            return BatchOperationResult(
+                status=422, body={"detail": jsonable_encoder(e.errors())}
+            )
+        headers = {
+            name.lower(): value for name, value in (operation.headers or {}).items()
+        }
+        result = await movie_v1.update_movie(
+            repo,
+            movie_id,
+            update_parameters,
+            movie_v1.prefers_representation(headers.get("prefer")),
+        )
+        return BatchOperationResult(status=200, body=jsonable_encoder(result))
+    except RepositoryException as e:
+        return _detail(400, str(e))
+    except RepositoryMovieNotFoundException as e:
+        return _detail(404, str(e))
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded()
+    except RepositoryUnavailableException as e:
+        return _unavailable(e)
+    except PyMongoError as _:
+        return _database_unreachable()
+
+
+@router.post(
+    "",
+    response_model=BatchResponse,
+    responses={400: {"model": DetailResponse}},
+)
+async def post_batch(
+    batch: BatchRequestBody = Body(
+        ..., title="Batch", description="The movie operations to run, in order"
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+    settings: Settings = Depends(settings_instance),
+):
+    """Runs many movie operations in one request.
+
+    Each operation is a method, a movie route path such as `/movie/` or
+    `/movie/{movie_id}` and an optional body. Consecutive creates and deletes
+    are sent to the repository as single bulk calls, consecutive reads and
+    updates run concurrently up to `batch_max_concurrency`.
+
+    Returns
+    ------
+    HTTP 200
+        With one status and body per operation, in request order.
+
+    HTTP 400
+        If more than `batch_max_operations` operations are sent.
+    """
+
+    operations = batch.operations
+    if len(operations) > settings.batch_max_operations:
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(
+                DetailResponse(
+                    message=(
+                        "A batch can contain at most"
+                        f" {settings.batch_max_operations} operations."
+                    )
+                )
+            ),
+        )
+
+    results: list = [None] * len(operations)
+    semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+
+    async def run_single(index: int):
+        async with semaphore:
+            results[index] = await _run_single(operations[index], repo)
+
+    for kind, indexes in _segments(operations):
+        if kind == _CREATE:
+            await _run_creates(operations, indexes, repo, results)
+        elif kind == _DELETE:
+            await _run_deletes(operations, indexes, repo, results)
+        else:
+            await asyncio.gather(*(run_single(index) for index in indexes))
+
+    return BatchResponse(results=results)
@@ -0,0 +1,430 @@
+import secrets
+import tracemalloc
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+from app import allocations
+from app.allocations import AllocationTracker
+from app.config import Settings, settings_instance
+from app.dto.debug import (
+    AllocationDiffLineResponse,
+    AllocationDiffResponse,
+    AllocationSnapshotResponse,
+    AllocationsResponse,
+    ProfiledRoutesResponse,
+    RouteAllocationsResponse,
+    SlowQueriesResponse,
+    SlowQueryShape,
+)
+from app.dto.detail import DetailResponse
+from app.handlers.handler_dependencies import slow_operation_log
+from app.profiling import SamplingProfiler
+from app.repository.movie.slow_operations import SlowOperationLog
+
+router = APIRouter(prefix="/debug", tags=["debug"], include_in_schema=False)
+
+
+def _admin_denied(settings: Settings, admin_token: str | None) -> JSONResponse | None:
+    """Returns the response refusing a debug request, None if the admin token fits."""
+
+    if settings.admin_token is None:
+        return JSONResponse(
+            status_code=404,
+            content=jsonable_encoder(DetailResponse(message="Not found.")),
+        )
+    if admin_token is None or not secrets.compare_digest(
+        admin_token, settings.admin_token
+    ):
+        return JSONResponse(
+            status_code=403,
+            content=jsonable_encoder(
+                DetailResponse(message="A valid X-Admin-Token header is required.")
+            ),
+        )
+    return None
+
+
+@router.get(
+    "/slow-queries",
+    response_model=SlowQueriesResponse,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def get_slow_queries(
+    limit: int = Query(
+        20,
+        title="Limit",
+        description="The maximum number of shapes to be returned.",
+        ge=1,
+    ),
+    x_admin_token: str | None = Header(None),
+    log: SlowOperationLog = Depends(slow_operation_log),
+    settings: Settings = Depends(settings_instance),
+):
+    """Lists the query shapes that spent the most time in slow repository operations.
+
+    Returns
+    ------
+    HTTP 200
+        With the shapes, their slow operation count and time, and the explain
+        plan summary of a sampled operation if one was captured.
+
+    HTTP 403
+        If the X-Admin-Token header doesn't match `admin_token`.
+
+    HTTP 404
+        If `admin_token` isn't set.
+    """
+
+    denied = _admin_denied(settings, x_admin_token)
+    if denied is not None:
+        return denied
+
+    return SlowQueriesResponse(
+        shapes=[
+            SlowQueryShape(
+                operation=stats.operation,
+                shape=stats.shape,
+                count=stats.count,
+                total_ms=stats.total_s * 1000,
+                max_ms=stats.max_s * 1000,
+                plan=stats.plan,
+            )
+            for stats in log.top(limit)
+        ]
+    )
+
+
+def _profiler(request: Request) -> SamplingProfiler | None:
+    return request.app.state.profiler
+
+
+def _allocation_tracker(request: Request) -> AllocationTracker | None:
+    return request.app.state.allocation_tracker
+
+
+def _tool_denied(
+    settings: Settings, admin_token: str | None, tool: object | None, name: str
+) -> JSONResponse | None:
+    """Like `_admin_denied`, also refusing with 404 if the tool `name` isn't enabled."""
+
+    denied = _admin_denied(settings, admin_token)
+    if denied is None and tool is None:
+        return JSONResponse(
+            status_code=404,
+            content=jsonable_encoder(DetailResponse(message=f"{name} is not enabled.")),
+        )
+    return denied
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def get_profile(
+    route: str | None = Query(
+        None,
+        title="Route",
+        description="Only this route's stacks, for instance `GET get_movie_by_id`.",
+    ),
+    x_admin_token: str | None = Header(None),
+    profiler: SamplingProfiler | None = Depends(_profiler),
+    settings: Settings = Depends(settings_instance),
+):
+    """Downloads this worker's profile samples as collapsed stacks.
+
+    The file has one `stack count` line per stack, and can be fed to
+    flamegraph.pl or opened in speedscope. Without a
+    route, each stack starts with a frame named after its route.
+
+    Returns
+    ------
+    HTTP 200
+        With the collapsed stacks.
+
+    HTTP 403
+        If the X-Admin-Token header doesn't match `admin_token`.
+
+    HTTP 404
+        If `admin_token` isn't set or profiling isn't enabled.
+    """
+
+    denied = _tool_denied(settings, x_admin_token, profiler, "Profiling")
+    if denied is not None:
+        return denied
+
+    return PlainTextResponse(
+        profiler.collapsed(route),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+
+@router.get(
+    "/profile/routes",
+    response_model=ProfiledRoutesResponse,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def get_profiled_routes(
+    x_admin_token: str | None = Header(None),
+    profiler: SamplingProfiler | None = Depends(_profiler),
+    settings: Settings = Depends(settings_instance),
+):
+    """Lists the profiled routes of this worker and their profiled request counts."""
+
+    denied = _tool_denied(settings, x_admin_token, profiler, "Profiling")
+    if denied is not None:
+        return denied
+
+    return ProfiledRoutesResponse(routes=dict(profiler.requests_profiled))
+
+
+@router.delete(
+    "/profile",
+    status_code=204,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def delete_profile(
+    x_admin_token: str | None = Header(None),
+    profiler: SamplingProfiler | None = Depends(_profiler),
+    settings: Settings = Depends(settings_instance),
+):
+    """Discards this worker's profile samples."""
+
+    denied = _tool_denied(settings, x_admin_token, profiler, "Profiling")
+    if denied is not None:
+        return denied
+
+    profiler.clear()
+    return Response(status_code=204)
+
+
+def _snapshot_response(
+    snapshot: allocations.AllocationSnapshot,
+) -> AllocationSnapshotResponse:
+    return AllocationSnapshotResponse(
+        id=snapshot.id, taken_at=snapshot.taken_at, traced_bytes=snapshot.traced_bytes
+    )
+
+
+def _not_tracing_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=409,
+        content=jsonable_encoder(
+            DetailResponse(message="Allocation tracing is not started.")
+        ),
+    )
+
+
+@router.get(
+    "/allocations",
+    response_model=AllocationsResponse,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def get_allocations(
+    x_admin_token: str | None = Header(None),
+    tracker: AllocationTracker | None = Depends(_allocation_tracker),
+    settings: Settings = Depends(settings_instance),
+):
+    """Lists the traced memory each route's requests left behind in this worker.
+
+    The snapshots taken are listed too.
+
+    Returns
+    ------
+    HTTP 200
+        With the routes by total traced memory, the largest first.
+
+    HTTP 403
+        If the X-Admin-Token header doesn't match `admin_token`.
+
+    HTTP 404
+        If `admin_token` isn't set or allocation tracking isn't enabled.
+    """
+
+    denied = _tool_denied(settings, x_admin_token, tracker, "Allocation tracking")
+    if denied is not None:
+        return denied
+
+    traced_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    return AllocationsResponse(
+        tracing=tracker.tracing(),
+        traced_bytes=traced_bytes,
+        peak_bytes=peak_bytes,
+        routes=[
+            RouteAllocationsResponse(
+                route=route.route,
+                requests=route.requests,
+                mean_bytes=route.total_bytes / route.requests,
+                max_bytes=route.max_bytes,
+                total_bytes=route.total_bytes,
+            )
+            for route in sorted(
+                tracker.routes.values(), key=lambda r: r.total_bytes, reverse=True
+            )
+        ],
+        snapshots=[
+            _snapshot_response(snapshot) for snapshot in tracker.snapshots.values()
+        ],
+    )
+
+
+@router.post(
+    "/allocations/start",
+    status_code=204,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def start_allocation_tracing(
+    frames: int = Query(
+        25, title="Frames", description="The frames kept per allocation.", ge=1, le=100
+    ),
+    x_admin_token: str | None = Header(None),
+    tracker: AllocationTracker | None = Depends(_allocation_tracker),
+    settings: Settings = Depends(settings_instance),
+):
+    """Starts tracing allocations in this worker, discarding previous results.
+
+    Allocations made by libraries are attributed to the `app/` line calling
+    them when they are within `frames` frames of it.
+    """
+
+    denied = _tool_denied(settings, x_admin_token, tracker, "Allocation tracking")
+    if denied is not None:
+        return denied
+
+    tracker.start(frames)
+    return Response(status_code=204)
+
+
+@router.post(
+    "/allocations/stop",
+    status_code=204,
+    responses={403: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+)
+async def stop_allocation_tracing(
+    x_admin_token: str | None = Header(None),
+    tracker: AllocationTracker | None = Depends(_allocation_tracker),
+    settings: Settings = Depends(settings_instance),
+):
+    """Stops tracing allocations in this worker, keeping the results so far."""
+
+    denied = _tool_denied(settings, x_admin_token, tracker, "Allocation tracking")
+    if denied is not None:
+        return denied
+
+    tracker.stop()
+    return Response(status_code=204)
+
+
+@router.post(
+    "/allocations/snapshots",
+    status_code=201,
+    response_model=AllocationSnapshotResponse,
+    responses={
+        403: {"model": DetailResponse},
+        404: {"model": DetailResponse},
+        409: {"model": DetailResponse},
+    },
+)
+async def take_allocation_snapshot(
+    x_admin_token: str | None = Header(None),
+    tracker: AllocationTracker | None = Depends(_allocation_tracker),
+    settings: Settings = Depends(settings_instance),
+):
+    """Takes a snapshot of the memory traced in this worker, to diff with another.
+
+    Returns
+    ------
+    HTTP 201
+        With the ID of the snapshot.
+
+    HTTP 409
+        If tracing isn't started.
+    """
+
+    denied = _tool_denied(settings, x_admin_token, tracker, "Allocation tracking")
+    if denied is not None:
+        return denied
+    if not tracker.tracing():
+        return _not_tracing_response()
+
+    return _snapshot_response(await tracker.snapshot())
+
+
+@router.get(
+    "/allocations/diff",
+    response_model=AllocationDiffResponse,
+    responses={
+        403: {"model": DetailResponse},
+        404: {"model": DetailResponse},
+        409: {"model": DetailResponse},
+    },
+)
+async def get_allocation_diff(
+    start: int = Query(
+        ..., title="Start", description="The ID of the earlier snapshot."
+    ),
+    end: int | None = Query(
+        None,
+        title="End",
+        description="The ID of the later snapshot, a new one if not given.",
+    ),
+    limit: int = Query(
+        20,
+        title="Limit",
+        description="The maximum number of lines to be returned.",
+        ge=1,
+    ),
+    x_admin_token: str | None = Header(None),
+    tracker: AllocationTracker | None = Depends(_allocation_tracker),
+    settings: Settings = Depends(settings_instance),
+):
+    """Diffs two snapshots, by the file and line in `app/` that allocated the memory.
+
+    Returns
+    ------
+    HTTP 200
+        With the lines whose traced memory changed the most first.
+
+    HTTP 404
+        If a snapshot doesn't exist, only the last ones are kept.
+
+    HTTP 409
+        If `end` isn't given and tracing isn't started.
+    """
+
+    denied = _tool_denied(settings, x_admin_token, tracker, "Allocation tracking")
+    if denied is not None:
+        return denied
+
+    if end is None:
+        if not tracker.tracing():
+            return _not_tracing_response()
+        end = (await tracker.snapshot()).id
+    for snapshot_id in (start, end):
+        if snapshot_id not in tracker.snapshots:
+            return JSONResponse(
+                status_code=404,
+                content=jsonable_encoder(
+                    DetailResponse(message=f"Snapshot {snapshot_id} not found.")
+                ),
+            )
+
+    return AllocationDiffResponse(
+        start=start,
+        end=end,
+        lines=[
+            AllocationDiffLineResponse(
+                file=line.file,
+                line=line.line,
+                size_diff_bytes=line.size_diff,
+                size_bytes=line.size,
+                count_diff=line.count_diff,
+                count=line.count,
+            )
+            for line in allocations.diff(
+                tracker.snapshots[start], tracker.snapshots[end]
+            )[:limit]
+        ],
+    )
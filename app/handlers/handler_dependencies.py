@@ -1,34 +1,140 @@
+import json
 from collections import namedtuple
 from functools import lru_cache
 
 from fastapi import Depends, Query
 
+from app import server_timing
 from app.config import Settings, settings_instance
 from app.repository.movie.abstractions import MovieRepository
+from app.repository.movie.adaptive_limiter import (
+    AdaptiveConcurrencyLimiter,
+    AdaptiveLimitMovieRepository,
+    AIMDLimit,
+    GradientLimit,
+)
+from app.repository.movie.cached import CachedMovieRepository
+from app.repository.movie.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerMovieRepository,
+)
+from app.repository.movie.instrumented import InstrumentedMovieRepository
 from app.repository.movie.mongo import MongoMovieRepository
+from app.repository.movie.slow_operations import (
+    SlowOperationLog,
+    SlowOperationMovieRepository,
+)
+from app.serialization import ResponseEncoder
 
+Pagination = namedtuple("Pagination", ["skip", "limit"])
+SearchParameters = namedtuple("SearchParameters", ["title", "release_year", "watched"])
 
+
+@lru_cache()
+def _make_slow_operation_log(settings: Settings) -> SlowOperationLog:
+    """Slow operation log shared by the repository and the debug routes."""
+
+    return SlowOperationLog(max_shapes=settings.slow_operation_max_shapes)
+
+
+@lru_cache()
+def _make_response_encoder(settings: Settings) -> ResponseEncoder | None:
+    """Response encoder shared by every request, None if offloading is disabled."""
+
+    if not settings.offload_serialization_enabled:
+        return None
+    return ResponseEncoder(
+        max_workers=settings.serialization_workers,
+        min_rows=settings.offload_serialization_min_rows,
+        min_bytes=settings.offload_serialization_min_bytes,
+    )
+
+
+@lru_cache()
 def _make_movie_repository(settings: Settings) -> MovieRepository:
-    """Movie repository instance to be used as a FastAPI dependency."""
+    """Movie repository instance shared by every request using the same settings."""
 
-    return MongoMovieRepository(
+    repository = MongoMovieRepository(
         connection_string=settings.mongo_connection_string,
         database=settings.mongo_database_name,
         server_selection_timeout_ms=settings.server_selection_timeout_ms,
+        id_as_primary_key=settings.mongo_id_as_primary_key,
+        legacy_id_fallback=settings.mongo_legacy_id_fallback,
+        read_connection_string=settings.mongo_read_connection_string,
+        read_preference=settings.mongo_read_preference,
+        read_max_staleness_s=settings.mongo_read_max_staleness_s,
+        max_pool_size=settings.mongo_max_pool_size,
+        read_max_pool_size=settings.mongo_read_max_pool_size,
+        min_pool_size=settings.mongo_min_pool_size,
+        causal_consistency=settings.mongo_causal_consistency,
+        write_concerns=json.loads(settings.mongo_write_concerns),
+        monitoring=settings.mongo_monitoring_enabled,
     )
+    if settings.slow_operation_threshold_ms is not None:
+        repository = SlowOperationMovieRepository(
+            repository,
+            log=_make_slow_operation_log(settings),
+            threshold_s=settings.slow_operation_threshold_ms / 1000,
+            explain_sample_rate=settings.slow_operation_explain_sample_rate,
+        )
+    if settings.repository_metrics_enabled:
+        repository = InstrumentedMovieRepository(repository, backend="mongo")
+    if settings.adaptive_concurrency_enabled:
+        limit_algorithm = {"aimd": AIMDLimit, "gradient": GradientLimit}[
+            settings.adaptive_concurrency_algorithm
+        ]
+        repository = AdaptiveLimitMovieRepository(
+            repository,
+            limiter=AdaptiveConcurrencyLimiter(
+                limit_algorithm(
+                    initial_limit=settings.adaptive_concurrency_initial_limit,
+                    min_limit=settings.adaptive_concurrency_min_limit,
+                    max_limit=settings.adaptive_concurrency_max_limit,
+                )
+            ),
+        )
+    if settings.circuit_breaker_enabled:
+        repository = CircuitBreakerMovieRepository(
+            repository,
+            breaker=CircuitBreaker(
+                probe=repository.ping,
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                probe_interval_s=settings.circuit_breaker_probe_interval_s,
+                half_open_max_calls=settings.circuit_breaker_half_open_max_calls,
+            ),
+        )
+    if settings.query_cache_enabled:
+        # Outermost, so hits skip the concurrency limit and are served while the circuit
+        # is open
+        repository = CachedMovieRepository(
+            repository,
+            ttl_s=settings.query_cache_ttl_s,
+            stale_s=settings.query_cache_stale_s,
+            max_bytes=settings.query_cache_max_bytes,
+        )
+    return repository
 
 
-def movie_repository(settings: Settings = Depends(settings_instance)):
-    """Workaround function to cache _make_movie_repository()."""
+async def movie_repository(settings: Settings = Depends(settings_instance)):
+    """Movie repository instance to be used as a FastAPI dependency."""
 
-    @lru_cache()
-    def cache():
+    with server_timing.phase("movie_repository"):
         return _make_movie_repository(settings)
 
-    return cache()
 
+async def slow_operation_log(settings: Settings = Depends(settings_instance)):
+    """Slow operation log instance to be used as a FastAPI dependency."""
+
+    return _make_slow_operation_log(settings)
 
-def pagination_params(
+
+async def response_encoder(settings: Settings = Depends(settings_instance)):
+    """Encoder of large responses as a dependency, None if offloading is disabled."""
+
+    return _make_response_encoder(settings)
+
+
+async def pagination_params(
     skip: int = Query(
         0, title="Skip", description="The number of results to be skipped.", ge=0
     ),
@@ -38,5 +144,24 @@ def pagination_params(
 ):
     """Returns a namedtuple consisting of skip and limit for pagination."""
 
-    Pagination = namedtuple("Pagination", ["skip", "limit"])
-    return Pagination(skip=skip, limit=limit)
+    with server_timing.phase("pagination_params"):
+        return Pagination(skip=skip, limit=limit)
+
+
+async def search_params(
+    title: str | None = Query(
+        None, title="Title", description="The title of the movie.", min_length=2
+    ),
+    release_year: int | None = Query(
+        None,
+        title="Release Year",
+        description="The release year of the movie.",
+        gt=1894,
+    ),
+    watched: bool | None = Query(
+        None, title="Watched", description="Whether the movie is watched or not"
+    ),
+):
+    """Returns a namedtuple consisting of the movie search fields."""
+
+    return SearchParameters(title=title, release_year=release_year, watched=watched)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.dto.health import HealthResponse
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live", response_model=HealthResponse)
+async def live(request: Request):
+    """Liveness probe, answered from the lifecycle state without touching the database.
+
+    Returns
+    ------
+    HTTP 200
+        While the process can handle requests.
+    """
+
+    return HealthResponse(status=request.app.state.lifecycle.state)
+
+
+@router.get(
+    "/ready",
+    response_model=HealthResponse,
+    responses={503: {"model": HealthResponse}},
+)
+async def ready(request: Request):
+    """Readiness probe, answered from the lifecycle state without touching the database.
+
+    Returns
+    ------
+    HTTP 200
+        Once warm-up has finished.
+
+    HTTP 503
+        Until then.
+    """
+
+    lifecycle = request.app.state.lifecycle
+    if not lifecycle.ready:
+        return JSONResponse(
+            status_code=503,
+            content=jsonable_encoder(HealthResponse(status=lifecycle.state)),
+        )
+    return HealthResponse(status=lifecycle.state)
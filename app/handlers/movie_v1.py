@@ -1,25 +1,141 @@
 import typing
 import uuid
 
-from fastapi import APIRouter, Body, Depends, Query
+from fastapi import APIRouter, Body, Depends, Header, Query
 from fastapi.encoders import jsonable_encoder
 from fastapi_versioning import versioned_api_route
 from pymongo.errors import PyMongoError
 from starlette.responses import JSONResponse, Response
 
+from app import server_timing
+from app.config import Settings, settings_instance
 from app.dto.detail import DetailResponse
 from app.dto.movie import (
     CreateMovieBody,
+    MovieBulkDeleteResponse,
+    MovieBulkUpdateResponse,
     MovieCreatedResponse,
     MovieResponse,
-    MovieUpdateBody,
     MovieResponseWithCount,
+    MovieUpdateBody,
 )
 from app.entities.movie import Movie
-from app.handlers.handler_dependencies import movie_repository, pagination_params
-from app.repository.movie.abstractions import MovieRepository, RepositoryException, RepositoryMovieNotFoundException
+from app.handlers.handler_dependencies import (
+    movie_repository,
+    pagination_params,
+    response_encoder,
+    search_params,
+)
+from app.handlers.timed_route import TimedRoute
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryDeadlineExceededException,
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+    RepositoryUnavailableException,
+)
+from app.serialization import ResponseEncoder
+
+router = APIRouter(
+    prefix="/movie",
+    tags=["movies"],
+    route_class=versioned_api_route(1, route_class=TimedRoute),
+)
+
+
+def _deadline_exceeded_response() -> JSONResponse:
+    """504 returned once the request deadline has cut a database operation short."""
+
+    return JSONResponse(
+        status_code=504,
+        content=jsonable_encoder(
+            DetailResponse(message="The request took longer than its deadline.")
+        ),
+    )
+
+
+def _movies_with_count(movies: list[Movie], total_count: int) -> MovieResponseWithCount:
+    return MovieResponseWithCount(
+        movies=[
+            MovieResponse(
+                id=movie.id,
+                title=movie.title,
+                description=movie.description,
+                release_year=movie.release_year,
+                watched=movie.watched,
+            )
+            for movie in movies
+        ],
+        count=total_count,
+    )
+
+
+def _movie_response(movie: Movie) -> MovieResponse:
+    return MovieResponse(
+        id=movie.id,
+        title=movie.title,
+        description=movie.description,
+        release_year=movie.release_year,
+        watched=movie.watched,
+    )
+
+
+def movie_not_found(movie_id: str) -> DetailResponse:
+    return DetailResponse(message=f"Movie with ID {movie_id} not found.")
+
+
+def prefers_representation(prefer: str | None) -> bool:
+    """Whether a Prefer header asks for the updated movie in the response."""
+
+    return prefer is not None and "return=representation" in prefer
+
+
+async def find_movie(repo: MovieRepository, movie_id: str) -> MovieResponse | None:
+    """Reads a movie by ID, None if it doesn't exist. Shared with the batch endpoint."""
+
+    with server_timing.phase("repository"):
+        movie = await repo.get_by_id(movie_id=movie_id)
+    if movie is None:
+        return None
+    with server_timing.phase("conversion"):
+        return _movie_response(movie)
+
+
+async def update_movie(
+    repo: MovieRepository,
+    movie_id: str,
+    update_parameters: MovieUpdateBody,
+    return_representation: bool,
+) -> MovieResponse | DetailResponse:
+    """Updates a movie by ID, returns the updated movie if return_representation
+    is set. Shared with the batch endpoint.
+
+    Raises
+    ------
+    RepositoryException
+        If movie ID update attempted.
+
+    RepositoryMovieNotFoundException
+        If movie ID not found.
+    """
+
+    parameters = update_parameters.dict(exclude_unset=True, exclude_none=True)
+    if return_representation:
+        return _movie_response(
+            await repo.update_and_get(movie_id=movie_id, update_parameters=parameters)
+        )
+    await repo.update(movie_id=movie_id, update_parameters=parameters)
+    return DetailResponse(message=f"Movie with ID {movie_id} updated.")
+
 
-router = APIRouter(prefix="/movie", tags=["movies"], route_class=versioned_api_route(1))
+def _unavailable_response(e: RepositoryUnavailableException) -> JSONResponse:
+    """503 returned without waiting on the database while it is known to be down."""
+
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(e.retry_after)},
+        content=jsonable_encoder(DetailResponse(message=str(e))),
+    )
 
 
 @router.post("/", status_code=201, response_model=MovieCreatedResponse)
@@ -42,6 +158,10 @@ async def post_create_movie(
             )
         )
         return MovieCreatedResponse(id=movie_id)
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
     except PyMongoError as _:
         return JSONResponse(
             status_code=500,
@@ -65,21 +185,17 @@ async def get_movie_by_id(
     """Returns a movie if it exists, 404 if not."""
 
     try:
-        movie = await repo.get_by_id(movie_id=movie_id)
+        movie = await find_movie(repo, movie_id)
         if movie is None:
             return JSONResponse(
                 status_code=404,
-                content=jsonable_encoder(
-                    DetailResponse(message=f"Movie with ID {movie_id} not found.")
-                ),
+                content=jsonable_encoder(movie_not_found(movie_id)),
             )
-        return MovieResponse(
-            id=movie.id,
-            title=movie.title,
-            description=movie.description,
-            release_year=movie.release_year,
-            watched=movie.watched,
-        )
+        return movie
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
     except PyMongoError as _:
         return JSONResponse(
             status_code=500,
@@ -102,50 +218,28 @@ async def get_movie_by_id(
     },
 )
 async def get_movie_by_fields(
-    title: str
-    | None = Query(
-        None, title="Title", description="The title of the movie.", min_length=2
-    ),
-    release_year: int
-    | None = Query(
-        None,
-        title="Release Year",
-        description="The release year of the movie.",
-        gt=1894,
-    ),
-    watched: bool
-    | None = Query(
-        None, title="Watched", description="Whether the movie is watched or not"
-    ),
+    search=Depends(search_params),
     repo: MovieRepository = Depends(movie_repository),
     pagination=Depends(pagination_params),
+    encoder: ResponseEncoder | None = Depends(response_encoder),
 ):
     """Returns the list of movies with the matching search parameters
      and their total count regardless of pagination.
 
     Returns the list of all movies if no search parameters are given.
+    Large listings are built and encoded off the event loop.
     """
 
     try:
-        movies, total_count = await repo.get_by_fields(
-            title=title,
-            release_year=release_year,
-            watched=watched,
-            skip=pagination.skip,
-            limit=pagination.limit,
-        )
-        movies_to_return = []
-        for movie in movies:
-            movies_to_return.append(
-                MovieResponse(
-                    id=movie.id,
-                    title=movie.title,
-                    description=movie.description,
-                    release_year=movie.release_year,
-                    watched=movie.watched,
-                )
+        with server_timing.phase("repository"):
+            movies, total_count = await repo.get_by_fields(
+                title=search.title,
+                release_year=search.release_year,
+                watched=search.watched,
+                skip=pagination.skip,
+                limit=pagination.limit,
             )
-        if not movies_to_return:
+        if not movies:
             return JSONResponse(
                 status_code=404,
                 content=jsonable_encoder(
@@ -154,8 +248,17 @@ async def get_movie_by_fields(
                     )
                 ),
             )
-        response = MovieResponseWithCount(movies=movies_to_return, count=total_count)
-        return response
+        if encoder is not None and encoder.offloads(movies):
+            with server_timing.phase("offloaded_serialization"):
+                return await encoder.response(
+                    lambda: _movies_with_count(movies, total_count)
+                )
+        with server_timing.phase("conversion"):
+            return _movies_with_count(movies, total_count)
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
     except PyMongoError as _:
         return JSONResponse(
             status_code=500,
@@ -171,13 +274,23 @@ async def get_movie_by_fields(
 
 @router.patch(
     "/{movie_id}",
-    responses={200: {"model": DetailResponse}, 400: {"model": DetailResponse}, 404: {"model": DetailResponse}},
+    responses={
+        200: {"model": typing.Union[DetailResponse, MovieResponse]},
+        400: {"model": DetailResponse},
+        404: {"model": DetailResponse},
+    },
 )
 async def update(
     movie_id: str,
+    response: Response,
     update_parameters: MovieUpdateBody = Body(
         ..., title="Update body", description="The movie update parameters"
     ),
+    prefer: str | None = Header(
+        None,
+        title="Prefer",
+        description="Send return=representation to receive the updated movie.",
+    ),
     repo: MovieRepository = Depends(movie_repository),
 ):
     """Update a movie by ID.
@@ -187,6 +300,8 @@ async def update(
     movie_id: str
     update_parameters: dict
         Desired Movie fields and their values.
+    prefer: str
+        The Prefer header, return=representation returns the updated movie.
     repo: MovieRepository
         The repo to be used; In-memory or MongoDB.
 
@@ -203,13 +318,13 @@ async def update(
     """
 
     try:
-        await repo.update(
-            movie_id=movie_id,
-            update_parameters=update_parameters.dict(
-                exclude_unset=True, exclude_none=True
-            ),
+        return_representation = prefers_representation(prefer)
+        result = await update_movie(
+            repo, movie_id, update_parameters, return_representation
         )
-        return DetailResponse(message=f"Movie with ID {movie_id} updated.")
+        if return_representation:
+            response.headers["Preference-Applied"] = "return=representation"
+        return result
 
     except RepositoryException as e:
         return JSONResponse(
@@ -219,6 +334,158 @@ async def update(
         return JSONResponse(
             status_code=404, content=jsonable_encoder(DetailResponse(message=str(e)))
         )
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
+    except PyMongoError as _:
+        return JSONResponse(
+            status_code=500,
+            content=jsonable_encoder(
+                DetailResponse(
+                    message=str(
+                        "The database is currently unreachable. Please try again later."
+                    )
+                )
+            ),
+        )
+
+
+@router.patch(
+    "/",
+    responses={
+        200: {"model": MovieBulkUpdateResponse},
+        400: {"model": DetailResponse},
+        500: {"model": DetailResponse},
+    },
+)
+async def update_by_fields(
+    search=Depends(search_params),
+    update_parameters: MovieUpdateBody = Body(
+        ..., title="Update body", description="The movie update parameters"
+    ),
+    confirm: bool = Query(
+        False,
+        title="Confirm",
+        description="Must be true, every movie matching the parameters is updated.",
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+    settings: Settings = Depends(settings_instance),
+):
+    """Updates every movie with the matching search parameters.
+
+    Updates all movies if no search parameters are given.
+
+    Returns
+    ------
+    HTTP 200
+        With the matched and modified counts.
+
+    HTTP 400
+        If confirm is not set or more movies match than the server allows.
+    """
+
+    if not confirm:
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(
+                DetailResponse(
+                    message="Set confirm=true to update every matching movie."
+                )
+            ),
+        )
+
+    try:
+        matched_count, modified_count = await repo.update_by_fields(
+            update_parameters=update_parameters.dict(
+                exclude_unset=True, exclude_none=True
+            ),
+            title=search.title,
+            release_year=search.release_year,
+            watched=search.watched,
+            max_matched=settings.bulk_operation_max_matched,
+        )
+        return MovieBulkUpdateResponse(
+            matched_count=matched_count, modified_count=modified_count
+        )
+    except RepositoryException as e:
+        return JSONResponse(
+            status_code=400, content=jsonable_encoder(DetailResponse(message=str(e)))
+        )
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
+    except PyMongoError as _:
+        return JSONResponse(
+            status_code=500,
+            content=jsonable_encoder(
+                DetailResponse(
+                    message=str(
+                        "The database is currently unreachable. Please try again later."
+                    )
+                )
+            ),
+        )
+
+
+@router.delete(
+    "/",
+    responses={
+        200: {"model": MovieBulkDeleteResponse},
+        400: {"model": DetailResponse},
+        500: {"model": DetailResponse},
+    },
+)
+async def delete_by_fields(
+    search=Depends(search_params),
+    confirm: bool = Query(
+        False,
+        title="Confirm",
+        description="Must be true, every movie matching the parameters is deleted.",
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+    settings: Settings = Depends(settings_instance),
+):
+    """Deletes every movie with the matching search parameters.
+
+    Deletes all movies if no search parameters are given.
+
+    Returns
+    ------
+    HTTP 200
+        With the deleted count.
+
+    HTTP 400
+        If confirm is not set or more movies match than the server allows.
+    """
+
+    if not confirm:
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(
+                DetailResponse(
+                    message="Set confirm=true to delete every matching movie."
+                )
+            ),
+        )
+
+    try:
+        deleted_count = await repo.delete_by_fields(
+            title=search.title,
+            release_year=search.release_year,
+            watched=search.watched,
+            max_matched=settings.bulk_operation_max_matched,
+        )
+        return MovieBulkDeleteResponse(deleted_count=deleted_count)
+    except RepositoryException as e:
+        return JSONResponse(
+            status_code=400, content=jsonable_encoder(DetailResponse(message=str(e)))
+        )
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
     except PyMongoError as _:
         return JSONResponse(
             status_code=500,
@@ -248,6 +515,10 @@ async def delete(movie_id: str, repo: MovieRepository = Depends(movie_repository
     try:
         await repo.delete(movie_id=movie_id)
         return Response(status_code=204)
+    except RepositoryDeadlineExceededException as _:
+        return _deadline_exceeded_response()
+    except RepositoryUnavailableException as e:
+        return _unavailable_response(e)
     except PyMongoError as _:
         return JSONResponse(
             status_code=500,
@@ -0,0 +1,32 @@
+import functools
+import time
+
+from fastapi.routing import APIRoute
+
+from app import server_timing
+
+
+class TimedRoute(APIRoute):
+    """Marks when the endpoint is called and returns for the Server-Timing header.
+
+    Everything before the call is dependency resolution, everything after it
+    until the response starts is serialization.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+
+        @functools.wraps(call)
+        async def timed_call(**values):
+            timing = server_timing.current()
+            if timing is None:
+                return await call(**values)
+            timing.handler_started = time.perf_counter()
+            try:
+                return await call(**values)
+            finally:
+                timing.handler_finished = time.perf_counter()
+
+        # The request handler built by APIRoute calls the endpoint through the dependant
+        self.dependant.call = timed_call
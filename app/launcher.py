@@ -0,0 +1,228 @@
+"""
+Production launcher: one worker per available CPU, uvloop and httptools
+when installed, and workers recycled after a number of requests.
+
+Gunicorn supervises Uvicorn workers when it is installed. The app is built
+once in the master before the workers fork, so imports and route setup are
+shared copy-on-write; the MongoDB clients are only created in the workers,
+on first use, since they can't be shared across a fork. With `gc_freeze`,
+the app's objects are frozen before the fork, so collections in the
+workers don't touch, and copy, the pages they share with the master.
+
+Metrics are collected in prometheus_client's multiprocess mode, so a
+scrape of any worker reports all of them.
+
+On SIGTERM or SIGINT each worker drains before Uvicorn stops accepting
+connections: readiness fails and in-flight requests finish first.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import sys
+import tempfile
+import typing
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.config import Settings, settings_instance
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.arbiter import Arbiter
+    from uvicorn.workers import UvicornWorker
+except ImportError:
+    # Not installed, or not supported on this platform
+    BaseApplication = None
+
+logger = logging.getLogger(__name__)
+
+APP_FACTORY = "app.api:create_app"
+
+
+def cpu_quota(cgroup_root: str = "/sys/fs/cgroup") -> typing.Optional[float]:
+    """Returns the CPUs the container may use by its cgroup, None if unlimited.
+
+    Reads `cpu.max` on cgroup v2 and `cpu.cfs_quota_us` / `cpu.cfs_period_us`
+    on cgroup v1.
+    """
+
+    try:
+        with open(os.path.join(cgroup_root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    for cpu_dir in ("cpu", "cpu,cpuacct"):
+        try:
+            with open(os.path.join(cgroup_root, cpu_dir, "cpu.cfs_quota_us")) as f:
+                quota = int(f.read())
+            with open(os.path.join(cgroup_root, cpu_dir, "cpu.cfs_period_us")) as f:
+                period = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if quota <= 0 or period <= 0:
+            return None
+        return quota / period
+    return None
+
+
+def worker_count(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """Returns one worker per CPU available, rounding a fractional quota up."""
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cpu_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def _lifecycle(app):
+    """Finds the app's lifecycle under Uvicorn's middleware, None if it has none."""
+
+    while app is not None:
+        lifecycle = getattr(getattr(app, "state", None), "lifecycle", None)
+        if lifecycle is not None:
+            return lifecycle
+        app = getattr(app, "app", None)
+    return None
+
+
+class DrainingServer(uvicorn.Server):
+    """Uvicorn server that drains the app before shutting down.
+
+    Uvicorn only sends the lifespan shutdown event once it has closed its
+    listeners and its connections have finished, too late for readiness to
+    report the drain. This server runs `Lifecycle.drain` first, while it
+    still accepts connections, and only then shuts down as usual. A second
+    signal exits without waiting for the drain.
+    """
+
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self._drain_task: typing.Optional[asyncio.Task] = None
+
+    def handle_exit(self, sig, frame):
+        lifecycle = _lifecycle(self.config.loaded_app)
+        if lifecycle is None or self._drain_task is not None:
+            super().handle_exit(sig, frame)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from a plain signal handler, outside the event loop
+            super().handle_exit(sig, frame)
+            return
+        logger.info("Draining before shutdown")
+        self._drain_task = loop.create_task(lifecycle.drain())
+        self._drain_task.add_done_callback(
+            lambda _: uvicorn.Server.handle_exit(self, sig, frame)
+        )
+
+
+if BaseApplication is not None:
+
+    class DrainingUvicornWorker(UvicornWorker):
+        """Gunicorn worker serving with `DrainingServer`."""
+
+        async def _serve(self):
+            # UvicornWorker._serve, with the draining server
+            self.config.app = self.wsgi
+            server = DrainingServer(config=self.config)
+            self._install_sigquit_handler()
+            await server.serve(sockets=self.sockets)
+            if not server.started:
+                sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def prepare_multiprocess_metrics(directory: str = None) -> str:
+    """Points prometheus_client at a directory shared by the workers.
+
+    Files of a previous run in the directory are removed.
+
+    Must run before prometheus_client is imported, it picks its mode on
+    import. The directory is a new temporary one if not given.
+    """
+
+    if "prometheus_client" in sys.modules:
+        logger.warning(
+            "prometheus_client was imported before multiprocess mode was set up"
+        )
+    directory = directory or tempfile.mkdtemp(prefix="prometheus-")
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def _child_exit(server, worker):
+    """Gunicorn hook, drops an exited worker's values from the live gauges."""
+
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def _run_gunicorn(settings: Settings, workers: int):
+    from app.api import create_app
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                "bind": f"{settings.server_host}:{settings.server_port}",
+                "workers": workers,
+                "worker_class": "app.launcher.DrainingUvicornWorker",
+                "preload_app": True,
+                "max_requests": settings.server_max_requests,
+                "max_requests_jitter": settings.server_max_requests_jitter,
+                "graceful_timeout": settings.server_graceful_timeout_s,
+                "timeout": settings.server_graceful_timeout_s,
+                "child_exit": _child_exit,
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return create_app()
+
+    Application().run()
+
+
+def run(settings: Settings = None):
+    """Serves the API with `server_workers` workers, one per CPU if not set."""
+
+    settings = settings or settings_instance()
+    workers = settings.server_workers or worker_count()
+    logger.info("Starting %s workers", workers)
+    prepare_multiprocess_metrics(settings.metrics_multiprocess_dir)
+
+    if BaseApplication is not None:
+        _run_gunicorn(settings, workers)
+        return
+
+    # Uvicorn's own supervisor doesn't replace workers that exit, so requests
+    # aren't limited here: a recycled worker would never come back.
+    config = uvicorn.Config(
+        APP_FACTORY,
+        factory=True,
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+    )
+    server = DrainingServer(config)
+    # What uvicorn.run does, with the draining server
+    if workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
@@ -0,0 +1,132 @@
+"""
+Process lifecycle shared between the startup and shutdown handlers, the
+drain middleware and the health routes.
+"""
+
+import asyncio
+import logging
+import typing
+
+from app.repository.movie.abstractions import MovieRepository
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Tracks whether this process is ready for traffic, and its in-flight requests.
+
+    The state is only changed by the startup and shutdown phases, so health
+    checks answer from it without touching the database.
+    """
+
+    STARTING = "starting"
+    READY = "ready"
+    DRAINING = "draining"
+
+    def __init__(self, drain_timeout_s: float = 20):
+        self.drain_timeout_s = drain_timeout_s
+        self.state = self.STARTING
+        self.in_flight = 0
+        self._repository: typing.Optional[MovieRepository] = None
+        self._warm_up_task: typing.Optional[asyncio.Task] = None
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._drain_finished = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    @property
+    def draining(self) -> bool:
+        return self.state == self.DRAINING
+
+    def request_started(self):
+        self.in_flight += 1
+        self._drained.clear()
+
+    def request_finished(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._drained.set()
+
+    def start(
+        self,
+        repository: MovieRepository,
+        warm_up: bool = True,
+        connections: int = 0,
+        documents: int = 0,
+        retry_interval_s: float = 2.0,
+    ):
+        """Warms the repository up in the background, the process is ready once it is.
+
+        Warm-up is retried every `retry_interval_s` while the database can't be
+        reached, so the process starts answering liveness probes right away.
+        The repository is closed on shutdown.
+        """
+
+        self._repository = repository
+        if not warm_up:
+            self.state = self.READY
+            return
+        self._warm_up_task = asyncio.get_running_loop().create_task(
+            self._warm_up(repository, connections, documents, retry_interval_s)
+        )
+
+    async def _warm_up(
+        self,
+        repository: MovieRepository,
+        connections: int,
+        documents: int,
+        retry_interval_s: float,
+    ):
+        while True:
+            try:
+                await repository.warm_up(connections=connections, documents=documents)
+            except Exception as e:
+                logger.warning(
+                    "Warm-up failed, retrying in %ss: %s", retry_interval_s, e
+                )
+                await asyncio.sleep(retry_interval_s)
+                continue
+            self.state = self.READY
+            logger.info("Warm-up finished, ready to serve traffic")
+            return
+
+    async def drain(self):
+        """Fails readiness and new requests, then waits up to `drain_timeout_s`
+        for in-flight requests.
+
+        Run by the server when it is told to stop, while it still accepts
+        connections, so load balancers see the process leave before it stops
+        answering. Draining again returns once the first drain is over.
+        """
+
+        if self.draining:
+            await self._drain_finished.wait()
+            return
+        self.state = self.DRAINING
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+
+        try:
+            await asyncio.wait_for(self._drained.wait(), self.drain_timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "%s requests still in flight after draining for %ss",
+                self.in_flight,
+                self.drain_timeout_s,
+            )
+        finally:
+            self._drain_finished.set()
+
+    async def shutdown(self):
+        """Drains if the server hasn't, then flushes and closes the repository."""
+
+        await self.drain()
+
+        if self._repository is not None:
+            try:
+                await self._repository.flush()
+            finally:
+                await self._repository.close()
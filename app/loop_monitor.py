@@ -0,0 +1,119 @@
+"""
+Event loop lag and blocked callback monitoring.
+
+A task sleeps for a fixed interval and measures how late it wakes up, which
+is how long any ready coroutine of this worker waited for the loop. A
+watchdog thread notices when that task hasn't woken up for longer than the
+block threshold, which means a callback is holding the loop, and reports
+the stack and route of the request running at that moment.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing
+
+from prometheus_client import Counter, Histogram
+from starlette.types import Scope
+
+from app.middleware.profiling import route_name
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a callback scheduled to run at a given time.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total",
+    "Times a callback held the event loop longer than the block threshold, per route"
+    " running it.",
+    ["route"],
+)
+
+
+class LoopMonitor:
+    """Measures the lag of the running loop every `interval_s` and reports callbacks
+    holding it longer than `block_threshold_s`.
+
+    Requests registered with `request_started` are named in reports when
+    they are the task holding the loop; other tasks are reported as `background`.
+    """
+
+    def __init__(self, interval_s: float = 0.1, block_threshold_s: float = 0.2):
+        self._interval_s = interval_s
+        self._block_threshold_s = block_threshold_s
+        self.requests: dict[asyncio.Task, Scope] = {}
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: typing.Optional[int] = None
+        self._lag_task: typing.Optional[asyncio.Task] = None
+        self._watchdog: typing.Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # Monotonic time the lag task expects to wake up next
+        self._next_wake_up = 0.0
+        self._reported_wake_up = 0.0
+
+    def start(self):
+        """Starts monitoring the running loop."""
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._next_wake_up = time.monotonic() + self._interval_s
+        self._lag_task = self._loop.create_task(self._measure_lag())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+
+    def request_started(self, scope: Scope):
+        self.requests[asyncio.current_task()] = scope
+
+    def request_finished(self):
+        self.requests.pop(asyncio.current_task(), None)
+
+    async def _measure_lag(self):
+        while True:
+            self._next_wake_up = time.monotonic() + self._interval_s
+            await asyncio.sleep(self._interval_s)
+            EVENT_LOOP_LAG.observe(max(0.0, time.monotonic() - self._next_wake_up))
+
+    def _watch(self):
+        while not self._stopped.wait(self._block_threshold_s / 2):
+            next_wake_up = self._next_wake_up
+            blocked_s = time.monotonic() - next_wake_up
+            if (
+                blocked_s > self._block_threshold_s
+                and next_wake_up != self._reported_wake_up
+            ):
+                # Once per stall, the lag task moves _next_wake_up once the loop is free
+                # again
+                self._reported_wake_up = next_wake_up
+                self._report(blocked_s)
+
+    def _report(self, blocked_s: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        scope = self.requests.get(task)
+        route = route_name(scope) if scope is not None else "background"
+        EVENT_LOOP_BLOCKED.labels(route=route).inc()
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        logger.warning(
+            "Event loop blocked for over %.0f ms by %s, at:\n%s",
+            blocked_s * 1000,
+            route,
+            stack,
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import collections
+import typing
+
+from fastapi.encoders import jsonable_encoder
+from prometheus_client import Counter, Gauge
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.dto.detail import DetailResponse
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight_requests",
+    "Requests admitted and still being processed, per budget.",
+    ["budget"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queued_requests",
+    "Requests waiting for a slot, per budget.",
+    ["budget"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_requests_total",
+    "Requests rejected with 503 by admission control, per budget and reason.",
+    ["budget", "reason"],
+)
+
+
+class AdmissionBudget:
+    """Limits how many requests run at once, with a bounded FIFO wait queue.
+
+    A request beyond `max_in_flight` waits for a slot, unless `max_queued`
+    requests are already waiting or no slot frees up within `queue_timeout_s`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queued: int,
+        queue_timeout_s: float,
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout_s = queue_timeout_s
+        self.in_flight = 0
+        self._waiters: typing.Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.labels(budget=self.name).set(self.in_flight)
+        ADMISSION_QUEUE_DEPTH.labels(budget=self.name).set(len(self._waiters))
+
+    async def acquire(self) -> bool:
+        """Waits for a slot, returns False if the request should be rejected."""
+
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            return True
+        if len(self._waiters) >= self.max_queued:
+            ADMISSION_REJECTED.labels(budget=self.name, reason="queue_full").inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # The slot was handed over as the wait timed out
+                return True
+            ADMISSION_REJECTED.labels(budget=self.name, reason="queue_timeout").inc()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            self._update_gauges()
+
+    def release(self):
+        """Frees a slot, handing it to the oldest waiting request if there is one."""
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+
+class AdmissionControlMiddleware:
+    """Sheds load in front of the movie routes before it queues on the database pool.
+
+    Reads and writes draw from separate budgets so a burst of one can't starve
+    the other. Requests that can't be admitted get an immediate 503.
+    """
+
+    READ_METHODS = ("GET", "HEAD")
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        read_budget: AdmissionBudget,
+        write_budget: AdmissionBudget,
+        path_prefixes: tuple = ("/api/v1/movie", "/api/v1/batch"),
+    ):
+        self.app = app
+        self.read_budget = read_budget
+        self.write_budget = write_budget
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in self.READ_METHODS:
+            budget = self.read_budget
+        else:
+            budget = self.write_budget
+
+        if not await budget.acquire():
+            response = JSONResponse(
+                status_code=503,
+                headers={"Retry-After": "1"},
+                content=jsonable_encoder(
+                    DetailResponse(
+                        message="The server is overloaded. Please try again later."
+                    )
+                ),
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release()
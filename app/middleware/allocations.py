@@ -0,0 +1,31 @@
+import tracemalloc
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.allocations import AllocationTracker
+from app.middleware.profiling import route_name
+
+
+class AllocationTrackingMiddleware:
+    """Records the traced memory each request leaves behind, per route, while tracing.
+
+    Only installed when allocation tracking is enabled.
+    """
+
+    def __init__(self, app: ASGIApp, tracker: AllocationTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Tracing may have been stopped during the request
+            if tracemalloc.is_tracing():
+                after, _ = tracemalloc.get_traced_memory()
+                self.tracker.record(route_name(scope), after - before)
@@ -0,0 +1,84 @@
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.capture import TrafficCapture
+from app.middleware.profiling import route_name
+
+
+class CaptureMiddleware:
+    """Captures `sample_rate` of the requests.
+
+    Each capture has the method, path, query, body, status and duration.
+
+    Headers other than the content type aren't captured, since they carry
+    tokens. Bodies over `max_body_bytes` are left out and flagged as
+    truncated. Only installed when capture is configured.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        capture: TrafficCapture,
+        sample_rate: float = 0.01,
+        max_body_bytes: int = 65536,
+    ):
+        self.app = app
+        self.capture = capture
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        # Mounts rewrite the path in the scope while routing
+        path = scope["path"]
+        started_at = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        truncated = False
+        status = None
+
+        async def receive_wrapper() -> Message:
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                body.extend(message.get("body", b""))
+                if len(body) > self.max_body_bytes:
+                    truncated = True
+                    body.clear()
+            return message
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self.capture.record(
+                {
+                    "ts": started_at,
+                    "method": scope["method"],
+                    "path": path,
+                    "query": scope["query_string"].decode("latin-1"),
+                    "content_type": next(
+                        (
+                            value.decode("latin-1")
+                            for name, value in scope["headers"]
+                            if name == b"content-type"
+                        ),
+                        None,
+                    ),
+                    "body": body.decode("utf-8", errors="replace") if body else None,
+                    "body_truncated": truncated,
+                    "route": route_name(scope),
+                    "status": status,
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                }
+            )
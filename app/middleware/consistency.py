@@ -0,0 +1,46 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import consistency
+
+
+class CausalConsistencyMiddleware:
+    """Carries causal consistency tokens between a client's requests.
+
+    The token from the `X-Consistency-Token` request header is where the
+    request's reads start from. If the request advanced it, for instance with
+    a write, the new token is returned in the same response header so the
+    client's next request reads its own writes, even from a secondary.
+    """
+
+    HEADER = "x-consistency-token"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _token(self, scope: Scope) -> consistency.CausalToken:
+        for name, value in scope["headers"]:
+            if name == self.HEADER.encode():
+                token = consistency.CausalToken.decode(value.decode("latin-1"))
+                if token is not None:
+                    return token
+                break
+        return consistency.CausalToken()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = self._token(scope)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and token.advanced:
+                MutableHeaders(scope=message)[self.HEADER] = token.encode()
+            await send(message)
+
+        context_token = consistency.set_token(token)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            consistency.reset_token(context_token)
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import deadline
+from app.dto.detail import DetailResponse
+
+
+class DeadlineMiddleware:
+    """Gives every HTTP request a deadline and answers 504 once it passes.
+
+    The deadline is `default_timeout_ms` or the client's `X-Request-Timeout`
+    header in milliseconds, whichever is shorter. Repositories read it through
+    `app.deadline` to bound their queries, and the request task is cancelled
+    when it expires so its connections are freed for live requests.
+    """
+
+    def __init__(self, app: ASGIApp, default_timeout_ms: float):
+        self.app = app
+        self.default_timeout_s = default_timeout_ms / 1000
+
+    def _timeout_s(self, scope: Scope) -> float:
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout":
+                try:
+                    requested_s = float(value) / 1000
+                except ValueError:
+                    break
+                if requested_s > 0:
+                    return min(requested_s, self.default_timeout_s)
+                break
+        return self.default_timeout_s
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout_s = self._timeout_s(scope)
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        token = deadline.set_deadline(timeout_s)
+        timeout = asyncio.timeout(timeout_s)
+        try:
+            async with timeout:
+                await self.app(scope, receive, send_wrapper)
+        except TimeoutError:
+            # Timeouts raised by the app itself, such as a client's, aren't the
+            # deadline's
+            if response_started or not timeout.expired():
+                raise
+            response = JSONResponse(
+                status_code=504,
+                content=jsonable_encoder(
+                    DetailResponse(message="The request took longer than its deadline.")
+                ),
+            )
+            await response(scope, receive, send)
+        finally:
+            deadline.reset_deadline(token)
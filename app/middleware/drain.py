@@ -0,0 +1,50 @@
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.dto.detail import DetailResponse
+from app.lifecycle import Lifecycle
+
+
+class DrainMiddleware:
+    """Counts in-flight requests for the shutdown drain, refusing new ones meanwhile.
+
+    Health probes are neither counted nor refused, so readiness can report
+    the drain.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        lifecycle: Lifecycle,
+        exempt_path_prefixes: tuple = ("/health",),
+    ):
+        self.app = app
+        self.lifecycle = lifecycle
+        self.exempt_path_prefixes = exempt_path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(
+            self.exempt_path_prefixes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.lifecycle.draining:
+            response = JSONResponse(
+                status_code=503,
+                headers={"Connection": "close"},
+                content=jsonable_encoder(
+                    DetailResponse(
+                        message="The server is shutting down. Please try again."
+                    )
+                ),
+            )
+            await response(scope, receive, send)
+            return
+
+        self.lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.lifecycle.request_finished()
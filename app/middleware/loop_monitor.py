@@ -0,0 +1,25 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.loop_monitor import LoopMonitor
+
+
+class LoopMonitorMiddleware:
+    """Registers in-flight requests with the loop monitor.
+
+    Callbacks blocking the loop are then reported with their route.
+    """
+
+    def __init__(self, app: ASGIApp, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.request_finished()
@@ -0,0 +1,58 @@
+import itertools
+import secrets
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.profiling import SamplingProfiler
+
+
+def route_name(scope: Scope) -> str:
+    """Names the route serving a request by its method and endpoint, once routed."""
+
+    # Routing stores the matched endpoint in the scope
+    endpoint = scope.get("endpoint")
+    return f"{scope['method']} {getattr(endpoint, '__name__', 'unmatched')}"
+
+
+class ProfilingMiddleware:
+    """Profiles one request in every `sample_every`, and requests whose
+    `X-Profile-Token` header matches `token`.
+
+    Samples are aggregated under the route's method and endpoint name.
+    Only installed when profiling is configured.
+    """
+
+    HEADER = b"x-profile-token"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: SamplingProfiler,
+        sample_every: int | None = None,
+        token: str | None = None,
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.sample_every = sample_every
+        self.token = token
+        self._requests = itertools.count(1)
+
+    def _selected(self, scope: Scope) -> bool:
+        if self.sample_every and next(self._requests) % self.sample_every == 0:
+            return True
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == self.HEADER:
+                    return secrets.compare_digest(value, self.token.encode())
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        task = self.profiler.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.finish_request(task, route_name(scope))
@@ -0,0 +1,37 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import server_timing
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with the phases of the request.
+
+    Enabled for every request with `always`, otherwise only for requests
+    sending an `X-Server-Timing` header. Other requests pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, always: bool = False):
+        self.app = app
+        self.always = always
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not (
+            self.always
+            or any(name == b"x-server-timing" for name, _ in scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        token = server_timing.start()
+        timing = server_timing.current()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", timing.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timing.reset(token)
@@ -0,0 +1,147 @@
+"""
+Statistical profiler for live requests, shared between the profiling
+middleware and the debug routes.
+
+A sampler thread reads the event loop thread's stack every few
+milliseconds while a profiled request is in flight. A sample counts for a
+request when the task running on the loop at that moment is the one
+serving it, so the profile shows where the request spends event loop time.
+Time spent waiting on MongoDB isn't sampled, the Server-Timing header
+covers that.
+"""
+
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import typing
+
+# Stacks kept per route, the rest of the samples are counted as truncated
+_MAX_STACKS_PER_ROUTE = 10000
+_TRUNCATED = "[truncated]"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """Returns the stack ending at `frame` in collapsed form, outermost frame first."""
+
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class _ProfiledRequest:
+    __slots__ = ("loop", "thread_id", "stacks")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, thread_id: int):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.stacks: typing.Counter[str] = collections.Counter()
+
+
+class SamplingProfiler:
+    """Samples the stacks of profiled requests and aggregates them per route.
+
+    The sampler thread starts with the first profiled request, so a
+    profiler created before the workers fork samples in the worker, and
+    sleeps while no request is being profiled.
+    """
+
+    def __init__(self, interval_s: float = 0.005):
+        self._interval_s = interval_s
+        self._lock = threading.Lock()
+        self._requests: dict[asyncio.Task, _ProfiledRequest] = {}
+        self._active = threading.Event()
+        self._closed = False
+        self._thread: typing.Optional[threading.Thread] = None
+        self._routes: dict[str, typing.Counter[str]] = {}
+        self.requests_profiled: typing.Counter[str] = collections.Counter()
+
+    def start_request(self) -> asyncio.Task:
+        """Starts profiling the current task, returns it for `finish_request`."""
+
+        task = asyncio.current_task()
+        with self._lock:
+            self._requests[task] = _ProfiledRequest(
+                asyncio.get_running_loop(), threading.get_ident()
+            )
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sampling-profiler", daemon=True
+                )
+                self._thread.start()
+        self._active.set()
+        return task
+
+    def finish_request(self, task: asyncio.Task, route: str):
+        """Stops profiling `task` and adds its samples to `route`."""
+
+        with self._lock:
+            request = self._requests.pop(task)
+            if not self._requests:
+                self._active.clear()
+            stacks = self._routes.setdefault(route, collections.Counter())
+            for stack, count in request.stacks.items():
+                if stack in stacks or len(stacks) < _MAX_STACKS_PER_ROUTE:
+                    stacks[stack] += count
+                else:
+                    stacks[_TRUNCATED] += count
+            self.requests_profiled[route] += 1
+
+    def _run(self):
+        while not self._closed:
+            if not self._active.wait(timeout=1):
+                continue
+            self.sample()
+            time.sleep(self._interval_s)
+
+    def sample(self):
+        """Adds each loop thread's stack to the profiled request it runs, if any."""
+
+        frames = sys._current_frames()
+        with self._lock:
+            for task, request in self._requests.items():
+                if asyncio.current_task(request.loop) is not task:
+                    continue
+                frame = frames.get(request.thread_id)
+                if frame is not None:
+                    request.stacks[collapse(frame)] += 1
+
+    def collapsed(self, route: str = None) -> str:
+        """Returns the samples as collapsed stacks, for flamegraph.pl or speedscope.
+
+        With `route`, only that route's stacks; otherwise every route's,
+        under a root frame named after the route.
+        """
+
+        with self._lock:
+            routes = (
+                {route: self._routes.get(route, {})}
+                if route is not None
+                else dict(self._routes)
+            )
+            lines = []
+            for name, stacks in routes.items():
+                for stack, count in stacks.items():
+                    lines.append(
+                        f"{stack if route is not None else name + ';' + stack} {count}"
+                    )
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+            self.requests_profiled.clear()
+
+    def close(self):
+        self._closed = True
+        self._active.set()
@@ -7,15 +7,69 @@ from app.entities.movie import Movie
 class RepositoryException(Exception):
     pass
 
+
 class RepositoryMovieNotFoundException(Exception):
     pass
 
 
+class RepositoryDeadlineExceededException(Exception):
+    """Raised when the request deadline passed before or during a DB operation."""
+
+
+class RepositoryUnavailableException(Exception):
+    """Raised without contacting the backend while it is known to be unreachable."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def search_parameters(
+    title: str = None, release_year: int = None, watched: bool = None
+) -> dict:
+    """Returns the search fields given, an empty result matches every movie."""
+
+    parameters = {
+        "title": title,
+        "release_year": release_year,
+        "watched": watched,
+    }
+    return {field: value for field, value in parameters.items() if value is not None}
+
+
 class MovieRepository(abc.ABC):
+    async def ping(self):
+        """Raises if the DB can't be reached."""
+        raise NotImplementedError
+
+    async def warm_up(self, connections: int = 0, documents: int = 0):
+        """Prepares the DB connections and caches before traffic is served.
+
+        Raises if the DB can't be reached.
+
+        Parameters
+        ----------
+        connections: int
+            The number of connections to open ahead of time.
+        documents: int
+            The number of index entries and hottest documents to read into the DB cache.
+        """
+        await self.ping()
+
+    async def flush(self):
+        """Writes out anything the repository holds back, called before close."""
+
+    async def close(self):
+        """Releases the DB connections, the repository can't be used afterwards."""
+
     async def create(self, movie: Movie) -> bool:
         """Inserts movie to DB."""
         raise NotImplementedError
 
+    async def create_many(self, movies: list[Movie]):
+        """Inserts movies to DB in a single bulk write."""
+        raise NotImplementedError
+
     async def get_by_id(self, movie_id: str) -> typing.Optional[Movie]:
         """Retrieves a movie by its ID"""
         raise NotImplementedError
@@ -37,7 +91,49 @@ class MovieRepository(abc.ABC):
 
         raise NotImplementedError
 
+    async def update_and_get(self, movie_id: str, update_parameters: dict) -> Movie:
+        """Update a movie by ID and return it as it is after the update."""
+
+        raise NotImplementedError
+
+    async def update_by_fields(
+        self,
+        update_parameters: dict,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> tuple[int, int]:
+        """Updates every movie with the matching search parameters.
+
+        Returns the matched and modified counts.
+        """
+
+        raise NotImplementedError
+
     async def delete(self, movie_id: str) -> bool:
         """Deletes a movie by ID."""
 
         raise NotImplementedError
+
+    async def delete_many(self, movie_ids: list[str]) -> int:
+        """Deletes movies by ID in a single bulk write.
+
+        Returns the deleted count.
+        """
+
+        raise NotImplementedError
+
+    async def delete_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> int:
+        """Deletes every movie with the matching search parameters.
+
+        Returns the deleted count.
+        """
+
+        raise NotImplementedError
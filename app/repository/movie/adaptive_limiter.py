@@ -0,0 +1,228 @@
+import math
+import time
+import typing
+
+from prometheus_client import Counter, Gauge
+from pymongo.errors import ConnectionFailure
+
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryUnavailableException,
+)
+from app.repository.movie.delegating import DelegatingMovieRepository
+
+CONCURRENCY_LIMIT = Gauge(
+    "movie_repository_concurrency_limit",
+    "Concurrent repository calls currently allowed by the adaptive limiter.",
+    ["limiter"],
+    multiprocess_mode="livesum",
+)
+CONCURRENCY_REJECTED = Counter(
+    "movie_repository_concurrency_rejected_total",
+    "Repository calls rejected because the adaptive limit was reached.",
+    ["limiter"],
+)
+
+# Floor of the latency samples, windows of fast calls can average to 0 with a coarse
+# clock
+_MIN_RTT_S = 1e-9
+
+
+class AIMDLimit:
+    """Additive increase, multiplicative decrease.
+
+    The limit grows by one per sample while latency stays within `tolerance`
+    times the lowest latency seen, and is cut by `backoff_ratio` once it doesn't.
+    After every `probe_interval` samples the lowest latency is measured again,
+    see `GradientLimit`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 2.0,
+        probe_interval: int = 1000,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self.probe_interval = probe_interval
+        self._min_rtt = math.inf
+        self._samples = 0
+
+    def update(self, rtt_s: float, in_flight: int, dropped: bool) -> float:
+        if self._samples >= self.probe_interval:
+            self._samples = 0
+            self._min_rtt = math.inf
+            self.limit = float(self.min_limit)
+            return self.limit
+        self._samples += 1
+        self._min_rtt = min(self._min_rtt, max(rtt_s, _MIN_RTT_S))
+        if dropped or rtt_s > self._min_rtt * self.tolerance:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        elif in_flight * 2 >= self.limit:
+            # Only grow while the limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1)
+        return self.limit
+
+
+class GradientLimit:
+    """Scales the limit by the ratio of unloaded to current latency.
+
+    While latency stays within `tolerance` times the lowest latency seen the
+    limit grows by a queue allowance of sqrt(limit); once calls start queueing
+    and latency rises the gradient drops below one and shrinks the limit
+    towards the concurrency the backend can serve without queueing.
+
+    After every `probe_interval` samples the lowest latency is forgotten and
+    the limit drops to `min_limit`, so the next samples measure it again
+    without queueing. Otherwise one unusually fast sample would pin the limit
+    down for good, and a faster backend would never be noticed.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        probe_interval: int = 1000,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.probe_interval = probe_interval
+        self._min_rtt = math.inf
+        self._samples = 0
+
+    def update(self, rtt_s: float, in_flight: int, dropped: bool) -> float:
+        if self._samples >= self.probe_interval:
+            self._samples = 0
+            self._min_rtt = math.inf
+            self.limit = float(self.min_limit)
+            return self.limit
+        self._samples += 1
+        rtt_s = max(rtt_s, _MIN_RTT_S)
+        self._min_rtt = min(self._min_rtt, rtt_s)
+        if dropped:
+            gradient = 0.5
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * self._min_rtt / rtt_s))
+
+        if gradient == 1.0 and in_flight * 2 < self.limit:
+            # Not enough load to learn anything about a higher limit
+            return self.limit
+
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+        return self.limit
+
+
+class AdaptiveConcurrencyLimiter:
+    """Caps concurrent calls at a limit tuned from their observed latency.
+
+    Samples are averaged over windows of roughly one round trip, `limit`
+    calls, before they reach the algorithm. Updating on every sample would
+    react to a single slow window many times over, since every call that
+    started before the limit changed still reports the old latency.
+    """
+
+    def __init__(self, algorithm, name: str = "mongo"):
+        self._algorithm = algorithm
+        self._name = name
+        self.in_flight = 0
+        self._reset_window()
+        CONCURRENCY_LIMIT.labels(limiter=name).set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._algorithm.limit))
+
+    def _reset_window(self):
+        self._window_samples = 0
+        self._window_rtt_s = 0.0
+        self._window_max_in_flight = 0
+        self._window_dropped = False
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            CONCURRENCY_REJECTED.labels(limiter=self._name).inc()
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, rtt_s: float, dropped: bool = False):
+        """Frees a slot and feeds the call latency to the limit algorithm."""
+
+        self._window_samples += 1
+        self._window_rtt_s += rtt_s
+        self._window_max_in_flight = max(self._window_max_in_flight, self.in_flight)
+        self._window_dropped = self._window_dropped or dropped
+        self.in_flight -= 1
+        if self._window_samples < self.limit:
+            return
+
+        self._algorithm.update(
+            self._window_rtt_s / self._window_samples,
+            self._window_max_in_flight,
+            self._window_dropped,
+        )
+        self._reset_window()
+        CONCURRENCY_LIMIT.labels(limiter=self._name).set(self.limit)
+
+    def release_without_sample(self):
+        self.in_flight -= 1
+
+
+class AdaptiveLimitMovieRepository(DelegatingMovieRepository):
+    """Rejects repository calls beyond the adaptive concurrency limit.
+
+    Rejected calls raise RepositoryUnavailableException.
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        limiter: AdaptiveConcurrencyLimiter,
+        failure_exceptions: tuple = (ConnectionFailure,),
+    ):
+        super().__init__(repository)
+        self._limiter = limiter
+        self._failure_exceptions = failure_exceptions
+
+    @property
+    def limiter(self) -> AdaptiveConcurrencyLimiter:
+        return self._limiter
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        if operation == "ping":
+            return await method(**kwargs)
+
+        if not self._limiter.try_acquire():
+            raise RepositoryUnavailableException(
+                "The database is at its concurrency limit. Please try again later.",
+                retry_after=1,
+            )
+        started = time.monotonic()
+        try:
+            result = await method(**kwargs)
+        except self._failure_exceptions:
+            self._limiter.release(time.monotonic() - started, dropped=True)
+            raise
+        except Exception:
+            self._limiter.release(time.monotonic() - started)
+            raise
+        except BaseException:
+            self._limiter.release_without_sample()
+            raise
+        self._limiter.release(time.monotonic() - started)
+        return result
@@ -0,0 +1,282 @@
+import asyncio
+import collections
+import contextvars
+import logging
+import time
+import typing
+from dataclasses import dataclass
+
+import bson
+from prometheus_client import Counter, Gauge
+
+from app import consistency
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import MovieRepository, search_parameters
+from app.repository.movie.delegating import DelegatingMovieRepository
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "movie_repository_cache_requests_total",
+    "Lookups of the query cache, "
+    "result is hit, stale (served while refreshed) or miss.",
+    ["result"],
+)
+CACHE_EVICTIONS = Counter(
+    "movie_repository_cache_evictions_total",
+    "Entries evicted from the query cache to stay within its memory budget.",
+)
+CACHE_BYTES = Gauge(
+    "movie_repository_cache_bytes",
+    "Estimated size of the entries in the query cache.",
+    multiprocess_mode="livesum",
+)
+
+# Operations that change movies, each one invalidates every cached result
+_WRITE_OPERATIONS = frozenset(
+    {
+        "create",
+        "create_many",
+        "update",
+        "update_and_get",
+        "update_by_fields",
+        "delete",
+        "delete_many",
+        "delete_by_fields",
+    }
+)
+# Rough per-movie and per-entry overhead of the Python objects on top of their strings
+_MOVIE_OVERHEAD_BYTES = 400
+_ENTRY_OVERHEAD_BYTES = 500
+
+CacheKey = tuple
+
+
+@dataclass
+class CacheEntry:
+    movies: list[Movie]
+    total_count: int
+    generation: int
+    stored_at: float
+    size: int
+    # Times of the read the entry was loaded by, None if it didn't report any
+    cluster_time: typing.Optional[dict] = None
+    operation_time: typing.Optional[bson.Timestamp] = None
+
+    def serves(self, token: typing.Optional[consistency.CausalToken]) -> bool:
+        """Whether the entry is recent enough for a request with this causal token."""
+
+        if token is None or token.operation_time is None:
+            return True
+        return (
+            self.operation_time is not None
+            and self.operation_time >= token.operation_time
+        )
+
+
+def cache_key(
+    title: str = None,
+    release_year: int = None,
+    watched: bool = None,
+    skip: int = 0,
+    limit: int = 1000,
+) -> CacheKey:
+    """Key of a `get_by_fields` call.
+
+    The same for every call selecting the same page of the same movies.
+    """
+
+    filters = search_parameters(title=title, release_year=release_year, watched=watched)
+    return tuple(sorted(filters.items())), skip, limit
+
+
+def _entry_size(movies: list[Movie]) -> int:
+    return _ENTRY_OVERHEAD_BYTES + sum(
+        len(movie.id)
+        + len(movie.title)
+        + len(movie.description)
+        + _MOVIE_OVERHEAD_BYTES
+        for movie in movies
+    )
+
+
+class CachedMovieRepository(DelegatingMovieRepository):
+    """Caches the movies and total count of `get_by_fields` per filter and page.
+
+    Rather than tracking which entries a write affects, every write bumps a
+    generation counter and entries from an older generation are never
+    served, so the process sees its own writes immediately. Writes made by
+    other processes are only seen once entries expire: they are fresh for
+    `ttl_s`, then served for up to `stale_s` more while a single background
+    call refreshes them. Entries are evicted least recently used first to
+    stay within `max_bytes`.
+
+    A request carrying a causal token from `app.consistency` is only served
+    entries loaded at or after the token's operation time, so a client
+    sees its own writes even when they were made through another process.
+    Entries it is served move its token forward like the read that loaded
+    them would have.
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        ttl_s: float = 5.0,
+        stale_s: float = 30.0,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        super().__init__(repository)
+        self._ttl_s = ttl_s
+        self._stale_s = stale_s
+        self._max_bytes = max_bytes
+        self._entries: collections.OrderedDict[CacheKey, CacheEntry] = (
+            collections.OrderedDict()
+        )
+        self._size = 0
+        self._generation = 0
+        self._refresh_tasks: dict[CacheKey, asyncio.Task] = {}
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def size(self) -> int:
+        """Estimated size of the cached entries in bytes."""
+
+        return self._size
+
+    def invalidate(self):
+        """Stops serving every entry cached so far."""
+
+        self._generation += 1
+
+    async def close(self):
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        self._refresh_tasks.clear()
+        self._clear()
+        return await self._repository.close()
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        try:
+            return await method(**kwargs)
+        finally:
+            # Also after failed writes, they may have changed some movies before failing
+            if operation in _WRITE_OPERATIONS:
+                self.invalidate()
+
+    async def get_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        skip: int = 0,
+        limit: int = 1000,
+    ) -> tuple[list[Movie], int]:
+        key = cache_key(
+            title=title,
+            release_year=release_year,
+            watched=watched,
+            skip=skip,
+            limit=limit,
+        )
+        token = consistency.current()
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.generation == self._generation
+            and entry.serves(token)
+        ):
+            age_s = time.monotonic() - entry.stored_at
+            if age_s < self._ttl_s + self._stale_s:
+                self._entries.move_to_end(key)
+                if age_s < self._ttl_s:
+                    CACHE_REQUESTS.labels(result="hit").inc()
+                else:
+                    CACHE_REQUESTS.labels(result="stale").inc()
+                    self._refresh(key)
+                if token is not None:
+                    token.advance(entry.cluster_time, entry.operation_time)
+                # A copy, so callers can't change the cached list
+                return list(entry.movies), entry.total_count
+        if entry is not None:
+            self._discard(key)
+
+        CACHE_REQUESTS.labels(result="miss").inc()
+        return await self._load(key)
+
+    async def _load(self, key: CacheKey) -> tuple[list[Movie], int]:
+        filters, skip, limit = key
+        # Results read while a write is in flight are stored under the generation
+        # that write invalidates
+        generation = self._generation
+        # The read starts from the request's token, if any, and the entry keeps
+        # the times it ends at
+        request_token = consistency.current()
+        read_token = consistency.CausalToken()
+        if request_token is not None:
+            read_token = consistency.CausalToken(
+                request_token.cluster_time, request_token.operation_time
+            )
+        context_token = consistency.set_token(read_token)
+        try:
+            movies, total_count = await super().get_by_fields(
+                **dict(filters), skip=skip, limit=limit
+            )
+        finally:
+            consistency.reset_token(context_token)
+        if request_token is not None:
+            request_token.advance(read_token.cluster_time, read_token.operation_time)
+        if generation == self._generation:
+            entry = CacheEntry(
+                movies,
+                total_count,
+                generation,
+                time.monotonic(),
+                _entry_size(movies),
+                read_token.cluster_time,
+                read_token.operation_time,
+            )
+            self._store(key, entry)
+        return list(movies), total_count
+
+    def _refresh(self, key: CacheKey):
+        if key in self._refresh_tasks:
+            return
+        # A fresh context, so the refresh isn't bound by the request's deadline
+        task = asyncio.get_running_loop().create_task(
+            self._refresh_entry(key), context=contextvars.Context()
+        )
+        self._refresh_tasks[key] = task
+
+    async def _refresh_entry(self, key: CacheKey):
+        try:
+            await self._load(key)
+        except Exception as e:
+            logger.info("Refresh of cached query %s failed: %s", key, e)
+        finally:
+            self._refresh_tasks.pop(key, None)
+
+    def _store(self, key: CacheKey, entry: CacheEntry):
+        if entry.size > self._max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            CACHE_EVICTIONS.inc()
+        CACHE_BYTES.set(self._size)
+
+    def _discard(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+            CACHE_BYTES.set(self._size)
+
+    def _clear(self):
+        self._entries.clear()
+        self._size = 0
+        CACHE_BYTES.set(0)
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import math
+import time
+import typing
+
+from prometheus_client import Gauge
+from pymongo.errors import ConnectionFailure
+
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryUnavailableException,
+)
+from app.repository.movie.delegating import DelegatingMovieRepository
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = Gauge(
+    "movie_repository_circuit_state",
+    "Circuit breaker state of the movie repository: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+    multiprocess_mode="livemax",
+)
+
+
+class CircuitBreaker:
+    """Tracks backend failures and fails calls fast while the backend is down.
+
+    Closed: calls go through, `failure_threshold` consecutive failures open the circuit.
+    Open: calls are rejected immediately while `probe` is retried in the background
+    every `probe_interval_s`; a successful probe half-opens the circuit.
+    Half-open: up to `half_open_max_calls` trial calls go through, the first
+    success closes the circuit and a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        probe: typing.Callable[[], typing.Awaitable],
+        failure_threshold: int = 5,
+        probe_interval_s: float = 5.0,
+        half_open_max_calls: int = 1,
+        name: str = "mongo",
+    ):
+        self._probe = probe
+        self._failure_threshold = failure_threshold
+        self._probe_interval_s = probe_interval_s
+        self._half_open_max_calls = half_open_max_calls
+        self._name = name
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        self._next_probe_at = 0.0
+        self._probe_task: typing.Optional[asyncio.Task] = None
+        CIRCUIT_STATE.labels(breaker=name).set(0)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(
+                "Circuit breaker %s: %s -> %s", self._name, self._state, state
+            )
+        self._state = state
+        CIRCUIT_STATE.labels(breaker=self._name).set(self._STATE_VALUES[state])
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._next_probe_at - time.monotonic()))
+
+    def before_call(self):
+        """Admits a call, or raises RepositoryUnavailableException without a DB call."""
+
+        if self._state == self.CLOSED:
+            return
+        if (
+            self._state == self.HALF_OPEN
+            and self._half_open_calls < self._half_open_max_calls
+        ):
+            self._half_open_calls += 1
+            return
+        raise RepositoryUnavailableException(
+            "The database is currently unreachable. Please try again later.",
+            retry_after=self._retry_after(),
+        )
+
+    def _release_half_open_call(self):
+        self._half_open_calls = max(0, self._half_open_calls - 1)
+
+    def record_success(self):
+        if self._state == self.HALF_OPEN:
+            self._release_half_open_call()
+            self._set_state(self.CLOSED)
+        self._consecutive_failures = 0
+
+    def record_failure(self):
+        if self._state == self.HALF_OPEN:
+            self._release_half_open_call()
+            self._open()
+            return
+        self._consecutive_failures += 1
+        if (
+            self._state == self.CLOSED
+            and self._consecutive_failures >= self._failure_threshold
+        ):
+            self._open()
+
+    def record_cancelled(self):
+        """Frees a half-open trial slot for a call that ended without a verdict."""
+
+        if self._state == self.HALF_OPEN:
+            self._release_half_open_call()
+
+    def _open(self):
+        self._set_state(self.OPEN)
+        self._half_open_calls = 0
+        self._next_probe_at = time.monotonic() + self._probe_interval_s
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.get_running_loop().create_task(
+                self._probe_until_reachable()
+            )
+
+    async def _probe_until_reachable(self):
+        while self._state == self.OPEN:
+            await asyncio.sleep(max(0.0, self._next_probe_at - time.monotonic()))
+            try:
+                await self._probe()
+            except Exception as e:
+                logger.info("Circuit breaker %s probe failed: %s", self._name, e)
+                self._next_probe_at = time.monotonic() + self._probe_interval_s
+                continue
+            self._consecutive_failures = 0
+            self._set_state(self.HALF_OPEN)
+
+    async def close(self):
+        """Stops the background probe."""
+
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+
+
+class CircuitBreakerMovieRepository(DelegatingMovieRepository):
+    """Fails repository calls fast while the circuit is open.
+
+    Refused calls raise RepositoryUnavailableException.
+
+    Only connection-level failures count towards opening the circuit. Other
+    errors, such as duplicate keys, neither count nor reset the failure streak.
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        breaker: CircuitBreaker = None,
+        failure_exceptions: tuple = (ConnectionFailure,),
+    ):
+        super().__init__(repository)
+        self._breaker = breaker or CircuitBreaker(probe=repository.ping)
+        self._failure_exceptions = failure_exceptions
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    async def close(self):
+        await self._breaker.close()
+        await super().close()
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        self._breaker.before_call()
+        try:
+            result = await method(**kwargs)
+        except self._failure_exceptions:
+            self._breaker.record_failure()
+            raise
+        except BaseException:
+            # Other errors, rejections by an inner limiter and cancellations
+            # say nothing about whether the backend is reachable
+            self._breaker.record_cancelled()
+            raise
+        self._breaker.record_success()
+        return result
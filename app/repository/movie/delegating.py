@@ -0,0 +1,124 @@
+import typing
+
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import MovieRepository
+
+
+class DelegatingMovieRepository(MovieRepository):
+    """Base for repositories that wrap another repository.
+
+    Every call is forwarded to the wrapped repository through `_call`, which
+    subclasses override to add behaviour around all operations at once.
+    """
+
+    def __init__(self, repository: MovieRepository):
+        self._repository = repository
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        """Runs a wrapped repository method, operation is the method name."""
+
+        return await method(**kwargs)
+
+    async def ping(self):
+        return await self._call("ping", self._repository.ping)
+
+    async def warm_up(self, connections: int = 0, documents: int = 0):
+        # Runs before traffic is served, not subject to the wrappers' bookkeeping
+        return await self._repository.warm_up(
+            connections=connections, documents=documents
+        )
+
+    async def flush(self):
+        return await self._repository.flush()
+
+    async def close(self):
+        return await self._repository.close()
+
+    async def create(self, movie: Movie):
+        return await self._call("create", self._repository.create, movie=movie)
+
+    async def create_many(self, movies: list[Movie]):
+        return await self._call(
+            "create_many", self._repository.create_many, movies=movies
+        )
+
+    async def get_by_id(self, movie_id: str) -> typing.Optional[Movie]:
+        return await self._call(
+            "get_by_id", self._repository.get_by_id, movie_id=movie_id
+        )
+
+    async def get_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        skip: int = 0,
+        limit: int = 1000,
+    ) -> tuple[list[Movie], int]:
+        return await self._call(
+            "get_by_fields",
+            self._repository.get_by_fields,
+            title=title,
+            release_year=release_year,
+            watched=watched,
+            skip=skip,
+            limit=limit,
+        )
+
+    async def update(self, movie_id: str, update_parameters: dict):
+        return await self._call(
+            "update",
+            self._repository.update,
+            movie_id=movie_id,
+            update_parameters=update_parameters,
+        )
+
+    async def update_and_get(self, movie_id: str, update_parameters: dict) -> Movie:
+        return await self._call(
+            "update_and_get",
+            self._repository.update_and_get,
+            movie_id=movie_id,
+            update_parameters=update_parameters,
+        )
+
+    async def update_by_fields(
+        self,
+        update_parameters: dict,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> tuple[int, int]:
+        return await self._call(
+            "update_by_fields",
+            self._repository.update_by_fields,
+            update_parameters=update_parameters,
+            title=title,
+            release_year=release_year,
+            watched=watched,
+            max_matched=max_matched,
+        )
+
+    async def delete(self, movie_id: str):
+        return await self._call("delete", self._repository.delete, movie_id=movie_id)
+
+    async def delete_many(self, movie_ids: list[str]) -> int:
+        return await self._call(
+            "delete_many", self._repository.delete_many, movie_ids=movie_ids
+        )
+
+    async def delete_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> int:
+        return await self._call(
+            "delete_by_fields",
+            self._repository.delete_by_fields,
+            title=title,
+            release_year=release_year,
+            watched=watched,
+            max_matched=max_matched,
+        )
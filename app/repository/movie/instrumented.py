@@ -0,0 +1,57 @@
+import time
+import typing
+
+from prometheus_client import Histogram
+
+from app.repository.movie.abstractions import MovieRepository
+from app.repository.movie.delegating import DelegatingMovieRepository
+
+OPERATION_DURATION = Histogram(
+    "movie_repository_operation_duration_seconds",
+    "Duration of movie repository calls, per operation, backend and outcome.",
+    ["operation", "backend", "outcome"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    ),
+)
+
+
+class InstrumentedMovieRepository(DelegatingMovieRepository):
+    """Records the duration of every repository call in a Prometheus histogram.
+
+    The outcome is "success", "error" for calls that raised, or "cancelled"
+    for calls abandoned by their request.
+    """
+
+    def __init__(self, repository: MovieRepository, backend: str):
+        super().__init__(repository)
+        self._backend = backend
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        started = time.perf_counter()
+        outcome = "success"
+        try:
+            return await method(**kwargs)
+        except Exception:
+            outcome = "error"
+            raise
+        except BaseException:
+            outcome = "cancelled"
+            raise
+        finally:
+            OPERATION_DURATION.labels(
+                operation=operation, backend=self._backend, outcome=outcome
+            ).observe(time.perf_counter() - started)
@@ -1,7 +1,12 @@
 import typing
 
 from app.entities.movie import Movie
-from app.repository.movie.abstractions import MovieRepository, RepositoryException
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+    search_parameters,
+)
 
 
 class MemoryMovieRepository(MovieRepository):
@@ -10,11 +15,19 @@ class MemoryMovieRepository(MovieRepository):
     def __init__(self):
         self._storage = {}
 
+    async def ping(self):
+        """The in memory database is always reachable."""
+
     async def create(self, movie: Movie):
         """Inserts movie to DB."""
 
         self._storage[movie.id] = movie
 
+    async def create_many(self, movies: list[Movie]):
+        """Inserts movies to DB."""
+
+        self._storage.update((movie.id, movie) for movie in movies)
+
     async def get_by_id(self, movie_id: str) -> typing.Optional[Movie]:
         """Retrieves a movie by its ID.
 
@@ -23,6 +36,24 @@ class MemoryMovieRepository(MovieRepository):
 
         return self._storage.get(movie_id)
 
+    def _match(self, search_parameters: dict) -> list[Movie]:
+        """Returns the movies matching every search parameter, in insertion order.
+
+        Each field is checked in its own pass over the movies left by the previous one.
+        """
+
+        matched = list(self._storage.values())
+        for field, value in search_parameters.items():
+            matched = [movie for movie in matched if getattr(movie, field) == value]
+        return matched
+
+    @staticmethod
+    def _check_max_matched(matched: list[Movie], max_matched: typing.Optional[int]):
+        if max_matched is not None and len(matched) > max_matched:
+            raise RepositoryException(
+                f"the search parameters match more than {max_matched} movies"
+            )
+
     async def get_by_fields(
         self,
         title: str = None,
@@ -30,36 +61,19 @@ class MemoryMovieRepository(MovieRepository):
         watched: bool = None,
         skip: int = 0,
         limit: int = 1000,
-    ) -> typing.List[Movie]:
-        """Returns the list of movies that share the same title."""
-
-        parameters = {
-            "title": title,
-            "release_year": release_year,
-            "watched": watched,
-        }
-
-        search_parameters = {
-            field: value for field, value in parameters.items() if value is not None
-        }
-
-        if not search_parameters:
-            matched = [list(self._storage.values())[skip : skip + limit]]
-            if limit == 0:
-                return matched[skip:]
-            return matched[skip : skip + limit]
-        else:
-            matched = [
-                movie
-                for _, movie in self._storage.items()
-                if all(
-                    getattr(movie, field) == search_parameters[field]
-                    for field, _ in search_parameters.items()
-                )
-            ]
-            if limit == 0:
-                return matched[skip:]
-            return matched[skip : skip + limit]
+    ) -> tuple[list[Movie], int]:
+        """Returns the list of movies with the matching search parameters
+        and their total count.
+
+        Returns the list of all movies if no search parameters are given.
+        """
+
+        matched = self._match(
+            search_parameters(title=title, release_year=release_year, watched=watched)
+        )
+        if limit == 0:
+            return matched[skip:], len(matched)
+        return matched[skip : skip + limit], len(matched)
 
     async def update(self, movie_id: str, update_parameters: dict):
         """Update a movie by ID.
@@ -74,18 +88,122 @@ class MemoryMovieRepository(MovieRepository):
         ------
         RepositoryException
             If movie ID update attempted.
+
+        RepositoryMovieNotFoundException
+            If movie ID not found.
         """
 
+        if "id" in update_parameters.keys():
+            raise RepositoryException("can't update movie ID")
         movie = self._storage.get(movie_id)
         if movie is None:
-            raise RepositoryException(f"movie {movie_id} not found")
+            raise RepositoryMovieNotFoundException(
+                f'movie with ID "{movie_id}" not found.'
+            )
         for key, value in update_parameters.items():
-            if key == "id":
-                raise RepositoryException(f"can't update movie ID")
             if hasattr(movie, key):
                 setattr(movie, key, value)
 
+    async def update_and_get(self, movie_id: str, update_parameters: dict) -> Movie:
+        """Update a movie by ID in place and return it.
+
+        Raises
+        ------
+        RepositoryException
+            If movie ID update attempted.
+
+        RepositoryMovieNotFoundException
+            If movie ID not found.
+        """
+
+        if "id" in update_parameters.keys():
+            raise RepositoryException("can't update movie ID")
+        movie = self._storage.get(movie_id)
+        if movie is None:
+            raise RepositoryMovieNotFoundException(
+                f'movie with ID "{movie_id}" not found.'
+            )
+        for key, value in update_parameters.items():
+            if hasattr(movie, key):
+                setattr(movie, key, value)
+        return movie
+
+    async def update_by_fields(
+        self,
+        update_parameters: dict,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> tuple[int, int]:
+        """Updates every movie with the matching search parameters.
+
+        Returns the matched and modified counts.
+
+        Raises
+        ------
+        RepositoryException
+            If movie ID update attempted or more than max_matched movies match.
+        """
+
+        if "id" in update_parameters.keys():
+            raise RepositoryException("can't update movie ID")
+        matched = self._match(
+            search_parameters(title=title, release_year=release_year, watched=watched)
+        )
+        self._check_max_matched(matched, max_matched)
+
+        updates = [
+            (key, value)
+            for key, value in update_parameters.items()
+            if key in Movie.__dataclass_fields__
+        ]
+        modified_count = 0
+        for movie in matched:
+            changed = [
+                (key, value) for key, value in updates if getattr(movie, key) != value
+            ]
+            for key, value in changed:
+                setattr(movie, key, value)
+            modified_count += bool(changed)
+        return len(matched), modified_count
+
     async def delete(self, movie_id: str):
         """Deletes a movie by ID."""
 
         self._storage.pop(movie_id, None)
+
+    async def delete_many(self, movie_ids: list[str]) -> int:
+        """Deletes movies by ID.
+
+        Returns the deleted count.
+        """
+
+        return sum(
+            self._storage.pop(movie_id, None) is not None for movie_id in set(movie_ids)
+        )
+
+    async def delete_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> int:
+        """Deletes every movie with the matching search parameters.
+
+        Returns the deleted count.
+
+        Raises
+        ------
+        RepositoryException
+            If more than max_matched movies match.
+        """
+
+        matched = self._match(
+            search_parameters(title=title, release_year=release_year, watched=watched)
+        )
+        self._check_max_matched(matched, max_matched)
+        for movie in matched:
+            del self._storage[movie.id]
+        return len(matched)
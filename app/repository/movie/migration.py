@@ -0,0 +1,127 @@
+"""
+Online migration of movie documents from the legacy layout
+(`{"_id": ObjectId, "id": movie_id}`) to the primary key layout
+(`{"_id": movie_id}`).
+
+Run the API with `mongo_id_as_primary_key` and `mongo_legacy_id_fallback`
+enabled while the migration is in progress, then disable the fallback once
+`migrate_to_primary_key_layout` returns.
+"""
+
+import asyncio
+import time
+
+import motor.motor_asyncio
+from pymongo import DeleteOne, ReplaceOne
+
+from app.config import settings_instance
+
+_LEGACY_DOCUMENTS = {"_id": {"$type": "objectId"}, "id": {"$exists": True}}
+
+
+async def _migrate_batch(collection, documents: list[dict]) -> int:
+    """Copies a batch of legacy documents to the primary key layout.
+
+    A legacy document is only deleted if it didn't change since it was read,
+    documents updated concurrently are left for the next pass.
+
+    Returns the number of legacy documents removed.
+    """
+
+    operations = []
+    for document in documents:
+        migrated_document = {
+            field: value
+            for field, value in document.items()
+            if field not in ("_id", "id")
+        }
+        migrated_document["_id"] = document["id"]
+        operations.append(
+            ReplaceOne({"_id": document["id"]}, migrated_document, upsert=True)
+        )
+        operations.append(DeleteOne(document))
+
+    result = await collection.bulk_write(operations, ordered=True)
+    return result.deleted_count
+
+
+async def migrate_to_primary_key_layout(
+    collection,
+    batch_size: int = 500,
+    max_documents_per_second: float = None,
+) -> int:
+    """Moves every legacy movie document to the primary key layout.
+
+    Legacy documents are walked in `_id` order, so the migration only reads
+    the `_id` index and can be stopped and restarted at any point; migrated
+    documents no longer match the legacy filter. Passes are repeated until no
+    legacy document is left.
+
+    Parameters
+    ----------
+    collection
+        The Motor movies collection.
+    batch_size: int
+        The number of documents read and written per round trip.
+    max_documents_per_second: float
+        Throttles the migration to limit its impact on live traffic, no limit if None.
+
+    Returns
+    ------
+    int
+        The number of documents migrated.
+    """
+
+    migrated = 0
+    while True:
+        pass_migrated = 0
+        last_id = None
+        while True:
+            started = time.monotonic()
+            query = dict(_LEGACY_DOCUMENTS)
+            if last_id is not None:
+                query["_id"] = {"$type": "objectId", "$gt": last_id}
+            documents = (
+                await collection.find(query)
+                .sort("_id", 1)
+                .limit(batch_size)
+                .to_list(length=batch_size)
+            )
+            if not documents:
+                break
+
+            last_id = documents[-1]["_id"]
+            pass_migrated += await _migrate_batch(collection, documents)
+
+            if max_documents_per_second:
+                elapsed = time.monotonic() - started
+                await asyncio.sleep(
+                    max(0.0, len(documents) / max_documents_per_second - elapsed)
+                )
+
+        migrated += pass_migrated
+        # A pass can migrate nothing while legacy documents remain, when every
+        # document it read was changed concurrently
+        if await collection.count_documents(_LEGACY_DOCUMENTS, limit=1) == 0:
+            return migrated
+
+
+async def _main():
+    settings = settings_instance()
+    client = motor.motor_asyncio.AsyncIOMotorClient(
+        settings.mongo_connection_string,
+        serverSelectionTimeoutMS=settings.server_selection_timeout_ms,
+    )
+    try:
+        migrated = await migrate_to_primary_key_layout(
+            client[settings.mongo_database_name]["movies"],
+            batch_size=settings.mongo_migration_batch_size,
+            max_documents_per_second=settings.mongo_migration_max_documents_per_second,
+        )
+        print(f"Migrated {migrated} movies to the primary key layout.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
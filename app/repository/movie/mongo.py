@@ -1,61 +1,453 @@
+import asyncio
+import contextlib
+import functools
 import typing
 
 import motor.motor_asyncio
+from pymongo import ReturnDocument, UpdateOne, WriteConcern
+from pymongo.errors import ExecutionTimeout
 
+from app import consistency, deadline
 from app.entities.movie import Movie
-from app.repository.movie.abstractions import MovieRepository, RepositoryException, RepositoryMovieNotFoundException
+from app.repository.movie import mongo_monitoring
+from app.repository.movie.abstractions import (
+    MovieRepository,
+    RepositoryDeadlineExceededException,
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+    search_parameters,
+)
+
+
+def _max_time_ms() -> typing.Optional[int]:
+    """Returns the maxTimeMS bounding a query by the request deadline, None without one.
+
+    The server abandons the query once it runs past the deadline instead of
+    holding a pool connection for a client that has given up.
+
+    Raises
+    ------
+    RepositoryDeadlineExceededException
+        If the request deadline has already passed.
+    """
+
+    remaining = deadline.remaining()
+    if remaining is None:
+        return None
+    if remaining <= 0:
+        raise RepositoryDeadlineExceededException("the request deadline has passed")
+    return max(1, int(remaining * 1000))
+
+
+def _max_time() -> dict:
+    """Returns _max_time_ms() as a command option."""
+
+    max_time_ms = _max_time_ms()
+    return {} if max_time_ms is None else {"maxTimeMS": max_time_ms}
+
+
+def _bounded_by_deadline(method):
+    """Skips the operation once the request deadline has passed and reports
+    queries stopped by maxTimeMS as RepositoryDeadlineExceededException.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if deadline.expired():
+            raise RepositoryDeadlineExceededException("the request deadline has passed")
+        try:
+            return await method(self, *args, **kwargs)
+        except ExecutionTimeout as e:
+            raise RepositoryDeadlineExceededException(
+                "the request deadline passed during the query"
+            ) from e
+
+    return wrapper
+
+
+def _summarize_explain(explain: dict) -> dict:
+    """Keeps the parts of an executionStats explain result showing how the query ran.
+
+    The parsed query is left out, it contains the filter values.
+    """
+
+    stages = []
+    indexes = []
+
+    def walk(plan: dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        if "indexName" in plan:
+            indexes.append(plan["indexName"])
+        for child in ("inputStage", "queryPlan"):
+            if isinstance(plan.get(child), dict):
+                walk(plan[child])
+        for children in ("inputStages", "shards"):
+            for child in plan.get(children, []):
+                walk(child.get("winningPlan", child))
+
+    walk(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    execution_stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "docs_examined": execution_stats.get("totalDocsExamined"),
+        "keys_examined": execution_stats.get("totalKeysExamined"),
+        "returned": execution_stats.get("nReturned"),
+        "execution_time_ms": execution_stats.get("executionTimeMillis"),
+    }
 
 
 class MongoMovieRepository(MovieRepository):
-    """Implements the repository pattern using MongoDB."""
+    """Implements the repository pattern using MongoDB.
+
+    Two storage layouts are supported. The legacy layout keeps the movie ID
+    in an `id` field next to the ObjectId `_id`, the primary key layout stores
+    the movie ID as `_id` itself. While documents are being moved with
+    `app.repository.movie.migration`, `legacy_id_fallback` makes the
+    repository address movies in both layouts.
+
+    Reads (`get_by_id`, `get_by_fields`) go through their own client, and so
+    their own connection pool, with a configurable read preference; everything
+    else, including the reads that back a write, goes to the primary through
+    the write client. Write concerns can be set per write operation.
+    """
+
+    # Write operations that accept their own write concern. "update_watched" is
+    # an update or update_and_get that only changes `watched`, "default" applies
+    # to every operation without a write concern of its own.
+    WRITE_OPERATIONS = (
+        "default",
+        "create",
+        "create_many",
+        "update",
+        "update_watched",
+        "update_by_fields",
+        "delete",
+        "delete_many",
+        "delete_by_fields",
+    )
 
     def __init__(
         self,
         connection_string: str,
         database: str,
         server_selection_timeout_ms: float,
+        id_as_primary_key: bool = False,
+        legacy_id_fallback: bool = False,
+        read_connection_string: str = None,
+        read_preference: str = "primary",
+        read_max_staleness_s: int = None,
+        max_pool_size: int = 100,
+        read_max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        causal_consistency: bool = False,
+        write_concerns: dict[str, dict] = None,
+        monitoring: bool = False,
     ):
-        """Initialize using the env variables passed."""
+        """Initialize using the env variables passed.
+
+        Parameters
+        ----------
+        read_connection_string: str
+            Connection string of the read client, the write client's if None.
+        read_preference: str
+            Read preference mode of the read client, for instance "secondaryPreferred".
+        read_max_staleness_s: int
+            How far behind the primary a secondary may be to serve reads, None for no
+            bound.
+        min_pool_size: int
+            Connections each client keeps open, also the number opened by warm_up.
+        causal_consistency: bool
+            Run every operation in a causally consistent session that starts
+            from the request's `app.consistency` token and advances it.
+        write_concerns: dict[str, dict]
+            WriteConcern arguments per name in WRITE_OPERATIONS, for instance
+            `{"update_watched": {"w": 1}}`.
+        monitoring: bool
+            Export command and connection pool metrics of both clients, labelled
+            "write" and "read".
+
+        Raises
+        ------
+        ValueError
+            If write_concerns names an unknown operation.
+        """
 
         self._client = motor.motor_asyncio.AsyncIOMotorClient(
-            connection_string, serverSelectionTimeoutMS=server_selection_timeout_ms
+            connection_string,
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            event_listeners=(
+                mongo_monitoring.event_listeners("write") if monitoring else []
+            ),
+        )
+        read_options = {"readPreference": read_preference}
+        if read_max_staleness_s is not None:
+            read_options["maxStalenessSeconds"] = read_max_staleness_s
+        self._read_client = motor.motor_asyncio.AsyncIOMotorClient(
+            read_connection_string or connection_string,
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            maxPoolSize=read_max_pool_size,
+            minPoolSize=min_pool_size,
+            event_listeners=(
+                mongo_monitoring.event_listeners("read") if monitoring else []
+            ),
+            **read_options,
         )
         self._database = self._client[database]
         self._movies = self._database["movies"]
+        self._read_movies = self._read_client[database]["movies"]
+        self._id_as_primary_key = id_as_primary_key
+        self._legacy_id_fallback = id_as_primary_key and legacy_id_fallback
+        self._causal_consistency = causal_consistency
 
-    async def create(self, movie: Movie):
-        """Upserts a movie to the DB."""
+        write_concerns = write_concerns or {}
+        unknown_operations = set(write_concerns) - set(self.WRITE_OPERATIONS)
+        if unknown_operations:
+            raise ValueError(
+                f"unknown write operations: {', '.join(sorted(unknown_operations))}"
+            )
+        self._write_collections = {
+            operation: self._movies.with_options(
+                write_concern=WriteConcern(**write_concern)
+            )
+            for operation, write_concern in write_concerns.items()
+        }
 
-        await self._movies.update_one(
-            {"id": movie.id},
-            {
-                "$set": {
-                    "id": movie.id,
-                    "title": movie.title,
-                    "description": movie.description,
-                    "release_year": movie.release_year,
-                    "watched": movie.watched,
-                }
-            },
-            upsert=True,
+    def _writes(self, operation: str):
+        """Returns the movies collection with the write concern of the operation."""
+
+        return self._write_collections.get(
+            operation, self._write_collections.get("default", self._movies)
+        )
+
+    @staticmethod
+    def _update_operation(update_parameters: dict) -> str:
+        return "update_watched" if update_parameters.keys() == {"watched"} else "update"
+
+    @contextlib.asynccontextmanager
+    async def _session(self, client):
+        """Yields a causally consistent session on client, None if that is off.
+
+        The session starts from the request's causal token and moves the token
+        forward once the operations in it are done.
+        """
+
+        if not self._causal_consistency:
+            yield None
+            return
+
+        token = consistency.current()
+        async with await client.start_session(causal_consistency=True) as session:
+            if token is not None:
+                if token.cluster_time is not None:
+                    session.advance_cluster_time(token.cluster_time)
+                if token.operation_time is not None:
+                    session.advance_operation_time(token.operation_time)
+            yield session
+            if token is not None:
+                token.advance(session.cluster_time, session.operation_time)
+
+    def _id_filter(self, movie_id: str) -> dict:
+        """Returns the filter matching a movie ID in the configured layout."""
+
+        if self._legacy_id_fallback:
+            return {"$or": [{"_id": movie_id}, {"id": movie_id}]}
+        if self._id_as_primary_key:
+            return {"_id": movie_id}
+        return {"id": movie_id}
+
+    @staticmethod
+    def _to_movie(document: dict) -> Movie:
+        """Converts a document in either layout to a Movie."""
+
+        return Movie(
+            id=document.get("id", document.get("_id")),
+            title=document.get("title"),
+            description=document.get("description"),
+            release_year=document.get("release_year"),
+            watched=document.get("watched"),
+        )
+
+    async def ping(self):
+        """Raises a PyMongoError if the server can't be reached."""
+
+        await self._client.admin.command("ping")
+
+    async def warm_up(self, connections: int = 0, documents: int = 0):
+        """Finishes server discovery and fills both connection pools, then
+        optionally reads index entries and the first page of movies into the
+        server's cache.
+
+        Concurrent pings each need their own connection, so `connections` pings
+        at once leave that many connections open in each pool.
+        """
+
+        for client, read_preference in (
+            (self._client, self._movies.read_preference),
+            (self._read_client, self._read_movies.read_preference),
+        ):
+            await asyncio.gather(
+                *(
+                    client.admin.command("ping", read_preference=read_preference)
+                    for _ in range(max(1, connections))
+                )
+            )
+
+        if documents <= 0:
+            return
+        for index_name in await self._read_movies.index_information():
+            await self._read_movies.find({}, {"_id": 1}).hint(index_name).limit(
+                documents
+            ).to_list(length=documents)
+        await self.get_by_fields(limit=documents)
+
+    async def close(self):
+        """Closes both clients and their connection pools."""
+
+        self._read_client.close()
+        self._client.close()
+
+    async def explain(
+        self, operation: str, max_time_ms: int = None, **kwargs
+    ) -> typing.Optional[dict]:
+        """Returns a summary of the executionStats explain plan of the query
+        behind an operation, None for operations that don't filter movies.
+
+        The explain runs on the read client, where the query itself ran for reads.
+        It reruns the query, the DB aborts it after `max_time_ms` if given.
+        """
+
+        if operation in ("get_by_id", "update", "update_and_get", "delete"):
+            search_filter = self._id_filter(kwargs["movie_id"])
+        elif operation in ("get_by_fields", "update_by_fields", "delete_by_fields"):
+            search_filter = search_parameters(
+                title=kwargs.get("title"),
+                release_year=kwargs.get("release_year"),
+                watched=kwargs.get("watched"),
+            )
+        else:
+            return None
+
+        find = {"find": self._read_movies.name, "filter": search_filter}
+        if kwargs.get("skip"):
+            find["skip"] = kwargs["skip"]
+        if kwargs.get("limit"):
+            find["limit"] = kwargs["limit"]
+        options = {"verbosity": "executionStats"}
+        if max_time_ms:
+            options["maxTimeMS"] = max_time_ms
+        explain = await self._read_movies.database.command(
+            "explain",
+            find,
+            read_preference=self._read_movies.read_preference,
+            **options,
         )
+        return _summarize_explain(explain)
+
+    @_bounded_by_deadline
+    async def create(self, movie: Movie):
+        """Inserts a movie to the DB.
 
+        The legacy layout upserts on `id`, the primary key layout inserts
+        the movie with its ID as `_id`.
+        """
+
+        movies = self._writes("create")
+        async with self._session(self._client) as session:
+            if self._id_as_primary_key:
+                await movies.insert_one(
+                    {
+                        "_id": movie.id,
+                        "title": movie.title,
+                        "description": movie.description,
+                        "release_year": movie.release_year,
+                        "watched": movie.watched,
+                    },
+                    session=session,
+                )
+                return
+
+            await movies.update_one(
+                {"id": movie.id},
+                {
+                    "$set": {
+                        "id": movie.id,
+                        "title": movie.title,
+                        "description": movie.description,
+                        "release_year": movie.release_year,
+                        "watched": movie.watched,
+                    }
+                },
+                upsert=True,
+                session=session,
+            )
+
+    @_bounded_by_deadline
+    async def create_many(self, movies: list[Movie]):
+        """Inserts movies to the DB in a single unordered bulk write."""
+
+        if not movies:
+            return
+
+        collection = self._writes("create_many")
+        async with self._session(self._client) as session:
+            if self._id_as_primary_key:
+                await collection.insert_many(
+                    [
+                        {
+                            "_id": movie.id,
+                            "title": movie.title,
+                            "description": movie.description,
+                            "release_year": movie.release_year,
+                            "watched": movie.watched,
+                        }
+                        for movie in movies
+                    ],
+                    ordered=False,
+                    session=session,
+                )
+                return
+
+            await collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"id": movie.id},
+                        {
+                            "$set": {
+                                "id": movie.id,
+                                "title": movie.title,
+                                "description": movie.description,
+                                "release_year": movie.release_year,
+                                "watched": movie.watched,
+                            }
+                        },
+                        upsert=True,
+                    )
+                    for movie in movies
+                ],
+                ordered=False,
+                session=session,
+            )
+
+    @_bounded_by_deadline
     async def get_by_id(self, movie_id: str) -> typing.Optional[Movie]:
         """Retrieves a movie by its ID.
 
         Returns None if the movie is not found.
         """
-        document = await self._movies.find_one({"id": movie_id})
-        if document:
-            return Movie(
-                id=document.get("id"),
-                title=document.get("title"),
-                description=document.get("description"),
-                release_year=document.get("release_year"),
-                watched=document.get("watched"),
+        async with self._session(self._read_client) as session:
+            document = await self._read_movies.find_one(
+                self._id_filter(movie_id), max_time_ms=_max_time_ms(), session=session
             )
+        if document:
+            return self._to_movie(document)
         return None
 
+    @_bounded_by_deadline
     async def get_by_fields(
         self,
         title: str = None,
@@ -71,30 +463,97 @@ class MongoMovieRepository(MovieRepository):
 
         return_value: list[Movie] = []
 
-        search_fields = {
-            "title": title,
-            "release_year": release_year,
-            "watched": watched,
-        }.items()
-
-        search_parameters = {
-            field: value for field, value in search_fields if value is not None
-        }
+        search_filter = search_parameters(
+            title=title, release_year=release_year, watched=watched
+        )
 
-        total_count_cursor: int = await self._movies.count_documents(search_parameters)
-        document_cursor = self._movies.find(search_parameters).skip(skip).limit(limit)
-        async for document in document_cursor:
-            return_value.append(
-                Movie(
-                    id=document.get("id"),
-                    title=document.get("title"),
-                    description=document.get("description"),
-                    release_year=document.get("release_year"),
-                    watched=document.get("watched"),
+        async with self._session(self._read_client) as session:
+            if self._legacy_id_fallback:
+                return await self._get_by_fields_without_duplicates(
+                    search_filter, skip, limit, session
+                )
+            total_count_cursor: int = await self._read_movies.count_documents(
+                search_filter, session=session, **_max_time()
+            )
+            document_cursor = (
+                self._read_movies.find(
+                    search_filter, max_time_ms=_max_time_ms(), session=session
                 )
+                .skip(skip)
+                .limit(limit)
             )
+            async for document in document_cursor:
+                return_value.append(self._to_movie(document))
         return return_value, total_count_cursor
 
+    async def _get_by_fields_without_duplicates(
+        self, search_filter: dict, skip: int, limit: int, session
+    ) -> tuple[list[Movie], int]:
+        """get_by_fields while movies are being migrated, when a movie caught
+        mid-migration exists in both layouts.
+
+        Legacy documents whose primary key copy exists are left out of both
+        the movies and the count, the copy is looked up on the `_id` index.
+        """
+
+        pipeline = [
+            {"$match": search_filter},
+            {
+                "$lookup": {
+                    "from": self._read_movies.name,
+                    "localField": "id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"_id": 1}}],
+                    "as": "_migrated",
+                }
+            },
+            {"$match": {"_migrated": {"$size": 0}}},
+        ]
+        count_documents = await self._read_movies.aggregate(
+            pipeline + [{"$count": "total"}], session=session, **_max_time()
+        ).to_list(length=1)
+        page = [{"$skip": skip}] + ([{"$limit": limit}] if limit else [])
+        documents = await self._read_movies.aggregate(
+            pipeline + page, session=session, **_max_time()
+        ).to_list(length=None)
+        total_count = count_documents[0]["total"] if count_documents else 0
+        return [self._to_movie(document) for document in documents], total_count
+
+    async def _bounded_filter(
+        self, search_filter: dict, max_matched: typing.Optional[int], session=None
+    ) -> dict:
+        """Returns the filter of a mass write, search_filter if max_matched is None.
+
+        Otherwise the `_id`s of up to max_matched + 1 matching movies are read
+        first and the filter only matches those, so movies inserted between
+        the check and the write can't push it past max_matched.
+
+        Raises
+        ------
+        RepositoryException
+            If more than max_matched movies match the filter.
+        """
+
+        if max_matched is None:
+            return search_filter
+        documents = (
+            await self._movies.find(
+                search_filter, {"_id": 1}, session=session, max_time_ms=_max_time_ms()
+            )
+            .limit(max_matched + 1)
+            .to_list(length=max_matched + 1)
+        )
+        if len(documents) > max_matched:
+            raise RepositoryException(
+                f"the search parameters match more than {max_matched} movies"
+            )
+        # Still filtered on the search parameters, movies changed since no longer match
+        return {
+            **search_filter,
+            "_id": {"$in": [document["_id"] for document in documents]},
+        }
+
+    @_bounded_by_deadline
     async def update(self, movie_id: str, update_parameters: dict):
         """Update a movie by ID.
 
@@ -115,13 +574,173 @@ class MongoMovieRepository(MovieRepository):
 
         if "id" in update_parameters.keys():
             raise RepositoryException("can't update movie ID")
-        result = await self._movies.update_one(
-            {"id": movie_id}, {"$set": update_parameters}
-        )
+        async with self._session(self._client) as session:
+            await self._update(movie_id, update_parameters, session)
+
+    async def _update(self, movie_id: str, update_parameters: dict, session):
+        movies = self._writes(self._update_operation(update_parameters))
+        if self._legacy_id_fallback:
+            # A movie caught mid-migration exists in both layouts, keep both copies in
+            # sync.
+            result = await movies.update_many(
+                self._id_filter(movie_id), {"$set": update_parameters}, session=session
+            )
+        else:
+            result = await movies.update_one(
+                self._id_filter(movie_id), {"$set": update_parameters}, session=session
+            )
         if result.matched_count == 0:
-            raise RepositoryMovieNotFoundException(f'movie with ID "{movie_id}" not found.')
+            raise RepositoryMovieNotFoundException(
+                f'movie with ID "{movie_id}" not found.'
+            )
+
+    @_bounded_by_deadline
+    async def update_and_get(self, movie_id: str, update_parameters: dict) -> Movie:
+        """Update a movie by ID and return the updated movie.
+
+        The update and the read happen in a single find_one_and_update round trip.
+
+        Raises
+        ------
+        RepositoryException
+            If movie ID update attempted.
+
+        RepositoryMovieNotFoundException
+            If movie ID not found.
+        """
+
+        if "id" in update_parameters.keys():
+            raise RepositoryException("can't update movie ID")
+        async with self._session(self._client) as session:
+            if not update_parameters:
+                document = await self._movies.find_one(
+                    self._id_filter(movie_id),
+                    max_time_ms=_max_time_ms(),
+                    session=session,
+                )
+            elif self._legacy_id_fallback:
+                await self._update(movie_id, update_parameters, session)
+                document = await self._movies.find_one(
+                    self._id_filter(movie_id),
+                    max_time_ms=_max_time_ms(),
+                    session=session,
+                )
+            else:
+                document = await self._writes(
+                    self._update_operation(update_parameters)
+                ).find_one_and_update(
+                    self._id_filter(movie_id),
+                    {"$set": update_parameters},
+                    return_document=ReturnDocument.AFTER,
+                    session=session,
+                    **_max_time(),
+                )
+        if document is None:
+            raise RepositoryMovieNotFoundException(
+                f'movie with ID "{movie_id}" not found.'
+            )
+        return self._to_movie(document)
+
+    @_bounded_by_deadline
+    async def update_by_fields(
+        self,
+        update_parameters: dict,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> tuple[int, int]:
+        """Updates every movie matching the search parameters in a single update_many.
+
+        Returns the matched and modified counts.
+
+        Raises
+        ------
+        RepositoryException
+            If movie ID update attempted or more than max_matched movies match.
+        """
+
+        if "id" in update_parameters.keys():
+            raise RepositoryException("can't update movie ID")
+        search_filter = search_parameters(
+            title=title, release_year=release_year, watched=watched
+        )
+        async with self._session(self._client) as session:
+            write_filter = await self._bounded_filter(
+                search_filter, max_matched, session
+            )
+            if not update_parameters:
+                return (
+                    await self._movies.count_documents(
+                        write_filter, session=session, **_max_time()
+                    ),
+                    0,
+                )
+            result = await self._writes("update_by_fields").update_many(
+                write_filter, {"$set": update_parameters}, session=session
+            )
+        return result.matched_count, result.modified_count
 
+    @_bounded_by_deadline
     async def delete(self, movie_id: str):
         """Deletes a movie by ID."""
 
-        result = await self._movies.delete_one({"id": movie_id})
+        movies = self._writes("delete")
+        async with self._session(self._client) as session:
+            if self._legacy_id_fallback:
+                await movies.delete_many(self._id_filter(movie_id), session=session)
+            else:
+                await movies.delete_one(self._id_filter(movie_id), session=session)
+
+    @_bounded_by_deadline
+    async def delete_many(self, movie_ids: list[str]) -> int:
+        """Deletes movies by ID in a single delete_many.
+
+        Returns the deleted count.
+        """
+
+        if not movie_ids:
+            return 0
+        if self._legacy_id_fallback:
+            id_filter = {
+                "$or": [{"_id": {"$in": movie_ids}}, {"id": {"$in": movie_ids}}]
+            }
+        elif self._id_as_primary_key:
+            id_filter = {"_id": {"$in": movie_ids}}
+        else:
+            id_filter = {"id": {"$in": movie_ids}}
+        async with self._session(self._client) as session:
+            result = await self._writes("delete_many").delete_many(
+                id_filter, session=session
+            )
+        return result.deleted_count
+
+    @_bounded_by_deadline
+    async def delete_by_fields(
+        self,
+        title: str = None,
+        release_year: int = None,
+        watched: bool = None,
+        max_matched: int = None,
+    ) -> int:
+        """Deletes every movie matching the search parameters in a single delete_many.
+
+        Returns the deleted count.
+
+        Raises
+        ------
+        RepositoryException
+            If more than max_matched movies match.
+        """
+
+        search_filter = search_parameters(
+            title=title, release_year=release_year, watched=watched
+        )
+        async with self._session(self._client) as session:
+            write_filter = await self._bounded_filter(
+                search_filter, max_matched, session
+            )
+            result = await self._writes("delete_by_fields").delete_many(
+                write_filter, session=session
+            )
+        return result.deleted_count
@@ -0,0 +1,148 @@
+"""
+Prometheus metrics from pymongo's command and connection pool events.
+
+The listeners run synchronously on the threads Motor runs pymongo on, so
+they only do constant-time bookkeeping.
+"""
+
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "Duration of MongoDB commands as measured by the driver, per client, command and"
+    " outcome.",
+    ["client", "command", "outcome"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    ),
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, per client and outcome.",
+    ["client", "outcome"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total",
+    "Failed connection checkouts, per client and reason; reason timeout means the pool"
+    " was exhausted.",
+    ["client", "reason"],
+)
+POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections",
+    "Open pooled connections, per client and server.",
+    ["client", "address"],
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTIONS_IN_USE = Gauge(
+    "mongo_pool_connections_in_use",
+    "Pooled connections checked out, per client and server.",
+    ["client", "address"],
+    multiprocess_mode="livesum",
+)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def __init__(self, client: str):
+        self._client = client
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        COMMAND_DURATION.labels(
+            client=self._client, command=event.command_name, outcome="success"
+        ).observe(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        COMMAND_DURATION.labels(
+            client=self._client, command=event.command_name, outcome="failure"
+        ).observe(event.duration_micros / 1_000_000)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Tracks pool size and checkout waits.
+
+    A checkout starts and ends on the same thread, so its start time is kept
+    in a thread local.
+    """
+
+    def __init__(self, client: str):
+        self._client = client
+        self._checkout = threading.local()
+
+    def _observe_checkout(self, outcome: str):
+        started = getattr(self._checkout, "started", None)
+        if started is None:
+            return
+        self._checkout.started = None
+        POOL_CHECKOUT_WAIT.labels(client=self._client, outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.labels(client=self._client, address=_address(event)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.labels(client=self._client, address=_address(event)).dec()
+
+    def connection_check_out_started(self, event):
+        self._checkout.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._observe_checkout("failure")
+        POOL_CHECKOUT_FAILURES.labels(client=self._client, reason=event.reason).inc()
+
+    def connection_checked_out(self, event):
+        self._observe_checkout("success")
+        POOL_CONNECTIONS_IN_USE.labels(
+            client=self._client, address=_address(event)
+        ).inc()
+
+    def connection_checked_in(self, event):
+        POOL_CONNECTIONS_IN_USE.labels(
+            client=self._client, address=_address(event)
+        ).dec()
+
+
+def event_listeners(client: str) -> list:
+    """Returns the `event_listeners` of a client labelled `client` in the metrics."""
+
+    return [CommandMetricsListener(client), PoolMetricsListener(client)]
@@ -0,0 +1,175 @@
+import asyncio
+import collections
+import contextvars
+import logging
+import random
+import time
+import typing
+
+from app.repository.movie.abstractions import MovieRepository, search_parameters
+from app.repository.movie.delegating import DelegatingMovieRepository
+
+logger = logging.getLogger(__name__)
+
+# Keyword arguments that select movies, their values are redacted from shapes
+_FILTER_FIELDS = ("movie_id", "title", "release_year", "watched")
+# Explains are given this many times the slow threshold before the DB aborts them
+_EXPLAIN_MAX_TIME_FACTOR = 5
+
+
+def query_shape(operation: str, kwargs: dict) -> str:
+    """Describes the movies an operation selects without their values, for instance
+    `get_by_fields {release_year: ?, title: ?} skip limit`.
+    """
+
+    if "movie_ids" in kwargs:
+        fields = ["movie_id: $in"]
+    else:
+        fields = [
+            f"{field}: ?"
+            for field in sorted(
+                search_parameters(
+                    title=kwargs.get("title"),
+                    release_year=kwargs.get("release_year"),
+                    watched=kwargs.get("watched"),
+                )
+            )
+        ]
+        if kwargs.get("movie_id") is not None:
+            fields.insert(0, "movie_id: ?")
+    shape = f"{operation} {{{', '.join(fields)}}}"
+    if kwargs.get("skip"):
+        shape += " skip"
+    if kwargs.get("limit"):
+        shape += " limit"
+    return shape
+
+
+class SlowOperationStats:
+    def __init__(self, operation: str, shape: str):
+        self.operation = operation
+        self.shape = shape
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.plan: typing.Optional[dict] = None
+        self.explain_pending = False
+
+
+class SlowOperationLog:
+    """Slow operations aggregated by query shape, keeping at most `max_shapes` shapes.
+
+    Once full, the shape with the least total time makes room for a new one.
+    """
+
+    def __init__(self, max_shapes: int = 1000):
+        self._max_shapes = max_shapes
+        self._shapes: typing.OrderedDict[str, SlowOperationStats] = (
+            collections.OrderedDict()
+        )
+
+    def record(
+        self, operation: str, shape: str, duration_s: float
+    ) -> SlowOperationStats:
+        stats = self._shapes.get(shape)
+        if stats is None:
+            if len(self._shapes) >= self._max_shapes:
+                del self._shapes[
+                    min(self._shapes.values(), key=lambda s: s.total_s).shape
+                ]
+            stats = self._shapes[shape] = SlowOperationStats(operation, shape)
+        stats.count += 1
+        stats.total_s += duration_s
+        stats.max_s = max(stats.max_s, duration_s)
+        return stats
+
+    def top(self, limit: int = 20) -> list[SlowOperationStats]:
+        """Returns the shapes that spent the most time in slow operations."""
+
+        return sorted(self._shapes.values(), key=lambda s: s.total_s, reverse=True)[
+            :limit
+        ]
+
+    def clear(self):
+        self._shapes.clear()
+
+
+class SlowOperationMovieRepository(DelegatingMovieRepository):
+    """Logs repository calls slower than `threshold_s` with their query shape.
+
+    For a sample of `explain_sample_rate` of them, the wrapped repository's
+    `explain` is run in the background, once per shape at a time, and its
+    plan summary is kept with the shape. Repositories without `explain`
+    only get the timings. An explain reruns the query, so it is given
+    `_EXPLAIN_MAX_TIME_FACTOR` times `threshold_s` before the DB aborts it.
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        log: SlowOperationLog,
+        threshold_s: float,
+        explain_sample_rate: float = 0.0,
+    ):
+        super().__init__(repository)
+        self._log = log
+        self._threshold_s = threshold_s
+        self._explain_sample_rate = explain_sample_rate
+        self._explain_max_time_ms = max(
+            1, round(threshold_s * 1000 * _EXPLAIN_MAX_TIME_FACTOR)
+        )
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    async def _call(self, operation: str, method: typing.Callable, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(**kwargs)
+        finally:
+            duration_s = time.perf_counter() - started
+            if duration_s >= self._threshold_s:
+                self._record(operation, kwargs, duration_s)
+
+    def _record(self, operation: str, kwargs: dict, duration_s: float):
+        shape = query_shape(operation, kwargs)
+        logger.warning(
+            "Slow repository operation (%.1f ms): %s", duration_s * 1000, shape
+        )
+        stats = self._log.record(operation, shape, duration_s)
+
+        explain = getattr(self._repository, "explain", None)
+        if (
+            explain is None
+            or stats.explain_pending
+            or random.random() >= self._explain_sample_rate
+        ):
+            return
+        stats.explain_pending = True
+        filter_kwargs = {
+            field: value
+            for field, value in kwargs.items()
+            if field in _FILTER_FIELDS + ("skip", "limit")
+        }
+        filter_kwargs["max_time_ms"] = self._explain_max_time_ms
+        # A fresh context, so the explain isn't bound by the request's deadline
+        task = asyncio.get_running_loop().create_task(
+            self._explain(explain, stats, operation, filter_kwargs),
+            context=contextvars.Context(),
+        )
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    @staticmethod
+    async def _explain(
+        explain: typing.Callable,
+        stats: SlowOperationStats,
+        operation: str,
+        kwargs: dict,
+    ):
+        try:
+            plan = await explain(operation, **kwargs)
+            if plan is not None:
+                stats.plan = plan
+        except Exception as e:
+            logger.info("Explain of %s failed: %s", stats.shape, e)
+        finally:
+            stats.explain_pending = False
@@ -0,0 +1,92 @@
+"""
+Size-aware JSON encoding of large responses.
+
+Building and encoding a listing of a thousand movies with long
+descriptions holds the event loop for tens of milliseconds. Listings
+above a row or byte threshold are converted and encoded in a small thread
+pool instead. The GIL still serializes the work, but the interpreter
+switches threads every few milliseconds, so the loop keeps serving small
+requests in between instead of stalling behind the listing.
+"""
+
+import asyncio
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+import ujson
+from prometheus_client import Gauge
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from app.entities.movie import Movie
+
+ENCODE_QUEUE_DEPTH = Gauge(
+    "response_encode_queue_depth",
+    "Responses waiting for or being encoded in the serialization thread pool.",
+    multiprocess_mode="livesum",
+)
+
+# Rough size of a movie's JSON besides its title and description
+_MOVIE_OVERHEAD_BYTES = 100
+
+
+def estimated_size(movies: typing.Sequence[Movie]) -> int:
+    """Estimates the size in bytes of the JSON listing `movies`, without encoding it."""
+
+    return sum(
+        len(movie.title) + len(movie.description) + _MOVIE_OVERHEAD_BYTES
+        for movie in movies
+    )
+
+
+def encode(model: BaseModel) -> bytes:
+    """Encodes `model` like FastAPI's JSONResponse would.
+
+    The JSON is compact and non-ASCII characters aren't escaped.
+    """
+
+    return ujson.dumps(
+        model.dict(), ensure_ascii=False, escape_forward_slashes=False
+    ).encode("utf-8")
+
+
+class ResponseEncoder:
+    """Builds and encodes responses of more than `min_rows` movies, or `min_bytes`
+    estimated bytes, on one of `max_workers` threads.
+
+    Smaller responses are left to FastAPI on the event loop, where the
+    hand-off to a thread would cost more than it saves.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, min_rows: int = 200, min_bytes: int = 256 * 1024
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="response-encoder"
+        )
+        self._min_rows = min_rows
+        self._min_bytes = min_bytes
+
+    def offloads(self, movies: typing.Sequence[Movie]) -> bool:
+        return (
+            len(movies) >= self._min_rows or estimated_size(movies) >= self._min_bytes
+        )
+
+    async def response(
+        self, build: typing.Callable[[], BaseModel], status_code: int = 200
+    ) -> Response:
+        """Returns a JSON response of the model `build` returns.
+
+        The model is both built and encoded on the pool.
+        """
+
+        ENCODE_QUEUE_DEPTH.inc()
+        try:
+            content = await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: encode(build())
+            )
+        finally:
+            ENCODE_QUEUE_DEPTH.dec()
+        return Response(
+            content=content, status_code=status_code, media_type="application/json"
+        )
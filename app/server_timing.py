@@ -0,0 +1,89 @@
+"""
+Per-request phase timings shared between the Server-Timing middleware,
+the routes and the handlers. Timing is off unless the middleware enabled
+it for the current request, in which case phases cost one context variable
+lookup.
+"""
+
+import contextlib
+import contextvars
+import time
+import typing
+
+
+class ServerTiming:
+    """Phase durations of one request, rendered as a Server-Timing header value.
+
+    `deps` is the time from the request reaching the app to the handler being
+    called (routing, body parsing and dependency resolution), `serialization`
+    the time from the handler returning to the response starting.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_started: typing.Optional[float] = None
+        self.handler_finished: typing.Optional[float] = None
+        self.phases: dict[str, float] = {}
+
+    def add(self, name: str, duration_s: float):
+        self.phases[name] = self.phases.get(name, 0.0) + duration_s
+
+    def header(self) -> str:
+        now = time.perf_counter()
+        entries = []
+        if self.handler_started is not None:
+            entries.append(("deps", self.handler_started - self.started))
+        entries.extend(self.phases.items())
+        if self.handler_started is not None and self.handler_finished is not None:
+            entries.append(("handler", self.handler_finished - self.handler_started))
+            entries.append(("serialization", now - self.handler_finished))
+        entries.append(("total", now - self.started))
+        return ", ".join(
+            f"{name};dur={duration_s * 1000:.3f}" for name, duration_s in entries
+        )
+
+
+class _Phase:
+    __slots__ = ("_timing", "_name", "_started")
+
+    def __init__(self, timing: ServerTiming, name: str):
+        self._timing = timing
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._timing.add(self._name, time.perf_counter() - self._started)
+
+
+_NO_PHASE = contextlib.nullcontext()
+
+_timing: contextvars.ContextVar[typing.Optional[ServerTiming]] = contextvars.ContextVar(
+    "server_timing", default=None
+)
+
+
+def start() -> contextvars.Token:
+    """Starts timing the current request."""
+
+    return _timing.set(ServerTiming())
+
+
+def reset(token: contextvars.Token):
+    _timing.reset(token)
+
+
+def current() -> typing.Optional[ServerTiming]:
+    """Returns the timings of the current request, None if it isn't timed."""
+
+    return _timing.get()
+
+
+def phase(name: str):
+    """Context manager adding the time spent in it to the request's `name` phase."""
+
+    timing = _timing.get()
+    if timing is None:
+        return _NO_PHASE
+    return _Phase(timing, name)
@@ -0,0 +1,80 @@
+import math
+import socket
+
+import pytest
+from fastapi import FastAPI
+
+from benchmarks.loadtest.runner import breaches, serve, summarize
+
+
+def test_summarize():
+    results = [("get", latency / 1000, True) for latency in range(1, 101)] + [
+        ("create", 0.5, True),
+        ("create", 30.0, False),
+    ]
+
+    summary = summarize(results, duration_s=2)
+
+    assert summary["requests"] == 102
+    assert summary["requests_per_s"] == 51
+    assert summary["error_rate"] == 1 / 102
+    assert summary["p99_ms"] == 100
+    assert list(summary["requests_by_name"]) == ["create", "get"]
+    get = summary["requests_by_name"]["get"]
+    assert (get["requests"], get["p50_ms"], get["p95_ms"], get["error_rate"]) == (
+        100,
+        51,
+        96,
+        0.0,
+    )
+    # Failed requests count for the error rate, not the latencies
+    create = summary["requests_by_name"]["create"]
+    assert (create["requests"], create["p99_ms"], create["error_rate"]) == (2, 500, 0.5)
+
+
+def test_summarize_every_request_failed():
+    summary = summarize([("get", 1.0, False), ("get", 2.0, False)], duration_s=1)
+
+    assert summary["error_rate"] == 1
+    assert math.isnan(summary["p50_ms"])
+    assert math.isnan(summary["requests_by_name"]["get"]["p99_ms"])
+    assert summarize([], duration_s=1)["error_rate"] == 0
+
+
+def test_breaches_bounds():
+    summary = {"requests_per_s": 100.0, "p99_ms": 50.0, "error_rate": 0.01}
+
+    # Bounds equal to the values are met. requests_per_s is a minimum, the others are
+    # maximums
+    assert (
+        breaches(summary, {"requests_per_s": 100, "p99_ms": 50, "error_rate": 0.01})
+        == []
+    )
+    assert breaches(summary, {"requests_per_s": 50, "p99_ms": 100}) == []
+    assert breaches(
+        summary, {"requests_per_s": 150, "p99_ms": 40, "error_rate": 0}
+    ) == [
+        "requests_per_s 100.0 < 150",
+        "p99_ms 50.000 > 40",
+        "error_rate 0.010 > 0",
+    ]
+
+
+def test_breaches_nan():
+    summary = summarize([("get", 1.0, False)], duration_s=1)
+    summary["requests_per_s"] = float("nan")
+
+    assert breaches(summary, {"p99_ms": 1000, "requests_per_s": 0}) == [
+        "p99_ms nan > 1000",
+        "requests_per_s nan < 0",
+    ]
+
+
+# Uvicorn exits its thread when it can't bind
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_serve_port_in_use():
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        with pytest.raises(RuntimeError, match="stopped before starting"):
+            serve(FastAPI(), taken.getsockname()[1], timeout_s=5)
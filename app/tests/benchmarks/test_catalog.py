@@ -0,0 +1,60 @@
+import io
+import json
+
+from app.dto.movie import CreateMovieBody
+from benchmarks.catalog import (
+    FIRST_YEAR,
+    LAST_YEAR,
+    MAX_DESCRIPTION_LENGTH,
+    CatalogGenerator,
+    write_ndjson,
+)
+
+
+def test_batches_pass_create_movie_body():
+    generator = CatalogGenerator(seed=1, future_ratio=0.2)
+
+    batches = list(generator.batches(2500, batch_size=1000))
+
+    assert [len(batch) for batch in batches] == [1000, 1000, 500]
+    movies = [movie for batch in batches for movie in batch]
+    for movie in movies:
+        CreateMovieBody(
+            title=movie.title,
+            description=movie.description,
+            release_year=movie.release_year,
+            watched=movie.watched,
+        )
+        assert FIRST_YEAR <= movie.release_year <= LAST_YEAR
+        assert len(movie.description) <= MAX_DESCRIPTION_LENGTH
+    assert len({movie.id for movie in movies}) == len(movies)
+
+
+def test_ndjson_lines_pass_create_movie_body():
+    file = io.StringIO()
+    write_ndjson(file, CatalogGenerator(seed=1, titles=1000), 100, batch_size=30)
+
+    lines = file.getvalue().splitlines()
+    assert len(lines) == 100
+    for line in lines:
+        document = json.loads(line)
+        document.pop("id")
+        CreateMovieBody(**document)
+
+
+def test_same_seed_same_catalog():
+    def catalog(seed: int) -> list[tuple]:
+        generator = CatalogGenerator(seed=seed, titles=1000)
+        return [
+            (
+                movie.id,
+                movie.title,
+                movie.description,
+                movie.release_year,
+                movie.watched,
+            )
+            for movie in generator.movies(500)
+        ]
+
+    assert catalog(7) == catalog(7)
+    assert catalog(7) != catalog(8)
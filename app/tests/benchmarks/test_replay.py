@@ -0,0 +1,141 @@
+import asyncio
+import json
+import math
+import time
+
+import httpx
+import pytest
+
+from benchmarks.replay import load, replay, report
+
+
+def _captured(ts: float, path: str = "/api/v1/movie/", **fields) -> dict:
+    return {
+        "ts": ts,
+        "method": "GET",
+        "path": path,
+        "query": "",
+        "content_type": None,
+        "body": None,
+        "body_truncated": False,
+        "route": "GET get_movie_by_fields",
+        **fields,
+    }
+
+
+def _write(path, *requests: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+        f.write("\n")
+
+
+def test_load_merges_worker_files_in_capture_order(tmp_path):
+    # One file per worker, each in its own order
+    _write(tmp_path / "traffic-1.jsonl", _captured(1.0, "/a"), _captured(4.0, "/d"))
+    _write(
+        tmp_path / "traffic-2.jsonl",
+        _captured(2.0, "/b"),
+        _captured(2.5, "/truncated", method="POST", body=None, body_truncated=True),
+        _captured(3.0, "/c"),
+    )
+    paths = [str(tmp_path / "traffic-1.jsonl"), str(tmp_path / "traffic-2.jsonl")]
+
+    requests, skipped = load(paths)
+    assert [request["path"] for request in requests] == ["/a", "/b", "/c", "/d"]
+    assert skipped == 1
+
+    requests, _ = load(paths, limit=2)
+    assert [request["path"] for request in requests] == ["/a", "/b"]
+
+
+def test_report():
+    results = [
+        ("GET a", 0.01, True),
+        ("GET a", 0.03, True),
+        ("GET a", 1.0, False),
+        ("POST b", 0.02, True),
+    ]
+
+    summary = report(results, duration_s=2)
+
+    # Routes sorted, the total last
+    assert list(summary) == ["GET a", "POST b", "total"]
+    assert summary["GET a"] == {
+        "requests": 3,
+        "requests_per_s": 1.5,
+        "p50_ms": 30,
+        "p95_ms": 30,
+        "p99_ms": 30,
+        "errors": 1,
+    }
+    assert summary["total"]["requests"] == 4
+    assert summary["total"]["errors"] == 1
+    assert math.isnan(
+        report([("GET a", 1.0, True)], duration_s=0)["GET a"]["requests_per_s"]
+    )
+
+
+def _client(handler_delay_s: float, sent: list[tuple[str, float]]) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        sent.append((request.url.path, time.monotonic()))
+        await asyncio.sleep(handler_delay_s)
+        return httpx.Response(500 if request.url.path == "/error" else 200)
+
+    return httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="http://replay"
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("speed", [1, 2])
+async def test_replay_open_loop_on_captured_schedule(speed: float):
+    requests = [
+        _captured(10.0, "/a"),
+        _captured(10.1, "/b"),
+        _captured(10.2, "/error", route=None),
+    ]
+    sent = []
+
+    async with _client(0.3, sent) as client:
+        started = time.monotonic()
+        results, duration_s = await replay(client, requests, speed=speed)
+
+    # Sent at the captured offsets, slow responses don't hold the next requests back
+    offsets = [sent_at - started for _, sent_at in sent]
+    assert [path for path, _ in sent] == ["/a", "/b", "/error"]
+    for offset, expected in zip(offsets, [0, 0.1 / speed, 0.2 / speed]):
+        assert expected - 0.01 <= offset < expected + 0.1
+    assert duration_s < 0.2 / speed + 0.3 + 0.1
+    assert sorted((route, ok) for route, _, ok in results) == [
+        ("GET /error", False),
+        ("GET get_movie_by_fields", True),
+        ("GET get_movie_by_fields", True),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_replay_max_in_flight():
+    requests = [_captured(0.0, "/a"), _captured(0.0, "/b")]
+    sent = []
+
+    async with _client(0.1, sent) as client:
+        results, duration_s = await replay(client, requests, speed=1, max_in_flight=1)
+
+    # The second request waits for the first response
+    assert sent[1][1] - sent[0][1] >= 0.09
+    assert len(results) == 2
+
+
+@pytest.mark.asyncio
+async def test_replay_closed_loop():
+    requests = [_captured(0.0, f"/{index}") for index in range(6)]
+    sent = []
+
+    async with _client(0.05, sent) as client:
+        results, duration_s = await replay(client, requests, speed=0, concurrency=2)
+
+    assert [path for path, _ in sent] == [f"/{index}" for index in range(6)]
+    assert len(results) == 6
+    # Two clients, each waiting for its responses
+    assert 0.15 <= duration_s < 0.3
@@ -0,0 +1,85 @@
+import pytest
+
+from benchmarks.repository import compare
+
+
+def _results(*results: tuple[str, float]) -> dict:
+    return {
+        "results": [
+            {
+                "backend": "memory",
+                "size": 1000,
+                "operation": operation,
+                "p50_ms": p50_ms,
+            }
+            for operation, p50_ms in results
+        ]
+    }
+
+
+def test_compare():
+    changes = compare(
+        _results(("create", 1.0), ("get_by_id", 2.0)),
+        _results(("create", 1.5), ("get_by_id", 1.0)),
+    )
+
+    assert [
+        (change["operation"], change["change"], change["regression"])
+        for change in changes
+    ] == [
+        ("create", 0.5, True),
+        ("get_by_id", -0.5, False),
+    ]
+    assert changes[0]["baseline"] == 1.0
+    assert changes[0]["candidate"] == 1.5
+
+
+@pytest.mark.parametrize(
+    "candidate, regression",
+    [(2.999, False), (3.0, False), (3.001, True)],
+)
+def test_compare_threshold(candidate: float, regression: bool):
+    # The growth must exceed the threshold to be a regression
+    changes = compare(
+        _results(("create", 2.0)), _results(("create", candidate)), threshold=0.5
+    )
+
+    assert [change["regression"] for change in changes] == [regression]
+
+
+def test_compare_missing_operations():
+    changes = compare(
+        _results(("create", 1.0), ("delete", 1.0)),
+        _results(("create", 1.0), ("update", 5.0)),
+    )
+
+    assert [change["operation"] for change in changes] == ["create"]
+
+
+def test_compare_nan():
+    changes = compare(
+        _results(("create", float("nan")), ("delete", 0.0), ("update", 1.0)),
+        _results(("create", 5.0), ("delete", 5.0), ("update", float("nan"))),
+    )
+
+    # Nothing to compare without a baseline, no candidate value is a regression
+    assert [(change["operation"], change["regression"]) for change in changes] == [
+        ("update", True)
+    ]
+
+
+def test_compare_other_metric_and_keys():
+    baseline = _results(("create", 1.0))
+    baseline["results"][0]["p99_ms"] = 10.0
+    candidate = {
+        "results": [
+            {**baseline["results"][0], "size": 2000, "p99_ms": 20.0},
+            {**baseline["results"][0], "p99_ms": 10.5},
+        ]
+    }
+
+    changes = compare(baseline, candidate, metric="p99_ms")
+
+    assert [(change["size"], change["regression"]) for change in changes] == [
+        (1000, False)
+    ]
@@ -0,0 +1,13 @@
+import math
+
+from benchmarks.stats import percentile
+
+
+def test_percentile():
+    values = [float(value) for value in range(100, 0, -1)]
+
+    assert percentile(values, 50) == 51
+    assert percentile(values, 99) == 100
+    assert percentile(values, 100) == 100
+    assert percentile([3.0], 99) == 3
+    assert math.isnan(percentile([], 50))
@@ -5,7 +5,8 @@ import pytest
 from starlette.testclient import TestClient
 
 from app.api import create_app
-from app.config import TestSettings, test_settings_instance
+from app.config import Settings, TestSettings, test_settings_instance
+from app.handlers.handler_dependencies import movie_repository
 from app.repository.movie.memory import MemoryMovieRepository
 from app.repository.movie.mongo import MongoMovieRepository
 
@@ -29,6 +30,25 @@ def mongo_movie_repo_fixture(
     loop.run_until_complete(repo._client.drop_database(random_database_name))
 
 
+@pytest.fixture()
+def mongo_primary_key_movie_repo_fixture(
+    settings: TestSettings = lambda: test_settings_instance(),
+) -> MongoMovieRepository:
+    random_database_name = secrets.token_hex(5)
+    repo = MongoMovieRepository(
+        connection_string=settings().mongo_connection_string,
+        database=random_database_name,
+        server_selection_timeout_ms=settings().server_selection_timeout_ms,
+        id_as_primary_key=True,
+        legacy_id_fallback=True,
+    )
+    yield repo
+
+    loop = asyncio.get_event_loop()
+    # noinspection PyProtectedMember
+    loop.run_until_complete(repo._client.drop_database(random_database_name))
+
+
 @pytest.fixture()
 def memory_movie_repo_fixture():
     repo = MemoryMovieRepository()
@@ -36,6 +56,28 @@ def memory_movie_repo_fixture():
     del repo
 
 
+def app_settings(**overrides) -> Settings:
+    """Settings for apps under test, pointing at a local MongoDB."""
+
+    return Settings(
+        mongo_connection_string="mongodb://localhost:27017",
+        mongo_database_name=secrets.token_hex(5),
+        server_selection_timeout_ms=100,
+        **overrides,
+    )
+
+
+def memory_app_client(repo: MemoryMovieRepository = None, **settings) -> TestClient:
+    """Client of an app without warm-up serving the movies of `repo`, a new memory
+    repository if None.
+    """
+
+    app = create_app(settings=app_settings(warm_up_enabled=False, **settings))
+    repo = repo if repo is not None else MemoryMovieRepository()
+    app.dependency_overrides[movie_repository] = lambda: repo
+    return TestClient(app)
+
+
 @pytest.fixture()
 def test_client():
-    return TestClient(app=create_app())
+    return TestClient(app=create_app(settings=app_settings()))
@@ -0,0 +1,185 @@
+from functools import partial
+
+import pytest
+
+from app.config import Settings, settings_instance
+from app.dto.batch import BatchOperation
+from app.entities.movie import Movie
+from app.handlers.batch_v1 import _classify
+from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.memory import MemoryMovieRepository
+
+# noinspection PyUnresolvedReferences
+from app.tests.fixtures import test_client
+
+
+def memory_movie_repository_dependency(repo: MemoryMovieRepository):
+    return repo
+
+
+def settings_dependency():
+    return Settings(
+        mongo_connection_string="mongodb://unused",
+        mongo_database_name="unused",
+        server_selection_timeout_ms=1,
+        batch_max_operations=10,
+    )
+
+
+@pytest.mark.asyncio()
+async def test_batch(test_client):
+    # Setup
+    repo = MemoryMovieRepository()
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    test_client.app.dependency_overrides[settings_instance] = settings_dependency
+    await repo.create(
+        Movie(
+            id="valid_ID1",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    # Test
+    result = test_client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {
+                    "method": "POST",
+                    "path": "/movie/",
+                    "body": {
+                        "title": "new movie",
+                        "description": "new description",
+                        "release_year": 2004,
+                    },
+                },
+                {"method": "POST", "path": "/movie/", "body": {"title": "no"}},
+                {
+                    "method": "PATCH",
+                    "path": "/movie/valid_ID1",
+                    "body": {"watched": True},
+                },
+                {"method": "GET", "path": "/api/v1/movie/valid_ID1"},
+                {
+                    "method": "PATCH",
+                    "path": "/movie/valid_ID1",
+                    "body": {"release_year": 2000},
+                    "headers": {"Prefer": "return=representation"},
+                },
+                {
+                    "method": "PATCH",
+                    "path": "/movie/valid_ID1",
+                    "body": {"release_year": "x"},
+                },
+                {
+                    "method": "PATCH",
+                    "path": "/movie/valid_ID2",
+                    "body": {"watched": True},
+                },
+                {"method": "DELETE", "path": "/movie/valid_ID1"},
+                {"method": "GET", "path": "/movie/valid_ID1"},
+                {"method": "GET", "path": "/movie/"},
+            ]
+        },
+    )
+
+    # Assert
+    assert result.status_code == 200
+    results = result.json()["results"]
+    assert [operation["status"] for operation in results] == [
+        201,
+        422,
+        200,
+        200,
+        200,
+        422,
+        404,
+        204,
+        404,
+        405,
+    ]
+    assert await repo.get_by_id(results[0]["body"]["id"]) is not None
+    assert results[2]["body"] == {"message": "Movie with ID valid_ID1 updated."}
+    assert results[3]["body"]["watched"] is True
+    assert results[4]["body"]["release_year"] == 2000
+    assert await repo.get_by_id("valid_ID1") is None
+
+
+@pytest.mark.asyncio()
+async def test_batch_unsupported(test_client):
+    # Setup
+    repo = MemoryMovieRepository()
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    test_client.app.dependency_overrides[settings_instance] = settings_dependency
+    await repo.create(
+        Movie(
+            id="valid_ID1",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    # Test
+    result = test_client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {
+                    "method": "POST",
+                    "path": "/movie/valid_ID1",
+                    "body": {"title": "changed"},
+                },
+                {"method": "PATCH", "path": "/movie/", "body": {"watched": True}},
+                {"method": "DELETE", "path": "/movie/"},
+                {"method": "GET", "path": "/movie/valid_ID1/other"},
+            ]
+        },
+    )
+
+    # Assert
+    assert result.status_code == 200
+    results = result.json()["results"]
+    assert [operation["status"] for operation in results] == [405] * 4
+    assert (await repo.get_by_id("valid_ID1")).title == "test movie"
+
+
+@pytest.mark.asyncio()
+async def test_batch_max_operations(test_client):
+    # Setup
+    repo = MemoryMovieRepository()
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    test_client.app.dependency_overrides[settings_instance] = settings_dependency
+
+    # Test
+    result = test_client.post(
+        "/api/v1/batch",
+        json={"operations": [{"method": "GET", "path": "/movie/valid_ID1"}] * 11},
+    )
+
+    # Assert
+    assert result.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("POST", "/movie/", ("create", "")),
+        ("POST", "/api/v1/movie", ("create", "")),
+        ("DELETE", "/movie/my%20id", ("delete", "my id")),
+        ("GET", "/movie/my-id/", ("single", "my-id")),
+        ("PATCH", "/api/v1/movie/my-id?x=1", ("single", "my-id")),
+        ("GET", "/moviefoo", ("single", "")),
+        ("DELETE", "/movie/my-id/other", ("single", "")),
+    ],
+)
+def test_classify(method, path, expected):
+    assert _classify(BatchOperation(method=method, path=path)) == expected
@@ -0,0 +1,42 @@
+import pytest
+from starlette.testclient import TestClient
+
+from app.api import create_app
+from app.handlers.handler_dependencies import slow_operation_log
+from app.repository.movie.slow_operations import SlowOperationLog
+from app.tests.fixtures import app_settings
+
+
+@pytest.mark.parametrize(
+    "admin_token, headers, expected_status_code",
+    [
+        pytest.param(None, {"X-Admin-Token": "secret"}, 404, id="disabled"),
+        pytest.param("secret", {}, 403, id="missing token"),
+        pytest.param("secret", {"X-Admin-Token": "wrong"}, 403, id="wrong token"),
+        pytest.param("secret", {"X-Admin-Token": "secret"}, 200, id="valid token"),
+    ],
+)
+def test_slow_queries(admin_token, headers, expected_status_code):
+    log = SlowOperationLog()
+    log.record("get_by_fields", "get_by_fields {title: ?}", 0.2)
+    log.record("get_by_fields", "get_by_fields {title: ?}", 0.4)
+    log.record("get_by_id", "get_by_id {movie_id: ?}", 0.1)
+    app = create_app(settings=app_settings(admin_token=admin_token))
+    app.dependency_overrides[slow_operation_log] = lambda: log
+
+    result = TestClient(app).get("/debug/slow-queries?limit=1", headers=headers)
+
+    assert result.status_code == expected_status_code
+    if expected_status_code == 200:
+        assert result.json() == {
+            "shapes": [
+                {
+                    "operation": "get_by_fields",
+                    "shape": "get_by_fields {title: ?}",
+                    "count": 2,
+                    "total_ms": pytest.approx(600),
+                    "max_ms": pytest.approx(400),
+                    "plan": None,
+                }
+            ]
+        }
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from pymongo.errors import ServerSelectionTimeoutError
+from starlette.testclient import TestClient
+
+from app.api import create_app
+from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import app_settings
+
+
+class WarmingMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository failing warm-up `failures` times, then awaiting `released`."""
+
+    def __init__(self, failures: int = 0):
+        super().__init__()
+        self.failures = failures
+        self.released = False
+        self.warm_up_calls = 0
+        self.pings = 0
+
+    async def ping(self):
+        self.pings += 1
+
+    async def warm_up(self, connections: int = 0, documents: int = 0):
+        self.warm_up_calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ServerSelectionTimeoutError("unreachable")
+        while not self.released:
+            await asyncio.sleep(0.01)
+
+
+def _wait_until_ready(client: TestClient, timeout_s: float = 2.0):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        result = client.get("/health/ready")
+        if result.status_code == 200:
+            return result
+        time.sleep(0.01)
+    raise AssertionError("not ready in time")
+
+
+def test_ready_after_warm_up():
+    repo = WarmingMemoryMovieRepository(failures=1)
+    app = create_app(settings=app_settings(warm_up_retry_interval_s=0.01))
+    app.dependency_overrides[movie_repository] = lambda: repo
+
+    with TestClient(app) as client:
+        result = client.get("/health/ready")
+        assert result.status_code == 503
+        assert result.json() == {"status": "starting"}
+
+        result = client.get("/health/live")
+        assert result.status_code == 200
+        assert result.json() == {"status": "starting"}
+
+        repo.released = True
+        assert _wait_until_ready(client).json() == {"status": "ready"}
+        assert client.get("/health/live").json() == {"status": "ready"}
+
+    # The failed warm-up was retried, probes never reached the repository
+    assert repo.warm_up_calls == 2
+    assert repo.pings == 0
+
+
+def test_ready_without_warm_up():
+    repo = WarmingMemoryMovieRepository()
+    app = create_app(settings=app_settings(warm_up_enabled=False))
+    app.dependency_overrides[movie_repository] = lambda: repo
+
+    with TestClient(app) as client:
+        result = client.get("/health/ready")
+        assert result.status_code == 200
+        assert result.json() == {"status": "ready"}
+    assert repo.warm_up_calls == 0
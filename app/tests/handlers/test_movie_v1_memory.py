@@ -2,20 +2,21 @@ from functools import partial
 
 import pytest
 
+from app.config import Settings, settings_instance
 from app.entities.movie import Movie
 from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerMovieRepository,
+)
 from app.repository.movie.memory import MemoryMovieRepository
 
 # noinspection PyUnresolvedReferences
 from app.tests.fixtures import test_client
 
-# FIXME: movie_repository override doesn't work,
-#  even after dependency_overrides is successfully populated,
-#  the create_movie handler takes MongoMovieRepository as the repo dependency.
-
 
-def memory_movie_repository_dependency():
-    return MemoryMovieRepository()
+def memory_movie_repository_dependency(repo: MemoryMovieRepository):
+    return repo
 
 
 @pytest.mark.asyncio()
@@ -648,3 +649,172 @@ async def test_delete(
     # Assert
     assert delete_result.status_code == expected_status_code
     assert read_result.json() == {"message": f"Movie with ID {movie_id} not found."}
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    "movie_id, prefer, expected_status_code, expected_result",
+    [
+        pytest.param(
+            "valid_ID1",
+            "return=representation",
+            200,
+            {
+                "description": "test description",
+                "id": "valid_ID1",
+                "release_year": 1999,
+                "title": "test movie",
+                "watched": True,
+            },
+            id="representation returned",
+        ),
+        pytest.param(
+            "valid_ID2",
+            "return=representation",
+            404,
+            {"message": 'movie with ID "valid_ID2" not found.'},
+            id="representation requested, movie not found",
+        ),
+        pytest.param(
+            "valid_ID1",
+            "return=minimal",
+            200,
+            {"message": "Movie with ID valid_ID1 updated."},
+            id="minimal",
+        ),
+    ],
+)
+async def test_patch_update_prefer(
+    test_client, movie_id, prefer, expected_status_code, expected_result
+):
+    # Setup
+    repo = MemoryMovieRepository()
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    await repo.create(
+        Movie(
+            id="valid_ID1",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    # Test
+    update_result = test_client.patch(
+        f"/api/v1/movie/{movie_id}", json={"watched": True}, headers={"Prefer": prefer}
+    )
+
+    # Assert
+    assert update_result.status_code == expected_status_code
+    assert update_result.json() == expected_result
+
+
+def settings_dependency():
+    return Settings(
+        mongo_connection_string="mongodb://unused",
+        mongo_database_name="unused",
+        server_selection_timeout_ms=1,
+        bulk_operation_max_matched=2,
+    )
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(
+    "method, query, expected_status_code, expected_result, expected_remaining",
+    [
+        pytest.param(
+            "PATCH",
+            "release_year=1999&confirm=true",
+            200,
+            {"matched_count": 2, "modified_count": 1},
+            3,
+            id="update matching movies",
+        ),
+        pytest.param(
+            "DELETE",
+            "release_year=1999&watched=false&confirm=true",
+            200,
+            {"deleted_count": 1},
+            2,
+            id="delete matching movies",
+        ),
+        pytest.param(
+            "DELETE",
+            "release_year=1999",
+            400,
+            {"message": "Set confirm=true to delete every matching movie."},
+            3,
+            id="guard parameter missing",
+        ),
+        pytest.param(
+            "PATCH",
+            "confirm=true",
+            400,
+            {"message": "the search parameters match more than 2 movies"},
+            3,
+            id="row limit exceeded",
+        ),
+    ],
+)
+async def test_bulk_update_and_delete(
+    test_client,
+    method,
+    query,
+    expected_status_code,
+    expected_result,
+    expected_remaining,
+):
+    # Setup
+    repo = MemoryMovieRepository()
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    test_client.app.dependency_overrides[settings_instance] = settings_dependency
+    for movie_id, release_year, watched in [
+        ("valid_ID1", 1999, False),
+        ("valid_ID2", 1999, True),
+        ("valid_ID3", 2000, False),
+    ]:
+        await repo.create(
+            Movie(
+                id=movie_id,
+                title="test movie",
+                description="test description",
+                release_year=release_year,
+                watched=watched,
+            )
+        )
+
+    # Test
+    result = test_client.request(
+        method, f"/api/v1/movie/?{query}", json={"watched": True}
+    )
+
+    # Assert
+    assert result.status_code == expected_status_code
+    assert result.json() == expected_result
+    assert (await repo.get_by_fields())[1] == expected_remaining
+
+
+@pytest.mark.asyncio()
+async def test_circuit_open(test_client):
+    # Setup
+    repo = MemoryMovieRepository()
+    breaker = CircuitBreaker(probe=repo.ping, failure_threshold=1, probe_interval_s=30)
+    patched_dependency = partial(
+        memory_movie_repository_dependency,
+        CircuitBreakerMovieRepository(repo, breaker=breaker),
+    )
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+    breaker.record_failure()
+
+    # Test
+    result = test_client.get("/api/v1/movie/valid_ID1")
+
+    # Assert
+    assert result.status_code == 503
+    assert int(result.headers["Retry-After"]) > 0
+    await breaker.close()
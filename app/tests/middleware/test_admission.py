@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.api import create_app
+from app.handlers.handler_dependencies import movie_repository
+from app.middleware.admission import AdmissionBudget
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import app_settings
+
+
+class SlowMemoryMovieRepository(MemoryMovieRepository):
+    async def get_by_id(self, movie_id: str):
+        await asyncio.sleep(0.1)
+        return await super().get_by_id(movie_id)
+
+
+@pytest.mark.asyncio
+async def test_budget_queues_in_order_and_rejects():
+    budget = AdmissionBudget("test", max_in_flight=1, max_queued=1, queue_timeout_s=1)
+
+    assert await budget.acquire()
+    queued = asyncio.create_task(budget.acquire())
+    await asyncio.sleep(0)
+    assert budget.queued == 1
+
+    # Queue is full
+    assert not await budget.acquire()
+
+    budget.release()
+    assert await queued
+    assert budget.in_flight == 1
+    budget.release()
+    assert budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_queue_timeout():
+    budget = AdmissionBudget(
+        "test", max_in_flight=1, max_queued=1, queue_timeout_s=0.01
+    )
+
+    assert await budget.acquire()
+    assert not await budget.acquire()
+    assert budget.queued == 0
+    budget.release()
+    assert budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_shed_writes_admitted():
+    app = create_app(
+        settings=app_settings(
+            admission_read_max_in_flight=1,
+            admission_read_max_queued=0,
+            admission_write_max_in_flight=1,
+            admission_write_max_queued=0,
+        )
+    )
+    repo = SlowMemoryMovieRepository()
+    app.dependency_overrides[movie_repository] = lambda: repo
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            client.get("/api/v1/movie/valid_ID1"),
+            client.get("/api/v1/movie/valid_ID1"),
+            client.delete("/api/v1/movie/valid_ID1"),
+        )
+
+    assert sorted(response.status_code for response in responses) == [204, 404, 503]
+    assert [
+        r.headers.get("Retry-After") for r in responses if r.status_code == 503
+    ] == ["1"]
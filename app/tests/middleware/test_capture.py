@@ -0,0 +1,74 @@
+import json
+import os
+
+from starlette.testclient import TestClient
+
+from app.tests.fixtures import memory_app_client
+
+
+def _client(tmp_path, **settings) -> TestClient:
+    return memory_app_client(
+        capture_path=str(tmp_path / "captures" / "traffic-{pid}.jsonl"), **settings
+    )
+
+
+def test_captures_requests(tmp_path):
+    with _client(tmp_path, capture_sample_rate=1, capture_max_body_bytes=200) as client:
+        client.post(
+            "/api/v1/movie/",
+            json={
+                "title": "Dune",
+                "description": "Sand",
+                "release_year": 2021,
+                "watched": False,
+            },
+            headers={"X-Admin-Token": "secret"},
+        )
+        client.get("/api/v1/movie/", params={"title": "Dune"})
+        client.post(
+            "/api/v1/movie/",
+            json={
+                "title": "Dune",
+                "description": "x" * 500,
+                "release_year": 2021,
+                "watched": False,
+            },
+        )
+
+    with open(
+        tmp_path / "captures" / f"traffic-{os.getpid()}.jsonl", encoding="utf-8"
+    ) as f:
+        created, listed, truncated = [json.loads(line) for line in f]
+
+    assert created["method"] == "POST"
+    assert created["path"] == "/api/v1/movie/"
+    assert created["content_type"] == "application/json"
+    assert json.loads(created["body"])["title"] == "Dune"
+    assert created["route"] == "POST post_create_movie"
+    assert created["status"] == 201
+    assert "secret" not in json.dumps(created)
+    assert listed["query"] == "title=Dune"
+    assert listed["body"] is None
+    assert listed["duration_ms"] > 0
+    assert truncated["body_truncated"] and truncated["body"] is None
+
+
+def test_rotates_capture_file(tmp_path):
+    with _client(
+        tmp_path, capture_sample_rate=1, capture_max_bytes=1000, capture_backup_count=2
+    ) as client:
+        for _ in range(20):
+            client.get("/health/live")
+
+    assert sorted(os.listdir(tmp_path / "captures")) == [
+        f"traffic-{os.getpid()}.jsonl",
+        f"traffic-{os.getpid()}.jsonl.1",
+        f"traffic-{os.getpid()}.jsonl.2",
+    ]
+
+
+def test_samples_nothing_at_zero_rate(tmp_path):
+    with _client(tmp_path, capture_sample_rate=0) as client:
+        client.get("/health/live")
+
+    assert os.path.getsize(tmp_path / "captures" / f"traffic-{os.getpid()}.jsonl") == 0
@@ -0,0 +1,68 @@
+import bson
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app import consistency
+from app.middleware.consistency import CausalConsistencyMiddleware
+
+
+async def _read(request):
+    token = consistency.current()
+    return JSONResponse(
+        {"operation_time": token.operation_time.time if token.operation_time else None}
+    )
+
+
+async def _write(request):
+    consistency.current().advance(
+        {"clusterTime": bson.Timestamp(100, 1), "signature": {"hash": b"", "keyId": 0}},
+        bson.Timestamp(100, 1),
+    )
+    return JSONResponse({})
+
+
+def _client() -> TestClient:
+    app = Starlette(
+        routes=[Route("/read", _read), Route("/write", _write, methods=["POST"])]
+    )
+    app.add_middleware(CausalConsistencyMiddleware)
+    return TestClient(app)
+
+
+def test_token_round_trip():
+    client = _client()
+
+    read = client.get("/read")
+    assert read.json() == {"operation_time": None}
+    assert "x-consistency-token" not in read.headers
+
+    write = client.post("/write")
+    token = write.headers["x-consistency-token"]
+
+    read = client.get("/read", headers={"X-Consistency-Token": token})
+    assert read.json() == {"operation_time": 100}
+    # Reads don't advance the token, there is nothing new to send back
+    assert "x-consistency-token" not in read.headers
+
+
+def test_older_times_do_not_move_token_back():
+    token = consistency.CausalToken(
+        cluster_time={"clusterTime": bson.Timestamp(100, 1)},
+        operation_time=bson.Timestamp(100, 1),
+    )
+    token.advance({"clusterTime": bson.Timestamp(50, 1)}, bson.Timestamp(50, 1))
+    assert token.operation_time == bson.Timestamp(100, 1)
+    assert not token.advanced
+
+    decoded = consistency.CausalToken.decode(token.encode())
+    assert decoded.cluster_time == token.cluster_time
+    assert decoded.operation_time == token.operation_time
+
+
+def test_invalid_token_ignored():
+    assert consistency.CausalToken.decode("not a token") is None
+    read = _client().get("/read", headers={"X-Consistency-Token": "not a token"})
+    assert read.status_code == 200
+    assert read.json() == {"operation_time": None}
@@ -0,0 +1,88 @@
+import asyncio
+from functools import partial
+
+import pytest
+
+from app import deadline
+from app.handlers.handler_dependencies import movie_repository
+from app.middleware.deadline import DeadlineMiddleware
+from app.repository.movie.abstractions import RepositoryDeadlineExceededException
+from app.repository.movie.memory import MemoryMovieRepository
+from app.repository.movie.mongo import MongoMovieRepository
+
+# noinspection PyUnresolvedReferences
+from app.tests.fixtures import test_client
+
+
+class SlowMemoryMovieRepository(MemoryMovieRepository):
+    def __init__(self, delay_s: float):
+        super().__init__()
+        self.delay_s = delay_s
+        self.finished = False
+
+    async def get_by_id(self, movie_id: str):
+        await asyncio.sleep(self.delay_s)
+        self.finished = True
+        return await super().get_by_id(movie_id)
+
+
+def memory_movie_repository_dependency(repo: MemoryMovieRepository):
+    return repo
+
+
+@pytest.mark.parametrize(
+    "headers, expected_status_code",
+    [
+        pytest.param({"X-Request-Timeout": "50"}, 504, id="client deadline passed"),
+        pytest.param({"X-Request-Timeout": "5000"}, 404, id="client deadline met"),
+        pytest.param(
+            {"X-Request-Timeout": "invalid"}, 404, id="invalid header ignored"
+        ),
+    ],
+)
+def test_deadline(test_client, headers, expected_status_code):
+    # Setup
+    repo = SlowMemoryMovieRepository(delay_s=0.2)
+    patched_dependency = partial(memory_movie_repository_dependency, repo)
+
+    test_client.app.dependency_overrides[movie_repository] = patched_dependency
+
+    # Test
+    result = test_client.get("/api/v1/movie/valid_ID1", headers=headers)
+
+    # Assert
+    assert result.status_code == expected_status_code
+    # The expired request was cancelled instead of running to completion
+    assert repo.finished is (expected_status_code != 504)
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_skips_mongo():
+    repo = MongoMovieRepository(
+        connection_string="mongodb://localhost:1",
+        database="unused",
+        server_selection_timeout_ms=60000,
+    )
+    token = deadline.set_deadline(0)
+    try:
+        with pytest.raises(RepositoryDeadlineExceededException):
+            await repo.get_by_id("valid_ID1")
+    finally:
+        deadline.reset_deadline(token)
+
+
+@pytest.mark.asyncio
+async def test_app_timeout_not_deadline():
+    async def app(scope, receive, send):
+        # A timeout of the app's own, for instance of an HTTP client
+        raise TimeoutError("read timed out")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = DeadlineMiddleware(app, default_timeout_ms=5000)
+    with pytest.raises(TimeoutError):
+        await middleware({"type": "http", "headers": []}, None, send)
+    assert sent == []
@@ -0,0 +1,63 @@
+from starlette.testclient import TestClient
+
+from app import server_timing
+from app.tests.fixtures import memory_app_client
+
+
+def _phases(header: str) -> dict[str, float]:
+    phases = {}
+    for entry in header.split(", "):
+        name, duration = entry.split(";dur=")
+        phases[name] = float(duration)
+    return phases
+
+
+def _client(**settings) -> TestClient:
+    client = memory_app_client(**settings)
+    client.post(
+        "/api/v1/movie/",
+        json={
+            "title": "Dune",
+            "description": "Sand",
+            "release_year": 2021,
+            "watched": False,
+        },
+    )
+    return client
+
+
+def test_header_only_when_requested():
+    client = _client()
+
+    assert "server-timing" not in client.get("/api/v1/movie/").headers
+
+    result = client.get("/api/v1/movie/", headers={"X-Server-Timing": "1"})
+    assert result.status_code == 200
+    phases = _phases(result.headers["server-timing"])
+    assert list(phases) == [
+        "deps",
+        "pagination_params",
+        "repository",
+        "conversion",
+        "handler",
+        "serialization",
+        "total",
+    ]
+    assert phases["total"] >= phases["deps"] + phases["handler"]
+
+
+def test_header_on_every_response_when_enabled():
+    client = _client(server_timing_enabled=True)
+
+    phases = _phases(client.get("/api/v1/movie/").headers["server-timing"])
+    assert {"deps", "repository", "handler", "serialization", "total"} <= phases.keys()
+    # Routes outside the versioned API only get the total
+    assert list(_phases(client.get("/health/live").headers["server-timing"])) == [
+        "total"
+    ]
+
+
+def test_phase_outside_request_is_noop():
+    with server_timing.phase("repository"):
+        pass
+    assert server_timing.current() is None
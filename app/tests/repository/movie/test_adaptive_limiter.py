@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+import pytest
+from pydantic import ValidationError
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.config import Settings
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import RepositoryUnavailableException
+from app.repository.movie.adaptive_limiter import (
+    AdaptiveConcurrencyLimiter,
+    AdaptiveLimitMovieRepository,
+    AIMDLimit,
+    GradientLimit,
+)
+from app.repository.movie.memory import MemoryMovieRepository
+
+
+class SlowMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository with injected latency that behaves like a backend serving
+    `capacity` calls at once: beyond that, calls queue and latency grows linearly."""
+
+    def __init__(self, capacity: int, base_latency_s: float):
+        super().__init__()
+        self.capacity = capacity
+        self.base_latency_s = base_latency_s
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail = False
+
+    def latency(self, in_flight: int) -> float:
+        return self.base_latency_s * max(1.0, in_flight / self.capacity)
+
+    async def get_by_id(self, movie_id: str):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency(self.in_flight))
+            if self.fail:
+                raise ServerSelectionTimeoutError("unreachable")
+            return await super().get_by_id(movie_id)
+        finally:
+            self.in_flight -= 1
+
+
+async def _drive(repo, clients: int, duration_s: float) -> tuple[int, int]:
+    """Runs `clients` callers in a closed loop, returns (served, rejected)."""
+
+    served = rejected = 0
+    deadline = time.monotonic() + duration_s
+
+    async def client():
+        nonlocal served, rejected
+        while time.monotonic() < deadline:
+            try:
+                await repo.get_by_id("my-id")
+                served += 1
+            except RepositoryUnavailableException:
+                rejected += 1
+                await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return served, rejected
+
+
+@pytest.mark.parametrize("algorithm", [AIMDLimit, GradientLimit])
+def test_limit_converges_in_simulation(algorithm):
+    """Steps the algorithm against the latency model of SlowMemoryMovieRepository."""
+
+    backend = SlowMemoryMovieRepository(capacity=10, base_latency_s=0.002)
+    limit = algorithm(initial_limit=2, max_limit=200)
+    for _ in range(3000):
+        in_flight = int(limit.limit)
+        limit.update(backend.latency(in_flight), in_flight, dropped=False)
+    # Settles where latency degrades past the tolerance, far below the max
+    assert backend.capacity <= limit.limit <= backend.capacity * 3
+
+    # The backend gets four times slower per call beyond two: the limit follows it down
+    backend.capacity = 2
+    for _ in range(3000):
+        in_flight = int(limit.limit)
+        limit.update(backend.latency(in_flight), in_flight, dropped=False)
+    assert limit.limit <= 2 * 3
+
+
+@pytest.mark.parametrize("algorithm", [AIMDLimit, GradientLimit])
+def test_limit_backs_off_on_failures(algorithm):
+    limit = algorithm(initial_limit=50)
+    for _ in range(100):
+        limit.update(0.002, 50, dropped=True)
+    assert limit.limit < 5
+
+
+@pytest.mark.parametrize("algorithm", [AIMDLimit, GradientLimit])
+def test_limit_recovers_from_unusually_fast_sample(algorithm):
+    limit = algorithm(initial_limit=20, probe_interval=100)
+    # A window of calls averaging to 0 with a coarse clock
+    limit.update(0.0, 20, dropped=False)
+    for _ in range(100):
+        limit.update(0.002, int(limit.limit), dropped=False)
+    assert limit.limit < 5
+
+    # Measured again after the probe, the limit grows back under load
+    for _ in range(99):
+        limit.update(0.002, int(limit.limit), dropped=False)
+    assert limit.limit > 20
+
+
+def test_limit_does_not_grow_when_idle():
+    limit = GradientLimit(initial_limit=20)
+    for _ in range(100):
+        limit.update(0.002, 1, dropped=False)
+    assert limit.limit == 20
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", [AIMDLimit, GradientLimit])
+async def test_repository_under_overload(algorithm):
+    backend = SlowMemoryMovieRepository(capacity=10, base_latency_s=0.005)
+    await backend.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+    limiter = AdaptiveConcurrencyLimiter(
+        algorithm(initial_limit=2, max_limit=200), name="test"
+    )
+    repo = AdaptiveLimitMovieRepository(backend, limiter=limiter)
+
+    served, rejected = await _drive(repo, clients=100, duration_s=1.0)
+
+    assert served > 0
+    assert rejected > 0
+    # 100 callers, but the backend never sees much more than what it can serve
+    assert backend.capacity <= limiter.limit <= backend.capacity * 4
+    assert backend.max_in_flight <= backend.capacity * 5
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_failures_shrink_limit():
+    backend = SlowMemoryMovieRepository(capacity=10, base_latency_s=0.001)
+    backend.fail = True
+    limiter = AdaptiveConcurrencyLimiter(AIMDLimit(initial_limit=5), name="test")
+    repo = AdaptiveLimitMovieRepository(backend, limiter=limiter)
+
+    for _ in range(20):
+        with pytest.raises(ServerSelectionTimeoutError):
+            await repo.get_by_id("my-id")
+    assert limiter.limit < 5
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_rejects_beyond_limit():
+    backend = SlowMemoryMovieRepository(capacity=10, base_latency_s=0.05)
+    limiter = AdaptiveConcurrencyLimiter(AIMDLimit(initial_limit=1), name="test")
+    repo = AdaptiveLimitMovieRepository(backend, limiter=limiter)
+
+    pending = asyncio.create_task(repo.get_by_id("my-id"))
+    await asyncio.sleep(0)
+    with pytest.raises(RepositoryUnavailableException) as e:
+        await repo.get_by_id("my-id")
+    assert e.value.retry_after == 1
+    # Ping bypasses the limiter, so health probes still reach the backend
+    await repo.ping()
+
+    assert await pending is None
+    assert limiter.in_flight == 0
+
+
+def test_unknown_algorithm_rejected():
+    with pytest.raises(ValidationError):
+        Settings(
+            mongo_connection_string="mongodb://unused",
+            mongo_database_name="unused",
+            server_selection_timeout_ms=1,
+            adaptive_concurrency_algorithm="vegas",
+        )
@@ -0,0 +1,187 @@
+import asyncio
+
+import bson
+import pytest
+from prometheus_client import REGISTRY
+
+from app import consistency
+from app.entities.movie import Movie
+from app.repository.movie.cached import CachedMovieRepository, cache_key
+from app.repository.movie.memory import MemoryMovieRepository
+
+
+class CountingMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository counting the searches that reach it."""
+
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+
+    async def get_by_fields(self, *args, **kwargs):
+        self.searches += 1
+        return await super().get_by_fields(*args, **kwargs)
+
+
+class CausalMemoryMovieRepository(CountingMemoryMovieRepository):
+    """Counting repository whose reads advance the causal token to `operation_time`."""
+
+    def __init__(self):
+        super().__init__()
+        self.operation_time = bson.Timestamp(1, 0)
+
+    async def get_by_fields(self, *args, **kwargs):
+        token = consistency.current()
+        if token is not None:
+            token.advance(None, self.operation_time)
+        return await super().get_by_fields(*args, **kwargs)
+
+
+def _lookups(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "movie_repository_cache_requests_total", {"result": result}
+        )
+        or 0
+    )
+
+
+def _movie(
+    movie_id: str, release_year: int = 1999, description: str = "test description"
+) -> Movie:
+    return Movie(
+        id=movie_id,
+        title="test movie",
+        description=description,
+        release_year=release_year,
+    )
+
+
+def test_cache_key_normalized():
+    assert cache_key(release_year=1999, watched=False) == cache_key(
+        watched=False, release_year=1999, title=None
+    )
+    assert cache_key(release_year=1999) != cache_key(release_year=1999, skip=10)
+
+
+@pytest.mark.asyncio
+async def test_hits_until_write():
+    backend = CountingMemoryMovieRepository()
+    repo = CachedMovieRepository(backend)
+    await repo.create(_movie("first"))
+    hits, misses = _lookups("hit"), _lookups("miss")
+
+    assert (await repo.get_by_fields(release_year=1999))[1] == 1
+    assert (await repo.get_by_fields(release_year=1999))[1] == 1
+    assert backend.searches == 1
+    assert _lookups("hit") == hits + 1
+    assert _lookups("miss") == misses + 1
+
+    await repo.create(_movie("second"))
+    movies, total_count = await repo.get_by_fields(release_year=1999)
+    assert total_count == 2
+    assert {movie.id for movie in movies} == {"first", "second"}
+    assert backend.searches == 2
+
+
+@pytest.mark.asyncio
+async def test_read_during_write_not_cached():
+    backend = CountingMemoryMovieRepository()
+    repo = CachedMovieRepository(backend)
+    await repo.create(_movie("first"))
+
+    async def slow_create(movie: Movie):
+        await asyncio.sleep(0.02)
+        await MemoryMovieRepository.create(backend, movie)
+
+    backend.create = slow_create
+    write = asyncio.create_task(repo.create(_movie("second")))
+    await asyncio.sleep(0)
+    await repo.get_by_fields()
+    await write
+
+    assert (await repo.get_by_fields())[1] == 2
+    assert backend.searches == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_served_while_refreshed():
+    backend = CountingMemoryMovieRepository()
+    repo = CachedMovieRepository(backend, ttl_s=0.01, stale_s=10)
+    await repo.create(_movie("first"))
+    await repo.get_by_fields()
+    # A write through another worker, which this cache doesn't see
+    await backend.create(_movie("second"))
+    await asyncio.sleep(0.02)
+    stale = _lookups("stale")
+
+    assert (await repo.get_by_fields())[1] == 1
+    assert (await repo.get_by_fields())[1] == 1
+    assert _lookups("stale") == stale + 2
+    await asyncio.sleep(0.01)
+
+    assert backend.searches == 2
+    assert (await repo.get_by_fields())[1] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_missed():
+    backend = CountingMemoryMovieRepository()
+    repo = CachedMovieRepository(backend, ttl_s=0.01, stale_s=0)
+    await repo.get_by_fields()
+    await asyncio.sleep(0.02)
+    await repo.get_by_fields()
+    assert backend.searches == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_budget():
+    backend = CountingMemoryMovieRepository()
+    for year in range(1990, 2000):
+        await backend.create(
+            _movie(str(year), release_year=year, description="x" * 1000)
+        )
+    repo = CachedMovieRepository(backend, max_bytes=5000)
+
+    for year in range(1990, 2000):
+        await repo.get_by_fields(release_year=year)
+    assert 0 < repo.size <= 5000
+
+    searches = backend.searches
+    await repo.get_by_fields(release_year=1999)
+    assert backend.searches == searches
+    await repo.get_by_fields(release_year=1990)
+    assert backend.searches == searches + 1
+
+
+@pytest.mark.asyncio
+async def test_causal_token_newer_than_entry_missed():
+    backend = CausalMemoryMovieRepository()
+    repo = CachedMovieRepository(backend)
+    await repo.create(_movie("first"))
+    await repo.get_by_fields()
+
+    # A write through another worker, the client's token is from after it
+    await backend.create(_movie("second"))
+    backend.operation_time = bson.Timestamp(2, 0)
+    token = consistency.CausalToken(operation_time=bson.Timestamp(2, 0))
+    context_token = consistency.set_token(token)
+    try:
+        assert (await repo.get_by_fields())[1] == 2
+        assert backend.searches == 2
+        # The entry it stored is recent enough for the same token
+        assert (await repo.get_by_fields())[1] == 2
+        assert backend.searches == 2
+    finally:
+        consistency.reset_token(context_token)
+
+    # A request with an empty token is served the entry, which moves the token to
+    # the entry's time
+    token = consistency.CausalToken()
+    context_token = consistency.set_token(token)
+    try:
+        assert (await repo.get_by_fields())[1] == 2
+        assert backend.searches == 2
+        assert token.operation_time == bson.Timestamp(2, 0)
+        assert token.advanced
+    finally:
+        consistency.reset_token(context_token)
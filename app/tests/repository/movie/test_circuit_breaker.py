@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import (
+    RepositoryException,
+    RepositoryUnavailableException,
+)
+from app.repository.movie.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerMovieRepository,
+)
+from app.repository.movie.memory import MemoryMovieRepository
+
+
+class UnreachableMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository that fails like an unreachable MongoDB while `down` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+        self.calls = 0
+
+    async def ping(self):
+        if self.down:
+            raise ServerSelectionTimeoutError("unreachable")
+
+    async def get_by_id(self, movie_id: str):
+        self.calls += 1
+        await self.ping()
+        return await super().get_by_id(movie_id)
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers():
+    backend = UnreachableMemoryMovieRepository()
+    breaker = CircuitBreaker(
+        probe=backend.ping, failure_threshold=2, probe_interval_s=0.01, name="test"
+    )
+    repo = CircuitBreakerMovieRepository(backend, breaker=breaker)
+    await backend.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    backend.down = True
+    for _ in range(2):
+        with pytest.raises(ServerSelectionTimeoutError):
+            await repo.get_by_id("my-id")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Open circuit fails without reaching the backend
+    with pytest.raises(RepositoryUnavailableException) as e:
+        await repo.get_by_id("my-id")
+    assert e.value.retry_after >= 1
+    assert backend.calls == 2
+
+    backend.down = False
+    await asyncio.sleep(0.05)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert (await repo.get_by_id("my-id")).id == "my-id"
+    assert breaker.state == CircuitBreaker.CLOSED
+    await breaker.close()
+
+
+@pytest.mark.asyncio
+async def test_half_open_failure_reopens():
+    backend = UnreachableMemoryMovieRepository()
+    breaker = CircuitBreaker(
+        probe=backend.ping, failure_threshold=1, probe_interval_s=0.01, name="test"
+    )
+    repo = CircuitBreakerMovieRepository(backend, breaker=breaker)
+
+    backend.down = True
+    with pytest.raises(ServerSelectionTimeoutError):
+        await repo.get_by_id("my-id")
+    backend.down = False
+    await asyncio.sleep(0.05)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    backend.down = True
+    with pytest.raises(ServerSelectionTimeoutError):
+        await repo.get_by_id("my-id")
+    assert breaker.state == CircuitBreaker.OPEN
+    await breaker.close()
+
+
+@pytest.mark.asyncio
+async def test_other_errors_keep_failure_streak():
+    backend = UnreachableMemoryMovieRepository()
+    breaker = CircuitBreaker(
+        probe=backend.ping, failure_threshold=2, probe_interval_s=10, name="test"
+    )
+    repo = CircuitBreakerMovieRepository(backend, breaker=breaker)
+    await backend.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    backend.down = True
+    with pytest.raises(ServerSelectionTimeoutError):
+        await repo.get_by_id("my-id")
+    with pytest.raises(RepositoryException):
+        await repo.update("my-id", {"id": "other-id"})
+    with pytest.raises(ServerSelectionTimeoutError):
+        await repo.get_by_id("my-id")
+    assert breaker.state == CircuitBreaker.OPEN
+    await breaker.close()
@@ -0,0 +1,43 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import RepositoryException
+from app.repository.movie.instrumented import InstrumentedMovieRepository
+from app.repository.movie.memory import MemoryMovieRepository
+
+
+def _count(operation: str, outcome: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "movie_repository_operation_duration_seconds_count",
+            {"operation": operation, "backend": "test", "outcome": outcome},
+        )
+        or 0
+    )
+
+
+@pytest.mark.asyncio
+async def test_operations_observed():
+    repo = InstrumentedMovieRepository(MemoryMovieRepository(), backend="test")
+    creates, gets, failed_updates = (
+        _count("create", "success"),
+        _count("get_by_id", "success"),
+        _count("update", "error"),
+    )
+
+    await repo.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+    assert (await repo.get_by_id("my-id")).id == "my-id"
+    with pytest.raises(RepositoryException):
+        await repo.update("my-id", {"id": "other-id"})
+
+    assert _count("create", "success") == creates + 1
+    assert _count("get_by_id", "success") == gets + 1
+    assert _count("update", "error") == failed_updates + 1
@@ -1,7 +1,10 @@
 import pytest
 
 from app.entities.movie import Movie
-from app.repository.movie.abstractions import RepositoryException
+from app.repository.movie.abstractions import (
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+)
 
 # noinspection PyUnresolvedReferences
 from app.tests.fixtures import memory_movie_repo_fixture
@@ -132,8 +135,9 @@ async def test_get_by_fields(
     for movie in movies_seed:
         await memory_movie_repo_fixture.create(movie)
     # noinspection PyTypeChecker
-    movie = await memory_movie_repo_fixture.get_by_fields(title=movie_title)
-    assert movie == expected_result
+    movies, count = await memory_movie_repo_fixture.get_by_fields(title=movie_title)
+    assert movies == expected_result
+    assert count == len(expected_result)
 
 
 # noinspection DuplicatedCode
@@ -262,10 +266,11 @@ async def test_get_by_title_pagination(
 ):
     for movie in movies_seed:
         await memory_movie_repo_fixture.create(movie)
-    movie = await memory_movie_repo_fixture.get_by_fields(
+    movies, count = await memory_movie_repo_fixture.get_by_fields(
         title=movie_title, skip=skip, limit=limit
     )
-    assert movie == expected_result
+    assert movies == expected_result
+    assert count == len(movies_seed)
 
 
 @pytest.mark.asyncio
@@ -315,6 +320,119 @@ async def test_update_negative(memory_movie_repo_fixture):
         )
 
 
+@pytest.mark.asyncio
+async def test_update_and_get(memory_movie_repo_fixture):
+    await memory_movie_repo_fixture.create(
+        Movie(
+            id="my-id10",
+            title="test_title",
+            description="test description",
+            release_year=1999,
+        )
+    )
+    movie = await memory_movie_repo_fixture.update_and_get(
+        movie_id="my-id10", update_parameters={"watched": True}
+    )
+    assert movie == Movie(
+        id="my-id10",
+        title="test_title",
+        description="test description",
+        release_year=1999,
+        watched=True,
+    )
+
+    with pytest.raises(RepositoryMovieNotFoundException):
+        await memory_movie_repo_fixture.update_and_get(
+            movie_id="my_id10", update_parameters={"watched": True}
+        )
+
+
+@pytest.mark.parametrize(
+    "search_parameters, update_parameters, expected_counts, expected_watched",
+    [
+        pytest.param(
+            {"release_year": 1999},
+            {"watched": True},
+            (2, 1),
+            {"my-id11": True, "my-id12": True, "my-id13": False},
+            id="matched and modified differ",
+        ),
+        pytest.param(
+            {},
+            {"watched": False},
+            (3, 1),
+            {"my-id11": False, "my-id12": False, "my-id13": False},
+            id="no search parameters",
+        ),
+        pytest.param(
+            {"title": "other_title"},
+            {"watched": True},
+            (0, 0),
+            {"my-id11": False, "my-id12": True, "my-id13": False},
+            id="nothing matched",
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_update_by_fields(
+    memory_movie_repo_fixture,
+    search_parameters,
+    update_parameters,
+    expected_counts,
+    expected_watched,
+):
+    for movie_id, release_year, watched in [
+        ("my-id11", 1999, False),
+        ("my-id12", 1999, True),
+        ("my-id13", 2000, False),
+    ]:
+        await memory_movie_repo_fixture.create(
+            Movie(
+                id=movie_id,
+                title="test_title",
+                description="test description",
+                release_year=release_year,
+                watched=watched,
+            )
+        )
+
+    counts = await memory_movie_repo_fixture.update_by_fields(
+        update_parameters=update_parameters, **search_parameters
+    )
+
+    assert counts == expected_counts
+    for movie_id, watched in expected_watched.items():
+        assert (await memory_movie_repo_fixture.get_by_id(movie_id)).watched is watched
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_max_matched(memory_movie_repo_fixture):
+    for movie_id in ["my-id14", "my-id15"]:
+        await memory_movie_repo_fixture.create(
+            Movie(
+                id=movie_id,
+                title="test_title",
+                description="test description",
+                release_year=1999,
+            )
+        )
+
+    with pytest.raises(RepositoryException):
+        await memory_movie_repo_fixture.update_by_fields(
+            update_parameters={"watched": True}, max_matched=1
+        )
+    with pytest.raises(RepositoryException):
+        await memory_movie_repo_fixture.delete_by_fields(max_matched=1)
+
+    assert (
+        await memory_movie_repo_fixture.delete_by_fields(
+            release_year=1999, max_matched=2
+        )
+        == 2
+    )
+    assert await memory_movie_repo_fixture.get_by_fields() == ([], 0)
+
+
 @pytest.mark.asyncio
 async def test_delete(memory_movie_repo_fixture):
     await memory_movie_repo_fixture.create(
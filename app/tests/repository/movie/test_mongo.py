@@ -1,13 +1,24 @@
 import secrets
-from typing import List
 
 import pytest
+from pydantic import ValidationError
+from pymongo import ReadPreference, WriteConcern
 
+from app import consistency
+from app.config import Settings
 from app.entities.movie import Movie
-from app.repository.movie.abstractions import RepositoryException
+from app.repository.movie.abstractions import (
+    RepositoryException,
+    RepositoryMovieNotFoundException,
+)
+from app.repository.movie.migration import migrate_to_primary_key_layout
+from app.repository.movie.mongo import MongoMovieRepository, _summarize_explain
 
 # noinspection PyUnresolvedReferences
-from app.tests.fixtures import mongo_movie_repo_fixture
+from app.tests.fixtures import (
+    mongo_movie_repo_fixture,
+    mongo_primary_key_movie_repo_fixture,
+)
 
 
 @pytest.mark.asyncio
@@ -337,3 +348,241 @@ async def test_delete(mongo_movie_repo_fixture):
 @pytest.mark.asyncio
 async def test_delete_not_found(mongo_movie_repo_fixture):
     assert await mongo_movie_repo_fixture.delete(secrets.token_hex(10)) is None
+
+
+@pytest.mark.asyncio
+async def test_create_primary_key_layout(mongo_primary_key_movie_repo_fixture):
+    movie = Movie(
+        id="pk movie",
+        title="some title",
+        description="some desc",
+        release_year=1995,
+        watched=False,
+    )
+    await mongo_primary_key_movie_repo_fixture.create(movie)
+
+    # noinspection PyProtectedMember
+    document = await mongo_primary_key_movie_repo_fixture._movies.find_one(
+        {"_id": "pk movie"}
+    )
+    assert "id" not in document
+    assert await mongo_primary_key_movie_repo_fixture.get_by_id("pk movie") == movie
+
+
+@pytest.mark.asyncio
+async def test_migrate_to_primary_key_layout(mongo_primary_key_movie_repo_fixture):
+    # noinspection PyProtectedMember
+    collection = mongo_primary_key_movie_repo_fixture._movies
+    await collection.insert_many(
+        [
+            {
+                "id": f"legacy {index}",
+                "title": "legacy title",
+                "description": "legacy desc",
+                "release_year": 1990 + index,
+                "watched": False,
+            }
+            for index in range(5)
+        ]
+    )
+
+    # Legacy documents stay reachable through the fallback during the migration
+    await mongo_primary_key_movie_repo_fixture.update(
+        movie_id="legacy 0", update_parameters={"watched": True}
+    )
+
+    assert await migrate_to_primary_key_layout(collection, batch_size=2) == 5
+    assert await collection.count_documents({"id": {"$exists": True}}) == 0
+    assert await mongo_primary_key_movie_repo_fixture.get_by_id("legacy 0") == Movie(
+        id="legacy 0",
+        title="legacy title",
+        description="legacy desc",
+        release_year=1990,
+        watched=True,
+    )
+    movies, count = await mongo_primary_key_movie_repo_fixture.get_by_fields(
+        title="legacy title"
+    )
+    assert count == 5
+
+    # Resuming a finished migration is a no-op
+    assert await migrate_to_primary_key_layout(collection) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_by_fields_mid_migration(mongo_primary_key_movie_repo_fixture):
+    # noinspection PyProtectedMember
+    collection = mongo_primary_key_movie_repo_fixture._movies
+    document = {
+        "title": "mid migration",
+        "description": "desc",
+        "release_year": 1990,
+        "watched": False,
+    }
+    # Copied to the primary key layout, the legacy document not deleted yet
+    await collection.insert_one({**document, "id": "copied"})
+    await collection.insert_one({**document, "_id": "copied"})
+    await collection.insert_one({**document, "id": "legacy only"})
+
+    movies, count = await mongo_primary_key_movie_repo_fixture.get_by_fields(
+        title="mid migration"
+    )
+    assert count == 2
+    assert sorted(movie.id for movie in movies) == ["copied", "legacy only"]
+
+
+@pytest.mark.asyncio
+async def test_update_and_get(mongo_movie_repo_fixture):
+    await mongo_movie_repo_fixture.create(
+        Movie(
+            id="some id",
+            title="some title",
+            description="second desc",
+            release_year=1992,
+            watched=False,
+        )
+    )
+    movie = await mongo_movie_repo_fixture.update_and_get(
+        movie_id="some id", update_parameters={"watched": True}
+    )
+    assert movie == Movie(
+        id="some id",
+        title="some title",
+        description="second desc",
+        release_year=1992,
+        watched=True,
+    )
+
+    with pytest.raises(RepositoryMovieNotFoundException):
+        await mongo_movie_repo_fixture.update_and_get(
+            movie_id=secrets.token_hex(10), update_parameters={"watched": True}
+        )
+
+
+def test_max_staleness_rejected_with_primary_reads():
+    settings = dict(
+        mongo_connection_string="mongodb://unused",
+        mongo_database_name="unused",
+        server_selection_timeout_ms=1,
+        mongo_read_max_staleness_s=120,
+    )
+
+    with pytest.raises(ValidationError):
+        Settings(**settings)
+    assert (
+        Settings(**settings, mongo_read_preference="nearest").mongo_read_max_staleness_s
+        == 120
+    )
+
+
+def test_read_and_write_profiles():
+    repo = MongoMovieRepository(
+        connection_string="mongodb://localhost:27017",
+        database=secrets.token_hex(5),
+        server_selection_timeout_ms=100,
+        read_preference="secondaryPreferred",
+        read_max_staleness_s=120,
+        read_max_pool_size=20,
+        write_concerns={"default": {"w": "majority"}, "update_watched": {"w": 1}},
+    )
+
+    assert repo._read_client is not repo._client
+    assert (
+        repo._read_movies.read_preference
+        == ReadPreference.SECONDARY_PREFERRED.__class__(max_staleness=120)
+    )
+    assert repo._movies.read_preference == ReadPreference.PRIMARY
+    assert repo._writes("update_watched").write_concern == WriteConcern(w=1)
+    assert repo._writes(
+        repo._update_operation({"watched": True})
+    ).write_concern == WriteConcern(w=1)
+    assert repo._writes(
+        repo._update_operation({"watched": True, "title": "x"})
+    ).write_concern == WriteConcern(w="majority")
+
+    with pytest.raises(ValueError):
+        MongoMovieRepository(
+            connection_string="mongodb://localhost:27017",
+            database=secrets.token_hex(5),
+            server_selection_timeout_ms=100,
+            write_concerns={"upsert": {"w": 1}},
+        )
+
+
+@pytest.mark.asyncio
+async def test_causal_consistency_sessions(mongo_movie_repo_fixture):
+    mongo_movie_repo_fixture._causal_consistency = True
+    token = consistency.CausalToken()
+    context_token = consistency.set_token(token)
+    try:
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                id="my-id",
+                title="some title",
+                description="some desc",
+                release_year=1995,
+            )
+        )
+        # A standalone server reports no operation time, a replica set does
+        assert (await mongo_movie_repo_fixture.get_by_id("my-id")).id == "my-id"
+    finally:
+        consistency.reset_token(context_token)
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_max_matched(mongo_movie_repo_fixture):
+    for movie_id in ["bulk 1", "bulk 2"]:
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                id=movie_id,
+                title="bulk title",
+                description="bulk desc",
+                release_year=1999,
+            )
+        )
+
+    with pytest.raises(RepositoryException):
+        await mongo_movie_repo_fixture.update_by_fields(
+            update_parameters={"watched": True}, title="bulk title", max_matched=1
+        )
+    assert await mongo_movie_repo_fixture.update_by_fields(
+        update_parameters={"watched": True}, title="bulk title", max_matched=2
+    ) == (2, 2)
+    assert await mongo_movie_repo_fixture.update_by_fields(
+        update_parameters={}, title="bulk title", max_matched=2
+    ) == (2, 0)
+    assert (
+        await mongo_movie_repo_fixture.delete_by_fields(
+            title="bulk title", max_matched=2
+        )
+        == 2
+    )
+    assert await mongo_movie_repo_fixture.get_by_fields(title="bulk title") == ([], 0)
+
+
+def test_summarize_explain():
+    explain = {
+        "queryPlanner": {
+            "parsedQuery": {"title": {"$eq": "secret"}},
+            "winningPlan": {
+                "stage": "FETCH",
+                "inputStage": {"stage": "IXSCAN", "indexName": "title_1"},
+            },
+        },
+        "executionStats": {
+            "nReturned": 3,
+            "executionTimeMillis": 2,
+            "totalKeysExamined": 3,
+            "totalDocsExamined": 3,
+        },
+    }
+
+    assert _summarize_explain(explain) == {
+        "stages": ["FETCH", "IXSCAN"],
+        "indexes": ["title_1"],
+        "collection_scan": False,
+        "docs_examined": 3,
+        "keys_examined": 3,
+        "returned": 3,
+        "execution_time_ms": 2,
+    }
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+from pymongo.monitoring import ConnectionCheckOutFailedReason
+
+from app.repository.movie.mongo_monitoring import (
+    CommandMetricsListener,
+    PoolMetricsListener,
+)
+
+ADDRESS = ("localhost", 27017)
+
+
+def _value(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_command_metrics():
+    listener = CommandMetricsListener("test-command")
+    labels = {"client": "test-command", "command": "find", "outcome": "success"}
+
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+    listener.failed(SimpleNamespace(command_name="find", duration_micros=500))
+
+    assert _value("mongo_command_duration_seconds_count", labels) == 1
+    assert _value("mongo_command_duration_seconds_sum", labels) == 0.0015
+    assert (
+        _value("mongo_command_duration_seconds_count", {**labels, "outcome": "failure"})
+        == 1
+    )
+
+
+def test_pool_metrics():
+    listener = PoolMetricsListener("test-pool")
+    address = {"client": "test-pool", "address": "localhost:27017"}
+    event = SimpleNamespace(address=ADDRESS)
+
+    listener.connection_created(event)
+    listener.connection_created(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+    assert _value("mongo_pool_connections", address) == 2
+    assert _value("mongo_pool_connections_in_use", address) == 1
+    assert (
+        _value(
+            "mongo_pool_checkout_wait_seconds_count",
+            {"client": "test-pool", "outcome": "success"},
+        )
+        == 1
+    )
+
+    listener.connection_checked_in(event)
+    listener.connection_closed(event)
+    assert _value("mongo_pool_connections", address) == 1
+    assert _value("mongo_pool_connections_in_use", address) == 0
+
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(
+        SimpleNamespace(address=ADDRESS, reason=ConnectionCheckOutFailedReason.TIMEOUT)
+    )
+    assert (
+        _value(
+            "mongo_pool_checkout_failures_total",
+            {"client": "test-pool", "reason": "timeout"},
+        )
+        == 1
+    )
+    assert (
+        _value(
+            "mongo_pool_checkout_wait_seconds_count",
+            {"client": "test-pool", "outcome": "failure"},
+        )
+        == 1
+    )
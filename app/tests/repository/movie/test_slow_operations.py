@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app import deadline
+from app.entities.movie import Movie
+from app.repository.movie.memory import MemoryMovieRepository
+from app.repository.movie.slow_operations import (
+    SlowOperationLog,
+    SlowOperationMovieRepository,
+    query_shape,
+)
+
+
+class ExplainingMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository with slow searches and a fake explain."""
+
+    def __init__(self):
+        super().__init__()
+        self.explained = []
+
+    async def get_by_fields(self, *args, **kwargs):
+        await asyncio.sleep(0.02)
+        return await super().get_by_fields(*args, **kwargs)
+
+    async def explain(self, operation: str, **kwargs):
+        self.explained.append((operation, kwargs, deadline.remaining()))
+        return {
+            "stages": ["COLLSCAN"],
+            "collection_scan": True,
+            "docs_examined": 1,
+            "returned": 1,
+        }
+
+
+@pytest.mark.parametrize(
+    "operation, kwargs, expected_shape",
+    [
+        pytest.param(
+            "get_by_fields",
+            {
+                "title": "secret",
+                "release_year": 1999,
+                "watched": None,
+                "skip": 0,
+                "limit": 10,
+            },
+            "get_by_fields {release_year: ?, title: ?} limit",
+            id="search",
+        ),
+        pytest.param(
+            "get_by_id", {"movie_id": "secret"}, "get_by_id {movie_id: ?}", id="by ID"
+        ),
+        pytest.param(
+            "delete_many",
+            {"movie_ids": ["a", "b"]},
+            "delete_many {movie_id: $in}",
+            id="many IDs",
+        ),
+        pytest.param("create", {"movie": object()}, "create {}", id="no filter"),
+    ],
+)
+def test_query_shape(operation, kwargs, expected_shape):
+    assert query_shape(operation, kwargs) == expected_shape
+
+
+@pytest.mark.asyncio
+async def test_slow_operations_recorded_and_explained():
+    backend = ExplainingMemoryMovieRepository()
+    log = SlowOperationLog()
+    repo = SlowOperationMovieRepository(
+        backend, log=log, threshold_s=0.01, explain_sample_rate=1
+    )
+    await repo.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+
+    token = deadline.set_deadline(5)
+    try:
+        await repo.get_by_fields(title="test movie", limit=10)
+        await repo.get_by_fields(title="other movie", limit=10)
+    finally:
+        deadline.reset_deadline(token)
+    await asyncio.sleep(0.01)
+
+    [stats] = log.top()
+    assert stats.shape == "get_by_fields {title: ?} limit"
+    assert stats.count == 2
+    assert stats.max_s >= 0.02
+    assert stats.plan["collection_scan"]
+    # The fast create isn't recorded, and the explain doesn't run under the request
+    # deadline
+    [(operation, kwargs, remaining)] = backend.explained[:1]
+    assert operation == "get_by_fields"
+    assert kwargs["title"] == "test movie"
+    assert kwargs["max_time_ms"] == 50
+    assert remaining is None
+
+
+def test_log_keeps_costliest_shapes():
+    log = SlowOperationLog(max_shapes=2)
+    log.record("get_by_id", "a", 1.0)
+    log.record("get_by_id", "b", 0.1)
+    log.record("get_by_id", "c", 0.5)
+
+    assert [stats.shape for stats in log.top()] == ["a", "c"]
@@ -0,0 +1,114 @@
+import inspect
+import os
+import tracemalloc
+
+import pytest
+
+from app.allocations import AllocationTracker
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import memory_app_client
+
+ADMIN = {"X-Admin-Token": "admin"}
+
+
+class LeakyMemoryMovieRepository(MemoryMovieRepository):
+    def __init__(self):
+        super().__init__()
+        self.retained = []
+
+    async def get_by_fields(self, *args, **kwargs):
+        self.retained.append(bytearray(100_000))
+        return await super().get_by_fields(*args, **kwargs)
+
+
+@pytest.fixture()
+def client():
+    yield memory_app_client(
+        LeakyMemoryMovieRepository(),
+        admin_token="admin",
+        allocation_tracking_enabled=True,
+    )
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_route_deltas_and_snapshot_diff(client):
+    # Nothing is recorded before tracing starts
+    client.get("/api/v1/movie/")
+    assert client.get("/debug/allocations", headers=ADMIN).json()["routes"] == []
+    assert client.post("/debug/allocations/snapshots", headers=ADMIN).status_code == 409
+
+    assert (
+        client.post(
+            "/debug/allocations/start", params={"frames": 5}, headers=ADMIN
+        ).status_code
+        == 204
+    )
+    start = client.post("/debug/allocations/snapshots", headers=ADMIN).json()["id"]
+    for _ in range(3):
+        client.get("/api/v1/movie/")
+
+    allocations = client.get("/debug/allocations", headers=ADMIN).json()
+    assert allocations["tracing"]
+    route = allocations["routes"][0]
+    assert route["route"] == "GET get_movie_by_fields"
+    assert route["requests"] == 3
+    assert route["mean_bytes"] >= 100_000
+
+    diff = client.get(
+        "/debug/allocations/diff", params={"start": start}, headers=ADMIN
+    ).json()
+    assert diff["start"] == start
+    top = diff["lines"][0]
+    assert top["file"].replace("\\", "/") == "app/tests/test_allocations.py"
+    assert top["size_diff_bytes"] >= 300_000
+    assert top["count_diff"] >= 3
+
+    assert client.post("/debug/allocations/stop", headers=ADMIN).status_code == 204
+    assert not tracemalloc.is_tracing()
+    assert (
+        client.get(
+            "/debug/allocations/diff", params={"start": 99}, headers=ADMIN
+        ).status_code
+        == 409
+    )
+    assert (
+        client.get(
+            "/debug/allocations/diff", params={"start": 99, "end": start}, headers=ADMIN
+        ).status_code
+        == 404
+    )
+
+
+def test_allocation_routes_need_tracking_enabled():
+    client = memory_app_client(admin_token="admin")
+
+    assert client.get("/debug/allocations", headers=ADMIN).status_code == 404
+    assert client.post("/debug/allocations/start").status_code == 403
+
+
+def _allocate(retained: list):
+    for _ in range(10):
+        retained.append(bytearray(10_000))
+
+
+@pytest.mark.asyncio
+async def test_snapshot_grouped_by_app_line():
+    tracker = AllocationTracker()
+    tracker.start(frames=5)
+    retained = []
+    try:
+        start = await tracker.snapshot()
+        _allocate(retained)
+        end = await tracker.snapshot()
+    finally:
+        tracker.stop()
+
+    line = inspect.getsourcelines(_allocate)[1] + 2
+    size, count = end.lines[
+        ("app/tests/test_allocations.py".replace("/", os.sep), line)
+    ]
+    assert size >= 100_000
+    assert count >= 10
+    assert end.traced_bytes - start.traced_bytes >= 100_000
+    assert list(tracker.snapshots) == [start.id, end.id]
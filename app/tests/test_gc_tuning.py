@@ -0,0 +1,82 @@
+import asyncio
+import gc
+
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from app import gc_tuning
+from app.api import create_app
+from app.tests.fixtures import app_settings
+
+
+@pytest.fixture()
+def restore_gc():
+    thresholds = gc.get_threshold()
+    yield
+    gc.set_threshold(*thresholds)
+    gc.unfreeze()
+
+
+def test_freeze_and_thresholds(restore_gc):
+    gc.set_threshold(700, 10, 10)
+    gc.unfreeze()
+    app = create_app(
+        settings=app_settings(
+            gc_freeze=True, gc_threshold_gen0=50_000, gc_threshold_gen2=20
+        )
+    )
+
+    assert gc.get_freeze_count() > 0
+    # Generation 1 keeps its threshold
+    assert gc.get_threshold() == (50_000, 10, 20)
+    # The versioned API's schema was built before freezing
+    versioned_apps = [
+        route.app
+        for route in app.routes
+        if isinstance(getattr(route, "app", None), FastAPI)
+    ]
+    assert versioned_apps
+    assert all(versioned.openapi_schema is not None for versioned in versioned_apps)
+
+
+def test_records_pauses_per_generation(restore_gc):
+    gc_tuning.record_pauses()
+    gc_tuning.record_pauses()
+    gc_tuning.export_pauses()
+    before = (
+        REGISTRY.get_sample_value("gc_pause_seconds_count", {"generation": "2"}) or 0
+    )
+
+    gc.collect()
+    # Observed only once exported, outside the collector callback
+    assert (
+        REGISTRY.get_sample_value("gc_pause_seconds_count", {"generation": "2"}) or 0
+    ) == before
+    gc_tuning.export_pauses()
+
+    assert (
+        REGISTRY.get_sample_value("gc_pause_seconds_count", {"generation": "2"})
+        == before + 1
+    )
+    assert gc.callbacks.count(gc_tuning._record_pause) == 1
+
+
+@pytest.mark.asyncio
+async def test_exporter_exports_periodically(restore_gc):
+    gc_tuning.record_pauses()
+    gc_tuning.export_pauses()
+    before = (
+        REGISTRY.get_sample_value("gc_pause_seconds_count", {"generation": "2"}) or 0
+    )
+    exporter = gc_tuning.PauseExporter(interval_s=0.01)
+    exporter.start()
+
+    gc.collect()
+    await asyncio.sleep(0.05)
+
+    assert (
+        REGISTRY.get_sample_value("gc_pause_seconds_count", {"generation": "2"})
+        == before + 1
+    )
+    await exporter.stop()
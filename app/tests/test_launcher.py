@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import launcher
+
+
+def _write(path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.mark.parametrize(
+    "files, expected_quota",
+    [
+        pytest.param({"cpu.max": "max 100000\n"}, None, id="v2 unlimited"),
+        pytest.param({"cpu.max": "250000 100000\n"}, 2.5, id="v2 limited"),
+        pytest.param(
+            {"cpu/cpu.cfs_quota_us": "-1\n", "cpu/cpu.cfs_period_us": "100000\n"},
+            None,
+            id="v1 unlimited",
+        ),
+        pytest.param(
+            {
+                "cpu,cpuacct/cpu.cfs_quota_us": "50000\n",
+                "cpu,cpuacct/cpu.cfs_period_us": "100000\n",
+            },
+            0.5,
+            id="v1 limited",
+        ),
+        pytest.param({}, None, id="no cgroup"),
+    ],
+)
+def test_cpu_quota(tmp_path, files, expected_quota):
+    for name, content in files.items():
+        _write(tmp_path / name, content)
+
+    assert launcher.cpu_quota(str(tmp_path)) == expected_quota
+
+
+def test_worker_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        launcher.os, "sched_getaffinity", lambda _: set(range(8)), raising=False
+    )
+
+    assert launcher.worker_count(str(tmp_path)) == 8
+
+    # A fractional quota still gets a worker for its last partial CPU
+    _write(tmp_path / "cpu.max", "250000 100000\n")
+    assert launcher.worker_count(str(tmp_path)) == 3
+
+    _write(tmp_path / "cpu.max", "10000 100000\n")
+    assert launcher.worker_count(str(tmp_path)) == 1
+
+
+_MULTIPROCESS_SCRIPT = """
+import json
+import multiprocessing
+import sys
+import types
+
+from app import launcher
+
+launcher.prepare_multiprocess_metrics(sys.argv[1])
+
+from starlette.testclient import TestClient
+
+from app.api import create_app
+from app.config import Settings
+from app.middleware.admission import ADMISSION_IN_FLIGHT
+from app.repository.movie.cached import CACHE_REQUESTS
+
+
+def worker():
+    ADMISSION_IN_FLIGHT.labels(budget="read").inc()
+    CACHE_REQUESTS.labels(result="hit").inc()
+
+
+def scrape(client):
+    samples = {}
+    for line in client.get("/api/v1/metrics").text.splitlines():
+        for name in (
+            'admission_in_flight_requests{budget="read"}',
+            'movie_repository_cache_requests_total{result="hit"}',
+        ):
+            if line.startswith(name + " "):
+                samples[name.split("{")[0]] = float(line.split()[1])
+    return samples
+
+
+context = multiprocessing.get_context("fork")
+processes = [context.Process(target=worker) for _ in range(2)]
+for process in processes:
+    process.start()
+    process.join()
+
+settings = Settings(
+    mongo_connection_string="mongodb://unused",
+    mongo_database_name="unused",
+    server_selection_timeout_ms=1,
+)
+client = TestClient(create_app(settings))
+scrapes = [scrape(client)]
+launcher._child_exit(None, types.SimpleNamespace(pid=processes[0].pid))
+scrapes.append(scrape(client))
+print(json.dumps(scrapes))
+"""
+
+
+def test_multiprocess_metrics(tmp_path):
+    (tmp_path / "counter_1.db").write_bytes(b"left by a previous run")
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    result = subprocess.run(
+        [sys.executable, "-c", _MULTIPROCESS_SCRIPT, str(tmp_path)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    before, after = json.loads(result.stdout.splitlines()[-1])
+    # Every worker's values are reported by a scrape of any of them
+    assert before == {
+        "admission_in_flight_requests": 2,
+        "movie_repository_cache_requests_total": 2,
+    }
+    # Exited workers no longer count towards live gauges, counters keep their increments
+    assert after == {
+        "admission_in_flight_requests": 1,
+        "movie_repository_cache_requests_total": 2,
+    }
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.api import create_app
+from app.entities.movie import Movie
+from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import app_settings
+
+
+class ClosingMemoryMovieRepository(MemoryMovieRepository):
+    """Memory repository with slow reads that records the shutdown calls."""
+
+    def __init__(self, delay_s: float):
+        super().__init__()
+        self.delay_s = delay_s
+        self.calls = []
+
+    async def get_by_id(self, movie_id: str):
+        await asyncio.sleep(self.delay_s)
+        self.calls.append("get_by_id")
+        return await super().get_by_id(movie_id)
+
+    async def flush(self):
+        self.calls.append("flush")
+
+    async def close(self):
+        self.calls.append("close")
+
+
+class Lifespan:
+    """Drives an ASGI app through the lifespan protocol."""
+
+    def __init__(self, app):
+        self.app = app
+        self.received = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        self.task = None
+
+    async def _send(self, message):
+        await self.sent.put(message)
+
+    async def startup(self):
+        self.task = asyncio.create_task(
+            self.app(
+                {"type": "lifespan", "asgi": {"version": "3.0"}},
+                self.received.get,
+                self._send,
+            )
+        )
+        await self.received.put({"type": "lifespan.startup"})
+        assert (await self.sent.get())["type"] == "lifespan.startup.complete"
+
+    async def shutdown(self):
+        await self.received.put({"type": "lifespan.shutdown"})
+
+    async def shutdown_complete(self):
+        assert (await self.sent.get())["type"] == "lifespan.shutdown.complete"
+        await self.task
+
+
+async def _request(app, method: str, path: str) -> tuple[int, dict]:
+    """Sends one HTTP request through ASGI, returns its status and JSON body."""
+
+    messages = []
+    disconnected = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        },
+        receive,
+        send,
+    )
+    disconnected.set()
+    status = next(
+        message["status"]
+        for message in messages
+        if message["type"] == "http.response.start"
+    )
+    body = b"".join(
+        message.get("body", b"")
+        for message in messages
+        if message["type"] == "http.response.body"
+    )
+    return status, json.loads(body) if body else None
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_in_flight_requests():
+    repo = ClosingMemoryMovieRepository(delay_s=0.2)
+    await repo.create(
+        Movie(
+            id="my-id",
+            title="test movie",
+            description="test description",
+            release_year=1999,
+        )
+    )
+    app = create_app(settings=app_settings(warm_up_enabled=False))
+    app.dependency_overrides[movie_repository] = lambda: repo
+    lifespan = Lifespan(app)
+    await lifespan.startup()
+
+    assert await _request(app, "GET", "/health/ready") == (200, {"status": "ready"})
+    in_flight = asyncio.create_task(_request(app, "GET", "/api/v1/movie/my-id"))
+    await asyncio.sleep(0.05)
+
+    await lifespan.shutdown()
+    await asyncio.sleep(0.01)
+
+    # Readiness fails and new requests are refused while the in-flight one finishes
+    assert await _request(app, "GET", "/health/ready") == (503, {"status": "draining"})
+    status, _ = await _request(app, "GET", "/api/v1/movie/my-id")
+    assert status == 503
+    assert not in_flight.done()
+
+    status, body = await in_flight
+    assert status == 200
+    assert body["id"] == "my-id"
+
+    await lifespan.shutdown_complete()
+    assert repo.calls == ["get_by_id", "flush", "close"]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drain_timeout():
+    repo = ClosingMemoryMovieRepository(delay_s=5)
+    app = create_app(
+        settings=app_settings(warm_up_enabled=False, shutdown_drain_timeout_s=0.1)
+    )
+    app.dependency_overrides[movie_repository] = lambda: repo
+    lifespan = Lifespan(app)
+    await lifespan.startup()
+
+    in_flight = asyncio.create_task(_request(app, "GET", "/api/v1/movie/my-id"))
+    await asyncio.sleep(0.05)
+    await lifespan.shutdown()
+
+    # The client is closed once the drain timeout passes, even with a request
+    # still running
+    await asyncio.wait_for(lifespan.shutdown_complete(), 1)
+    assert repo.calls == ["flush", "close"]
+    in_flight.cancel()
+
+
+_SERVER_SCRIPT = """
+import asyncio
+import sys
+
+import uvicorn
+
+from app.api import create_app
+from app.entities.movie import Movie
+from app.handlers.handler_dependencies import movie_repository
+from app.launcher import DrainingServer
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import app_settings
+
+
+class SlowMemoryMovieRepository(MemoryMovieRepository):
+    async def get_by_id(self, movie_id: str):
+        await asyncio.sleep(1)
+        return await super().get_by_id(movie_id)
+
+
+repo = SlowMemoryMovieRepository()
+movie = Movie(
+    id="my-id", title="test movie", description="test description", release_year=1999
+)
+asyncio.run(repo.create(movie))
+settings = app_settings(warm_up_enabled=False, shutdown_drain_timeout_s=10)
+app = create_app(settings=settings)
+app.dependency_overrides[movie_repository] = lambda: repo
+DrainingServer(uvicorn.Config(app, port=int(sys.argv[1]), log_level="warning")).run()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_sigterm_drains_before_closing_listeners():
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    server = subprocess.Popen(
+        [sys.executable, "-c", _SERVER_SCRIPT, str(port)], cwd=root
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health/ready").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            assert time.monotonic() < deadline, "the server didn't start"
+            time.sleep(0.05)
+
+        in_flight = {}
+        request = threading.Thread(
+            target=lambda: in_flight.update(
+                response=httpx.get(f"{base_url}/api/v1/movie/my-id", timeout=10)
+            )
+        )
+        request.start()
+        time.sleep(0.2)
+        server.send_signal(signal.SIGTERM)
+        time.sleep(0.2)
+
+        # Still accepting connections: readiness fails and new requests are refused
+        ready = httpx.get(f"{base_url}/health/ready")
+        assert (ready.status_code, ready.json()) == (503, {"status": "draining"})
+        assert httpx.get(f"{base_url}/api/v1/movie/my-id").status_code == 503
+
+        request.join(10)
+        assert in_flight["response"].status_code == 200
+        assert in_flight["response"].json()["id"] == "my-id"
+        assert server.wait(10) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.loop_monitor import LoopMonitor
+
+
+def _blocked_count(route: str) -> float:
+    return REGISTRY.get_sample_value("event_loop_blocked_total", {"route": route}) or 0
+
+
+def blocking_endpoint():
+    time.sleep(0.2)
+
+
+@pytest.mark.asyncio()
+async def test_reports_blocking_request(caplog):
+    lag_before = REGISTRY.get_sample_value("event_loop_lag_seconds_sum") or 0
+    blocked_before = _blocked_count("GET blocking_endpoint")
+    monitor = LoopMonitor(interval_s=0.01, block_threshold_s=0.05)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    with caplog.at_level(logging.WARNING, logger="app.loop_monitor"):
+        monitor.request_started(
+            {"type": "http", "method": "GET", "endpoint": blocking_endpoint}
+        )
+        blocking_endpoint()
+        monitor.request_finished()
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert _blocked_count("GET blocking_endpoint") == blocked_before + 1
+    assert "blocked" in caplog.text and "in blocking_endpoint" in caplog.text
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_sum") - lag_before >= 0.1
+    assert not monitor.requests
+
+
+@pytest.mark.asyncio()
+async def test_quiet_loop_is_not_reported():
+    blocked_before = _blocked_count("background")
+    monitor = LoopMonitor(interval_s=0.01, block_threshold_s=0.05)
+    monitor.start()
+    await asyncio.sleep(0.2)
+    await monitor.stop()
+
+    assert _blocked_count("background") == blocked_before
@@ -0,0 +1,74 @@
+import time
+
+from starlette.testclient import TestClient
+
+from app.repository.movie.memory import MemoryMovieRepository
+from app.tests.fixtures import memory_app_client
+
+ADMIN = {"X-Admin-Token": "admin"}
+
+
+class BusyMemoryMovieRepository(MemoryMovieRepository):
+    async def get_by_fields(self, *args, **kwargs):
+        _busy(0.05)
+        return await super().get_by_fields(*args, **kwargs)
+
+
+def _busy(duration_s: float):
+    deadline = time.perf_counter() + duration_s
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _client(**settings) -> TestClient:
+    return memory_app_client(
+        BusyMemoryMovieRepository(), admin_token="admin", **settings
+    )
+
+
+def test_profiles_requests_with_token():
+    client = _client(profiling_token="profile", profiling_interval_ms=1)
+
+    client.get("/api/v1/movie/")
+    assert client.get("/debug/profile/routes", headers=ADMIN).json() == {"routes": {}}
+
+    client.get("/api/v1/movie/", headers={"X-Profile-Token": "wrong"})
+    client.get("/api/v1/movie/", headers={"X-Profile-Token": "profile"})
+    assert client.get("/debug/profile/routes", headers=ADMIN).json() == {
+        "routes": {"GET get_movie_by_fields": 1}
+    }
+
+    profile = client.get(
+        "/debug/profile", params={"route": "GET get_movie_by_fields"}, headers=ADMIN
+    )
+    assert profile.status_code == 200
+    lines = profile.text.splitlines()
+    assert any("get_movie_by_fields" in line and "_busy" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+    everything = client.get("/debug/profile", headers=ADMIN).text
+    assert all(
+        line.startswith("GET get_movie_by_fields;") for line in everything.splitlines()
+    )
+
+    assert client.delete("/debug/profile", headers=ADMIN).status_code == 204
+    assert client.get("/debug/profile", headers=ADMIN).text == ""
+
+
+def test_profiles_one_in_n_requests():
+    client = _client(profiling_sample_every=2)
+
+    for _ in range(4):
+        client.get("/api/v1/movie/")
+
+    assert client.get("/debug/profile/routes", headers=ADMIN).json() == {
+        "routes": {"GET get_movie_by_fields": 2}
+    }
+
+
+def test_profile_routes_need_profiling_enabled():
+    client = _client()
+
+    assert client.get("/debug/profile", headers=ADMIN).status_code == 404
+    assert client.get("/debug/profile").status_code == 403
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.dto.movie import MovieResponse, MovieResponseWithCount
+from app.entities.movie import Movie
+from app.repository.movie.memory import MemoryMovieRepository
+from app.serialization import ResponseEncoder, encode
+from app.tests.fixtures import memory_app_client
+
+
+def _movies(count: int, description: str = "A film") -> list[Movie]:
+    return [
+        Movie(
+            id=str(i),
+            title=f"Film {i}",
+            description=description,
+            release_year=2000,
+            watched=i % 2 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def test_encode_matches_json_response():
+    model = MovieResponseWithCount(
+        movies=[
+            MovieResponse(
+                id="1",
+                title="Amélie / Le Fabuleux Destin",
+                description='"Quoted"\n',
+                release_year=2001,
+            )
+        ],
+        count=1,
+    )
+
+    assert encode(model) == JSONResponse(jsonable_encoder(model)).body
+
+
+def test_offloads_above_either_threshold():
+    encoder = ResponseEncoder(min_rows=10, min_bytes=10_000)
+
+    assert not encoder.offloads(_movies(9))
+    assert encoder.offloads(_movies(10))
+    assert encoder.offloads(_movies(2, description="x" * 10_000))
+
+
+@pytest.mark.asyncio()
+async def test_offloaded_and_inline_listings_are_identical():
+    repo = MemoryMovieRepository()
+    await repo.create_many(_movies(300))
+    bodies = []
+    for enabled in (True, False):
+        client = memory_app_client(repo, offload_serialization_enabled=enabled)
+        result = client.get("/api/v1/movie/", params={"limit": 300})
+        assert result.status_code == 200
+        assert result.headers["content-type"] == "application/json"
+        bodies.append(result.content)
+
+    assert bodies[0] == bodies[1]
+    assert len(result.json()["movies"]) == 300
@@ -0,0 +1,254 @@
+"""
+Seeded generator of realistic movie catalogs, for load and scale testing.
+
+Titles are drawn from a pool with Zipf-distributed popularity, so a few
+titles (remakes, common names) are shared by many movies and most by one.
+Release years follow film production, growing over the 20th century,
+with a few announced movies up to 2100. Description lengths are
+log-normal up to 5000 characters. Every movie passes `CreateMovieBody`.
+The same seed always generates the same catalog.
+
+Usage:
+    python -m benchmarks.catalog --count 1000000 --seed 1 --ndjson catalog.ndjson
+    python -m benchmarks.catalog --count 1000000 --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+import typing
+import uuid
+
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import MovieRepository
+
+FIRST_YEAR = 1895
+LAST_YEAR = 2100
+# Years after this one are announced movies
+CURRENT_YEAR = 2025
+MAX_DESCRIPTION_LENGTH = 5000
+
+_WORDS = (
+    "the a of night day last first return rise fall city love war king queen star "
+    "dark light blood river house road dream ghost shadow fire ice storm heart iron "
+    "silver golden lost secret hidden empire kingdom journey story man woman child "
+    "girl boy family stranger hunter game edge world time summer winter island ocean "
+    "mountain desert sky moon sun red blue black white wild quiet long final broken "
+    "silent eternal midnight morning"
+).split()
+
+
+class CatalogGenerator:
+    """Generates movies with the given `seed`.
+
+    Parameters
+    ----------
+    seed
+        Seed of every random choice, the same seed generates the same movies.
+    titles
+        Size of the pool titles are drawn from.
+    zipf_exponent
+        Exponent of the title popularity, higher values concentrate movies on fewer
+        titles.
+    watched_ratio
+        Share of the movies marked as watched.
+    future_ratio
+        Share of the movies announced for a year after `CURRENT_YEAR`.
+    median_description_length
+        Median description length, lengths are log-normal and capped at 5000 characters.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        titles: int = 100000,
+        zipf_exponent: float = 1.1,
+        watched_ratio: float = 0.3,
+        future_ratio: float = 0.01,
+        median_description_length: int = 300,
+    ):
+        self._rng = random.Random(seed)
+        self._watched_ratio = watched_ratio
+        self._description_sigma = 0.8
+        self._description_mu = math.log(median_description_length)
+
+        self._titles = self._title_pool(titles)
+        self._title_weights = list(
+            itertools.accumulate(
+                1 / rank**zipf_exponent for rank in range(1, titles + 1)
+            )
+        )
+
+        # Film production grew about 3% a year until now; announced movies thin out
+        # over the following years
+        past = range(FIRST_YEAR, CURRENT_YEAR + 1)
+        future = range(CURRENT_YEAR + 1, LAST_YEAR + 1)
+        past_weights = [1.03 ** (year - FIRST_YEAR) for year in past]
+        future_weights = [0.5 ** (year - CURRENT_YEAR) for year in future]
+        past_total, future_total = sum(past_weights), sum(future_weights)
+        self._years = list(past) + list(future)
+        self._year_weights = list(
+            itertools.accumulate(
+                [(1 - future_ratio) * weight / past_total for weight in past_weights]
+                + [future_ratio * weight / future_total for weight in future_weights]
+            )
+        )
+
+        # Descriptions are slices of one long text, so generating them costs a slice
+        self._text = " ".join(self._rng.choices(_WORDS, k=MAX_DESCRIPTION_LENGTH // 2))
+
+    def _title_pool(self, size: int) -> list[str]:
+        titles = []
+        seen = set()
+        while len(titles) < size:
+            words = self._rng.choices(_WORDS, k=self._rng.randint(1, 5))
+            title = " ".join(words).capitalize()
+            if len(title) < 3 or title in seen:
+                # Numbered sequels once short titles run out
+                title = f"{title} {len(titles) + 1}"
+            seen.add(title)
+            titles.append(title)
+        return titles
+
+    def _description_length(self) -> int:
+        length = int(
+            self._rng.lognormvariate(self._description_mu, self._description_sigma)
+        )
+        return max(3, min(MAX_DESCRIPTION_LENGTH, length))
+
+    def movies(self, count: int) -> typing.Iterator[Movie]:
+        rng = self._rng
+        titles = rng.choices(self._titles, cum_weights=self._title_weights, k=count)
+        years = rng.choices(self._years, cum_weights=self._year_weights, k=count)
+        text_length = len(self._text)
+        for title, year in zip(titles, years):
+            length = self._description_length()
+            start = rng.randrange(text_length - length + 1)
+            yield Movie(
+                id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                title=title,
+                description=self._text[start : start + length],
+                release_year=year,
+                watched=rng.random() < self._watched_ratio,
+            )
+
+    def batches(
+        self, count: int, batch_size: int = 10000
+    ) -> typing.Iterator[list[Movie]]:
+        """Generates `count` movies in lists of `batch_size`, for bulk writes."""
+
+        for start in range(0, count, batch_size):
+            yield list(self.movies(min(batch_size, count - start)))
+
+
+async def load(
+    repository: MovieRepository,
+    generator: CatalogGenerator,
+    count: int,
+    batch_size: int = 10000,
+):
+    """Writes `count` movies to `repository` in bulk writes of `batch_size`."""
+
+    for batch in generator.batches(count, batch_size):
+        await repository.create_many(batch)
+
+
+def write_ndjson(
+    file: typing.TextIO,
+    generator: CatalogGenerator,
+    count: int,
+    batch_size: int = 10000,
+):
+    """Writes `count` movies to `file`, one JSON object per line.
+
+    The objects have the fields of `CreateMovieBody` and the ID.
+    """
+
+    for batch in generator.batches(count, batch_size):
+        file.write(
+            "".join(
+                json.dumps(
+                    {
+                        "id": movie.id,
+                        "title": movie.title,
+                        "description": movie.description,
+                        "release_year": movie.release_year,
+                        "watched": movie.watched,
+                    },
+                    separators=(",", ":"),
+                )
+                + "\n"
+                for movie in batch
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--titles", type=int, default=100000, help="distinct titles to draw from"
+    )
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--watched-ratio", type=float, default=0.3)
+    parser.add_argument("--median-description-length", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        "--ndjson", help="file the movies are written to, - for standard output"
+    )
+    output.add_argument(
+        "--mongo-url", help="MongoDB the movies are written to, in --database"
+    )
+    parser.add_argument("--database", default="movies")
+    parser.add_argument("--id-as-primary-key", action="store_true")
+    arguments = parser.parse_args()
+
+    generator = CatalogGenerator(
+        seed=arguments.seed,
+        titles=arguments.titles,
+        zipf_exponent=arguments.zipf_exponent,
+        watched_ratio=arguments.watched_ratio,
+        median_description_length=arguments.median_description_length,
+    )
+    started = time.perf_counter()
+    if arguments.ndjson == "-":
+        write_ndjson(sys.stdout, generator, arguments.count, arguments.batch_size)
+    elif arguments.ndjson:
+        with open(arguments.ndjson, "w", encoding="utf-8") as f:
+            write_ndjson(f, generator, arguments.count, arguments.batch_size)
+    else:
+        from app.repository.movie.mongo import MongoMovieRepository
+
+        repository = MongoMovieRepository(
+            connection_string=arguments.mongo_url,
+            database=arguments.database,
+            server_selection_timeout_ms=5000,
+            id_as_primary_key=arguments.id_as_primary_key,
+        )
+
+        async def load_and_close():
+            try:
+                await load(repository, generator, arguments.count, arguments.batch_size)
+            finally:
+                await repository.close()
+
+        asyncio.run(load_and_close())
+    duration_s = time.perf_counter() - started
+    print(
+        f"Generated {arguments.count} movies in {duration_s:.1f}s"
+        f" ({arguments.count / duration_s * 60:,.0f} per minute)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+End-to-end load tests of the full API with latency SLO gates.
+
+See `python -m benchmarks.loadtest --help`.
+"""
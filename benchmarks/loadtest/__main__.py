@@ -0,0 +1,130 @@
+"""
+End-to-end load tests of the full API with latency SLO gates.
+
+Each scenario loads the API from `create_app()` with `--concurrency`
+closed-loop clients for `--duration` seconds after a `--warm-up`, on a
+generated catalog of `--size` movies. The memory backend replaces the
+repository with an in-memory one. The mongo backend uses a throwaway
+database on `--mongo-url`, dropped afterwards. Other settings come from
+the environment or settings.env as usual.
+
+Throughput, latency percentiles and error rate are reported per scenario
+and per request. The command exits with status 1 if a scenario breaches
+its SLOs. `--slo` overrides them: `mixed.p99_ms=150` for one scenario,
+`*.error_rate=0.01` for all of them.
+
+Usage:
+    python -m benchmarks.loadtest --size 100000 --scenarios browse mixed
+    python -m benchmarks.loadtest --backend mongo --slo "*.p99_ms=50" --output lt.json
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks.loadtest.runner import Backend, breaches, run
+from benchmarks.loadtest.scenarios import SCENARIOS
+
+
+def slos(overrides: list[str]) -> dict[str, dict[str, float]]:
+    """Returns the SLOs of every scenario, with `overrides` applied.
+
+    Overrides have the form `scenario.metric=bound`.
+    """
+
+    scenario_slos = {name: dict(scenario.slos) for name, scenario in SCENARIOS.items()}
+    for override in overrides:
+        target, bound = override.split("=")
+        scenario_name, metric = target.split(".")
+        for name in scenario_slos if scenario_name == "*" else [scenario_name]:
+            scenario_slos[name][metric] = float(bound)
+    return scenario_slos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        epilog="scenarios:\n"
+        + "\n".join(
+            f"  {name:<17}{scenario.description}, SLOs {scenario.slos}"
+            for name, scenario in SCENARIOS.items()
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument(
+        "--size", type=int, default=10000, help="movies in the generated catalog"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--duration", type=float, default=20, help="seconds of measurement per scenario"
+    )
+    parser.add_argument(
+        "--warm-up", type=float, default=2, help="seconds of load before measuring"
+    )
+    parser.add_argument("--client-processes", type=int, default=2)
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument(
+        "--slo",
+        action="append",
+        default=[],
+        help="override such as mixed.p99_ms=150 or *.error_rate=0.01",
+    )
+    parser.add_argument("--output", help="file the report is saved to as JSON")
+    arguments = parser.parse_args()
+
+    scenario_slos = slos(arguments.slo)
+    summaries = run(
+        Backend(arguments.backend, arguments.size, arguments.seed, arguments.mongo_url),
+        arguments.scenarios,
+        arguments.concurrency,
+        arguments.duration,
+        arguments.warm_up,
+        arguments.client_processes,
+        arguments.port,
+        arguments.seed,
+    )
+
+    failed = False
+    print(
+        f"{'scenario / request':<28} {'requests':>9} {'req/s':>9} {'p50 ms':>9}"
+        f" {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}"
+    )
+    for scenario_name, summary in summaries.items():
+        rows = [(scenario_name, summary)] + [
+            (f"  {name}", stats) for name, stats in summary["requests_by_name"].items()
+        ]
+        for name, stats in rows:
+            print(
+                f"{name:<28} {stats['requests']:>9} {stats['requests_per_s']:>9.1f}"
+                f" {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f}"
+                f" {stats['p99_ms']:>9.1f} {stats['error_rate']:>8.2%}"
+            )
+        summary["slos"] = scenario_slos[scenario_name]
+        summary["breaches"] = breaches(summary, scenario_slos[scenario_name])
+        if summary["breaches"]:
+            failed = True
+            print(f"  SLO breached: {', '.join(summary['breaches'])}")
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(
+                {
+                    "backend": arguments.backend,
+                    "size": arguments.size,
+                    "scenarios": summaries,
+                },
+                f,
+                indent=2,
+            )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
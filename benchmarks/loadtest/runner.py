@@ -0,0 +1,267 @@
+"""
+Runs load test scenarios against the API served from this process.
+
+The app from `create_app()` is served by Uvicorn on a thread of this
+process, with its full middleware stack. The clients run in separate
+processes, forked before the server starts, so they don't compete with it
+for the GIL.
+"""
+
+import asyncio
+import multiprocessing
+import secrets
+import threading
+import time
+import typing
+
+import httpx
+import uvicorn
+
+from app.api import create_app
+from app.config import Settings
+from app.entities.movie import Movie
+from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.abstractions import MovieRepository
+from app.repository.movie.memory import MemoryMovieRepository
+from app.repository.movie.mongo import MongoMovieRepository
+from benchmarks.catalog import CatalogGenerator
+from benchmarks.loadtest.scenarios import SCENARIOS, State
+from benchmarks.repository import seed
+from benchmarks.stats import percentile
+
+Result = tuple[str, float, bool]
+
+# Bounds that are minimums, every other SLO metric is a maximum
+_MINIMUM_SLOS = ("requests_per_s",)
+
+
+class Backend:
+    """The repository behind the API under test, seeded with a generated catalog."""
+
+    def __init__(self, kind: str, size: int, seed_value: int, mongo_url: str):
+        self.kind = kind
+        self.size = size
+        self._seed = seed_value
+        self._mongo_url = mongo_url
+        self._database = f"loadtest_{secrets.token_hex(5)}"
+        self._repository: typing.Optional[MovieRepository] = None
+        self.sample: list[Movie] = []
+
+    def settings(self) -> Settings:
+        # Everything else comes from the environment or settings.env as usual
+        return Settings(
+            mongo_connection_string=self._mongo_url,
+            mongo_database_name=self._database,
+            server_selection_timeout_ms=5000,
+        )
+
+    def seed(self):
+        if self.kind == "memory":
+            self._repository = MemoryMovieRepository()
+            repository = self._repository
+        else:
+            repository = MongoMovieRepository(
+                connection_string=self._mongo_url,
+                database=self._database,
+                server_selection_timeout_ms=5000,
+            )
+
+        async def seed_and_close():
+            try:
+                return await seed(
+                    repository, CatalogGenerator(seed=self._seed), self.size
+                )
+            finally:
+                if self.kind != "memory":
+                    await repository.close()
+
+        self.sample = asyncio.run(seed_and_close())
+
+    def app(self):
+        app = create_app(settings=self.settings())
+        if self._repository is not None:
+            app.dependency_overrides[movie_repository] = lambda: self._repository
+        return app
+
+    def drop(self):
+        if self.kind == "memory":
+            return
+
+        async def drop_and_close():
+            repository = MongoMovieRepository(
+                connection_string=self._mongo_url,
+                database=self._database,
+                server_selection_timeout_ms=5000,
+            )
+            try:
+                # noinspection PyProtectedMember
+                await repository._client.drop_database(self._database)
+            finally:
+                await repository.close()
+
+        asyncio.run(drop_and_close())
+
+
+def serve(app, port: int, timeout_s: float = 30) -> uvicorn.Server:
+    """Serves `app` on a thread of this process, returns once it accepts requests.
+
+    Raises RuntimeError when the server stops before starting, which Uvicorn
+    does when it can't bind the port, or doesn't start within `timeout_s`.
+    """
+
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout_s
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"the server on port {port} stopped before starting")
+        if time.monotonic() > deadline:
+            server.should_exit = True
+            raise RuntimeError(
+                f"the server on port {port} didn't start within {timeout_s}s"
+            )
+        time.sleep(0.05)
+    return server
+
+
+async def _clients(
+    base_url: str,
+    scenario_name: str,
+    state: State,
+    concurrency: int,
+    duration_s: float,
+    warm_up_s: float,
+) -> list[Result]:
+    """Runs `concurrency` closed-loop clients, returns the results after the warm-up."""
+
+    scenario = SCENARIOS[scenario_name]
+    results = []
+    started = time.monotonic()
+    measure_from = started + warm_up_s
+    deadline = measure_from + duration_s
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=httpx.Limits(max_connections=concurrency), timeout=30
+    ) as client:
+
+        async def client_loop():
+            while time.monotonic() < deadline:
+                request = scenario.pick(state.rng)
+                sent = time.perf_counter()
+                try:
+                    name, response = await request(client, state)
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    name, ok = request.__name__, False
+                latency = time.perf_counter() - sent
+                if time.monotonic() >= measure_from:
+                    results.append((name, latency, ok))
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return results
+
+
+def _client_process(arguments: tuple) -> list[Result]:
+    (
+        base_url,
+        scenario_name,
+        size,
+        sample,
+        seed_value,
+        concurrency,
+        duration_s,
+        warm_up_s,
+    ) = arguments
+    state = State(size, sample, CatalogGenerator(seed=seed_value), seed=seed_value)
+    return asyncio.run(
+        _clients(base_url, scenario_name, state, concurrency, duration_s, warm_up_s)
+    )
+
+
+def summarize(results: list[Result], duration_s: float) -> dict:
+    """Throughput, latency percentiles and error rate, overall and per request name."""
+
+    def stats(subset: list[Result]) -> dict:
+        latencies = [latency for _, latency, ok in subset if ok]
+        return {
+            "requests": len(subset),
+            "requests_per_s": len(subset) / duration_s,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "error_rate": (
+                sum(1 for _, _, ok in subset if not ok) / len(subset) if subset else 0.0
+            ),
+        }
+
+    names = sorted({name for name, _, _ in results})
+    return {
+        **stats(results),
+        "requests_by_name": {
+            name: stats([result for result in results if result[0] == name])
+            for name in names
+        },
+    }
+
+
+def breaches(summary: dict, slos: dict[str, float]) -> list[str]:
+    """Describes each SLO the summary doesn't meet.
+
+    A NaN value, when no request succeeded, meets no bound.
+    """
+
+    breached = []
+    for metric, bound in slos.items():
+        value = summary[metric]
+        if metric in _MINIMUM_SLOS and not value >= bound:
+            breached.append(f"{metric} {value:.1f} < {bound}")
+        elif metric not in _MINIMUM_SLOS and not value <= bound:
+            breached.append(f"{metric} {value:.3f} > {bound}")
+    return breached
+
+
+def run(
+    backend: Backend,
+    scenario_names: list[str],
+    concurrency: int,
+    duration_s: float,
+    warm_up_s: float,
+    client_processes: int,
+    port: int,
+    seed_value: int,
+) -> dict[str, dict]:
+    """Runs each scenario in turn against one server, returns their summaries."""
+
+    backend.seed()
+    summaries = {}
+    # Forked before the server thread starts
+    with multiprocessing.Pool(client_processes) as pool:
+        server = serve(backend.app(), port)
+        try:
+            for scenario_name in scenario_names:
+                per_process = max(1, concurrency // client_processes)
+                process_results = pool.map(
+                    _client_process,
+                    [
+                        (
+                            f"http://127.0.0.1:{port}",
+                            scenario_name,
+                            backend.size,
+                            backend.sample,
+                            seed_value + index,
+                            per_process,
+                            duration_s,
+                            warm_up_s,
+                        )
+                        for index in range(client_processes)
+                    ],
+                )
+                summaries[scenario_name] = summarize(
+                    [result for results in process_results for result in results],
+                    duration_s,
+                )
+        finally:
+            server.should_exit = True
+            backend.drop()
+    return summaries
@@ -0,0 +1,170 @@
+"""
+Load test scenarios, each a weighted mix of requests sent by closed-loop clients.
+
+A request function picks its target from the shared `State`, sends one
+request and returns the name it is reported under with the response.
+"""
+
+import itertools
+import random
+import typing
+
+import httpx
+
+from app.entities.movie import Movie
+from benchmarks.catalog import CatalogGenerator
+
+API = "/api/v1/movie/"
+
+
+class State:
+    """Movies known to be in the catalog, shared by the clients of a run."""
+
+    def __init__(
+        self, size: int, sample: list[Movie], generator: CatalogGenerator, seed: int = 0
+    ):
+        self.size = size
+        self.sample = sample
+        # The first few movies of the sample are the hot keys
+        self.hot = sample[:10]
+        self.created: list[str] = []
+        self.generator = generator
+        self.rng = random.Random(seed)
+
+    def new_movie(self) -> Movie:
+        return next(self.generator.movies(1))
+
+
+Request = typing.Callable[
+    [httpx.AsyncClient, State], typing.Awaitable[tuple[str, httpx.Response]]
+]
+
+
+async def get_by_id(client: httpx.AsyncClient, state: State):
+    return "get_by_id", await client.get(f"{API}{state.rng.choice(state.sample).id}")
+
+
+async def get_hot_by_id(client: httpx.AsyncClient, state: State):
+    return "get_hot_by_id", await client.get(f"{API}{state.rng.choice(state.hot).id}")
+
+
+async def browse(client: httpx.AsyncClient, state: State):
+    movie = state.rng.choice(state.sample)
+    field = state.rng.choice(("title", "release_year", "watched"))
+    value = getattr(movie, field)
+    if field == "watched":
+        value = "true" if value else "false"
+    return f"browse_{field}", await client.get(API, params={field: value, "limit": 20})
+
+
+async def browse_hot(client: httpx.AsyncClient, state: State):
+    return "browse_hot", await client.get(API, params={"watched": "false", "limit": 20})
+
+
+async def deep_page(client: httpx.AsyncClient, state: State):
+    skip = max(0, state.size - 100 * (1 + state.rng.randrange(10)))
+    return "deep_page", await client.get(API, params={"skip": skip, "limit": 100})
+
+
+async def create(client: httpx.AsyncClient, state: State):
+    movie = state.new_movie()
+    response = await client.post(
+        API,
+        json={
+            "title": movie.title,
+            "description": movie.description,
+            "release_year": movie.release_year,
+            "watched": movie.watched,
+        },
+    )
+    if response.status_code == 201:
+        state.created.append(response.json()["id"])
+    return "create", response
+
+
+async def update(client: httpx.AsyncClient, state: State):
+    movie_id = (
+        state.rng.choice(state.created)
+        if state.created
+        else state.rng.choice(state.sample).id
+    )
+    return "update", await client.patch(
+        f"{API}{movie_id}", json={"watched": state.rng.random() < 0.5}
+    )
+
+
+async def delete(client: httpx.AsyncClient, state: State):
+    if not state.created:
+        return await create(client, state)
+    movie_id = state.created.pop(state.rng.randrange(len(state.created)))
+    return "delete", await client.delete(f"{API}{movie_id}")
+
+
+class Scenario:
+    """A mix of requests in proportion to their weights, and the SLOs they must meet.
+
+    SLOs map a metric of the whole scenario to its bound: an upper bound for
+    latencies (`p50_ms`, `p95_ms`, `p99_ms`) and `error_rate`, a lower bound
+    for `requests_per_s`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        mix: dict[Request, float],
+        slos: dict[str, float],
+    ):
+        self.name = name
+        self.description = description
+        self.requests = list(mix)
+        self.cum_weights = list(itertools.accumulate(mix.values()))
+        self.slos = slos
+
+    def pick(self, rng: random.Random) -> Request:
+        return rng.choices(self.requests, cum_weights=self.cum_weights)[0]
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario(
+            "browse",
+            "Read-heavy browsing: filtered listings and movies by ID",
+            {browse: 0.7, get_by_id: 0.3},
+            {"p99_ms": 100, "error_rate": 0.001},
+        ),
+        Scenario(
+            "write_burst",
+            "Bursts of creates, updates and deletes",
+            {create: 0.6, update: 0.3, delete: 0.1},
+            {"p99_ms": 150, "error_rate": 0.001},
+        ),
+        Scenario(
+            "deep_pagination",
+            "Pages of 100 movies near the end of the catalog",
+            {deep_page: 1.0},
+            {"p99_ms": 500, "error_rate": 0.001},
+        ),
+        Scenario(
+            "hot_keys",
+            "A storm of requests for the same few movies and the same listing",
+            {get_hot_by_id: 0.7, browse_hot: 0.3},
+            {"p99_ms": 100, "error_rate": 0.001},
+        ),
+        Scenario(
+            "mixed",
+            "Production-like mix of all of the above",
+            {
+                browse: 0.5,
+                get_by_id: 0.2,
+                get_hot_by_id: 0.1,
+                create: 0.1,
+                update: 0.05,
+                delete: 0.03,
+                deep_page: 0.02,
+            },
+            {"p99_ms": 200, "error_rate": 0.001},
+        ),
+    )
+}
@@ -0,0 +1,230 @@
+"""
+Replays traffic captured with CAPTURE_PATH against the API.
+
+Requests are sent in the order they were captured. With a positive
+`--speed` they are sent open loop on the captured schedule, `--speed 2`
+twice as fast; with `--speed 0` they are sent as fast as `--concurrency`
+closed-loop clients allow. Without `--url` the app is built in this
+process and driven through ASGI, with its settings, including the
+MongoDB it talks to, from the environment or settings.env as usual.
+
+Throughput and p50, p95 and p99 latency are reported per route.
+`--output` saves the report as JSON, for comparing builds.
+
+Usage:
+    python -m benchmarks.replay captures/traffic-*.jsonl --speed 1
+    python -m benchmarks.replay captures/*.jsonl --url http://localhost:8080 --speed 0
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import httpx
+
+from benchmarks.stats import percentile
+
+
+def load(paths: list[str], limit: int = None) -> tuple[list[dict], int]:
+    """Returns the captured requests of `paths` in capture order.
+
+    Requests captured with a truncated body are skipped, their count is
+    returned too.
+    """
+
+    requests = []
+    skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                if request.get("body_truncated"):
+                    skipped += 1
+                    continue
+                requests.append(request)
+    requests.sort(key=lambda request: request["ts"])
+    return requests[:limit] if limit else requests, skipped
+
+
+async def _send(client: httpx.AsyncClient, request: dict) -> tuple[str, float, bool]:
+    """Sends one captured request, returns its route, latency and whether it worked."""
+
+    url = request["path"] + (f"?{request['query']}" if request["query"] else "")
+    headers = (
+        {"content-type": request["content_type"]} if request.get("content_type") else {}
+    )
+    body = request["body"].encode("utf-8") if request["body"] is not None else None
+    route = request.get("route") or f"{request['method']} {request['path']}"
+    started = time.perf_counter()
+    try:
+        response = await client.request(
+            request["method"], url, content=body, headers=headers
+        )
+    except httpx.HTTPError:
+        return route, time.perf_counter() - started, False
+    return route, time.perf_counter() - started, response.status_code < 500
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    requests: list[dict],
+    speed: float = 1.0,
+    concurrency: int = 64,
+    max_in_flight: int = 1000,
+) -> tuple[list[tuple[str, float, bool]], float]:
+    """Replays `requests`, returns the result of each one and the time it took."""
+
+    results = []
+    started = time.monotonic()
+
+    if speed > 0:
+        # Open loop, late responses don't delay the next requests, up to max_in_flight
+        # of them
+        in_flight = asyncio.Semaphore(max_in_flight)
+        first_ts = requests[0]["ts"] if requests else 0
+
+        async def send(request: dict):
+            try:
+                results.append(await _send(client, request))
+            finally:
+                in_flight.release()
+
+        tasks = []
+        for request in requests:
+            delay = (request["ts"] - first_ts) / speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await in_flight.acquire()
+            tasks.append(asyncio.create_task(send(request)))
+        await asyncio.gather(*tasks)
+    else:
+        pending = iter(requests)
+
+        async def worker():
+            for request in pending:
+                results.append(await _send(client, request))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return results, time.monotonic() - started
+
+
+def report(results: list[tuple[str, float, bool]], duration_s: float) -> dict:
+    """Summarizes the results per route, and over all routes under `total`."""
+
+    by_route = collections.defaultdict(list)
+    for route, latency, ok in results:
+        by_route[route].append((latency, ok))
+        by_route["total"].append((latency, ok))
+
+    summary = {}
+    for route, route_results in sorted(
+        by_route.items(), key=lambda item: (item[0] == "total", item[0])
+    ):
+        latencies = [latency for latency, ok in route_results if ok]
+        summary[route] = {
+            "requests": len(route_results),
+            "requests_per_s": (
+                len(route_results) / duration_s if duration_s else float("nan")
+            ),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "errors": sum(1 for _, ok in route_results if not ok),
+        }
+    return summary
+
+
+async def _run(
+    arguments: argparse.Namespace, requests: list[dict]
+) -> tuple[list, float]:
+    limits = httpx.Limits(max_connections=max(arguments.concurrency, 100))
+    if arguments.url:
+        async with httpx.AsyncClient(
+            base_url=arguments.url, limits=limits, timeout=30
+        ) as client:
+            return await replay(
+                client,
+                requests,
+                arguments.speed,
+                arguments.concurrency,
+                arguments.max_in_flight,
+            )
+
+    from app.api import create_app
+
+    app = create_app()
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(
+            app=app, base_url="http://replay", limits=limits, timeout=30
+        ) as client:
+            return await replay(
+                client,
+                requests,
+                arguments.speed,
+                arguments.concurrency,
+                arguments.max_in_flight,
+            )
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "captures", nargs="+", help="JSON lines files written by the capture middleware"
+    )
+    parser.add_argument(
+        "--url", help="base URL of the API, the app is run in this process if not given"
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="rate relative to the captured one, 0 for as fast as possible",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=64, help="clients when --speed is 0"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1000,
+        help="requests in flight at most when --speed is positive",
+    )
+    parser.add_argument(
+        "--limit", type=int, help="replay only the first captured requests"
+    )
+    parser.add_argument("--output", help="file the report is saved to as JSON")
+    arguments = parser.parse_args()
+
+    requests, skipped = load(arguments.captures, arguments.limit)
+    if skipped:
+        print(f"Skipped {skipped} requests captured without their body")
+    results, duration_s = asyncio.run(_run(arguments, requests))
+    summary = report(results, duration_s)
+
+    print(
+        f"{'route':<40} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}"
+        f" {'p99 ms':>9} {'errors':>7}"
+    )
+    for route, stats in summary.items():
+        print(
+            f"{route:<40} {stats['requests']:>9} {stats['requests_per_s']:>9.1f}"
+            f" {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            f" {stats['errors']:>7}"
+        )
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump({"duration_s": duration_s, "routes": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Latency of the movie repository operations across backends and catalog sizes.
+
+For every backend and size a fresh catalog is generated with
+`benchmarks.catalog` and seeded through bulk writes, then each operation
+is timed on its own: create, get_by_id, get_by_fields for every
+combination of filters, a page deep into the catalog, update and delete.
+Each operation runs `--operations` times or for `--max-seconds`,
+whichever comes first. The Mongo backend uses a throwaway database on
+`--mongo-url`, dropped afterwards.
+
+`run` writes the results as JSON. `compare` flags the operations whose
+latency grew by more than `--threshold` between two results, and exits
+with status 1 if there are any.
+
+Usage:
+    python -m benchmarks.repository run --output results.json
+    python -m benchmarks.repository compare baseline.json results.json --threshold 0.1
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import random
+import secrets
+import statistics
+import sys
+import time
+import typing
+
+from app.entities.movie import Movie
+from app.repository.movie.abstractions import MovieRepository
+from app.repository.movie.memory import MemoryMovieRepository
+from app.repository.movie.mongo import MongoMovieRepository
+from benchmarks.catalog import CatalogGenerator
+from benchmarks.stats import percentile
+
+FILTERS = ("title", "release_year", "watched")
+SEED_BATCH_SIZE = 10000
+PAGE_SIZE = 100
+# Seeded movies kept to pick the IDs and filter values looked up from
+SAMPLE_SIZE = 10000
+
+
+async def seed(
+    repository: MovieRepository, generator: CatalogGenerator, size: int
+) -> list[Movie]:
+    """Seeds `repository` with `size` generated movies, returns an even sample."""
+
+    sample = []
+    stride = max(1, size // SAMPLE_SIZE)
+    for batch in generator.batches(size, SEED_BATCH_SIZE):
+        await repository.create_many(batch)
+        sample.extend(batch[::stride])
+    return sample
+
+
+async def _time(
+    operation: typing.Callable[[int], typing.Awaitable],
+    operations: int,
+    max_seconds: float,
+) -> list[float]:
+    latencies = []
+    deadline = time.monotonic() + max_seconds
+    for iteration in range(operations):
+        if time.monotonic() > deadline:
+            break
+        started = time.perf_counter()
+        await operation(iteration)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _filter_combinations() -> list[tuple[str, ...]]:
+    return [
+        combination
+        for count in range(len(FILTERS) + 1)
+        for combination in itertools.combinations(FILTERS, count)
+    ]
+
+
+async def benchmark_repository(
+    repository: MovieRepository,
+    size: int,
+    operations: int,
+    max_seconds: float,
+    seed_value: int,
+) -> dict[str, list[float]]:
+    """Seeds `repository` with `size` movies, returns each operation's latencies."""
+
+    generator = CatalogGenerator(seed=seed_value)
+    rng = random.Random(seed_value)
+    sample = await seed(repository, generator, size)
+    results = {}
+
+    new_movies = list(generator.movies(operations))
+    created = []
+
+    async def create(iteration: int):
+        movie = new_movies[iteration]
+        created.append(movie.id)
+        await repository.create(movie)
+
+    results["create"] = await _time(create, operations, max_seconds)
+
+    results["get_by_id"] = await _time(
+        lambda _: repository.get_by_id(movie_id=rng.choice(sample).id),
+        operations,
+        max_seconds,
+    )
+
+    for combination in _filter_combinations():
+
+        def get_by_fields(_, combination=combination):
+            movie = rng.choice(sample)
+            return repository.get_by_fields(
+                **{field: getattr(movie, field) for field in combination},
+                limit=PAGE_SIZE,
+            )
+
+        name = "get_by_fields" + "".join(f"[{field}]" for field in combination)
+        results[name] = await _time(get_by_fields, operations, max_seconds)
+
+    results["get_by_fields_deep_skip"] = await _time(
+        lambda _: repository.get_by_fields(
+            skip=max(0, size - PAGE_SIZE * (1 + rng.randrange(10))), limit=PAGE_SIZE
+        ),
+        operations,
+        max_seconds,
+    )
+
+    results["update"] = await _time(
+        lambda _: repository.update(
+            movie_id=rng.choice(sample).id,
+            update_parameters={"watched": rng.random() < 0.5},
+        ),
+        operations,
+        max_seconds,
+    )
+
+    results["delete"] = await _time(
+        lambda iteration: repository.delete(movie_id=created[iteration]),
+        len(created),
+        max_seconds,
+    )
+    return results
+
+
+def _summary(latencies: list[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "ops_per_s": len(latencies) / sum(latencies) if latencies else float("nan"),
+    }
+
+
+async def run(arguments: argparse.Namespace) -> dict:
+    results = []
+    for backend, size in itertools.product(arguments.backends, arguments.sizes):
+        print(f"Benchmarking {backend} with {size} movies", file=sys.stderr)
+        database = None
+        if backend == "memory":
+            repository = MemoryMovieRepository()
+        else:
+            database = f"benchmark_{secrets.token_hex(5)}"
+            repository = MongoMovieRepository(
+                connection_string=arguments.mongo_url,
+                database=database,
+                server_selection_timeout_ms=5000,
+                id_as_primary_key=arguments.mongo_id_as_primary_key,
+            )
+        try:
+            latencies = await benchmark_repository(
+                repository,
+                size,
+                arguments.operations,
+                arguments.max_seconds,
+                arguments.seed,
+            )
+        finally:
+            if database is not None:
+                # noinspection PyProtectedMember
+                await repository._client.drop_database(database)
+            await repository.close()
+        for operation, operation_latencies in latencies.items():
+            results.append(
+                {
+                    "backend": backend,
+                    "size": size,
+                    "operation": operation,
+                    **_summary(operation_latencies),
+                }
+            )
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "seed": arguments.seed,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict, candidate: dict, metric: str = "p50_ms", threshold: float = 0.1
+) -> list[dict]:
+    """Returns the change of `metric` for each operation in both results.
+
+    Growth beyond `threshold` is flagged as a regression.
+
+    Operations missing from either result, or without a baseline value (zero
+    or NaN, when none of its runs were timed), are skipped. A NaN candidate
+    value with a baseline one is a regression.
+    """
+
+    baseline_results = {
+        (result["backend"], result["size"], result["operation"]): result
+        for result in baseline["results"]
+    }
+    changes = []
+    for result in candidate["results"]:
+        before = baseline_results.get(
+            (result["backend"], result["size"], result["operation"])
+        )
+        if before is None or not before[metric] or math.isnan(before[metric]):
+            continue
+        change = result[metric] / before[metric] - 1
+        changes.append(
+            {
+                "backend": result["backend"],
+                "size": result["size"],
+                "operation": result["operation"],
+                "baseline": before[metric],
+                "candidate": result[metric],
+                "change": change,
+                "regression": math.isnan(change) or change > threshold,
+            }
+        )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark the repositories")
+    run_parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=["memory", "mongo"],
+        default=["memory", "mongo"],
+    )
+    run_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    run_parser.add_argument(
+        "--operations", type=int, default=200, help="runs of each operation"
+    )
+    run_parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=10,
+        help="time limit of each operation's runs",
+    )
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    run_parser.add_argument("--mongo-id-as-primary-key", action="store_true")
+    run_parser.add_argument(
+        "--output", help="file the results are written to, standard output if not given"
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions between two results"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument(
+        "--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative growth flagged, 0.1 is 10%%",
+    )
+
+    arguments = parser.parse_args()
+
+    if arguments.command == "run":
+        results = asyncio.run(run(arguments))
+        if arguments.output:
+            with open(arguments.output, "w") as f:
+                json.dump(results, f, indent=2)
+        else:
+            json.dump(results, sys.stdout, indent=2)
+        return
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    with open(arguments.candidate) as f:
+        candidate = json.load(f)
+    changes = compare(baseline, candidate, arguments.metric, arguments.threshold)
+    print(
+        f"{'backend':<8} {'size':>9} {'operation':<50} {'baseline':>10}"
+        f" {'candidate':>10} {'change':>8}"
+    )
+    for change in changes:
+        print(
+            f"{change['backend']:<8} {change['size']:>9} {change['operation']:<50}"
+            f" {change['baseline']:>10.3f} {change['candidate']:>10.3f}"
+            f" {change['change']:>+8.1%}"
+            f"{'  REGRESSION' if change['regression'] else ''}"
+        )
+    if any(change["regression"] for change in changes):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
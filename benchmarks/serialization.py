@@ -0,0 +1,162 @@
+"""
+Latency of small requests while large listings are served, with and
+without offloading the serialization of large responses.
+
+The API runs in this process on an in-memory catalog of movies with long
+descriptions, so only the HTTP stack, the handlers and serialization are
+measured. Client processes request full listings in a closed loop while
+others fetch single movies by ID; the p99 of the single movies shows how
+long the listings hold the event loop.
+
+Usage:
+    python -m benchmarks.serialization --movies 1000 --duration 20
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+
+import uvicorn
+
+from app.api import create_app
+from app.config import Settings
+from app.entities.movie import Movie
+from app.handlers.handler_dependencies import movie_repository
+from app.repository.movie.memory import MemoryMovieRepository
+from benchmarks.loadtest.runner import serve
+from benchmarks.stats import load_process, percentile
+
+
+def _serve(
+    offload: bool, movies: int, description_length: int, port: int
+) -> uvicorn.Server:
+    repo = MemoryMovieRepository()
+    asyncio.run(
+        repo.create_many(
+            [
+                Movie(
+                    id=str(i),
+                    title=f"Movie {i}",
+                    description="x" * description_length,
+                    release_year=2000,
+                )
+                for i in range(movies)
+            ]
+        )
+    )
+    # The repository is replaced, MongoDB is never reached
+    app = create_app(
+        settings=Settings(
+            mongo_connection_string="mongodb://localhost:27017",
+            mongo_database_name="benchmark",
+            server_selection_timeout_ms=100,
+            warm_up_enabled=False,
+            offload_serialization_enabled=offload,
+            admission_control_enabled=False,
+            loop_monitor_enabled=False,
+        )
+    )
+    app.dependency_overrides[movie_repository] = lambda: repo
+    return serve(app, port)
+
+
+def benchmark(
+    offload: bool,
+    movies: int,
+    description_length: int,
+    large_concurrency: int,
+    small_concurrency: int,
+    duration_s: float,
+    client_processes: int,
+    port: int,
+) -> dict:
+    server = _serve(offload, movies, description_length, port)
+    base_url = f"http://127.0.0.1:{port}/api/v1/movie/"
+    try:
+        per_process = max(1, small_concurrency // client_processes)
+        with multiprocessing.Pool(client_processes + 1) as pool:
+            results = pool.map(
+                load_process,
+                [(f"{base_url}?limit={movies}", large_concurrency, duration_s)]
+                + [(f"{base_url}{movies // 2}", per_process, duration_s)]
+                * client_processes,
+            )
+    finally:
+        server.should_exit = True
+
+    large, large_errors = results[0]
+    small = [
+        latency for process_latencies, _ in results[1:] for latency in process_latencies
+    ]
+    return {
+        "offload": offload,
+        "large_per_s": len(large) / duration_s,
+        "large_p99_ms": percentile(large, 99) * 1000,
+        "small_per_s": len(small) / duration_s,
+        "small_p50_ms": percentile(small, 50) * 1000,
+        "small_p99_ms": percentile(small, 99) * 1000,
+        "errors": large_errors + sum(errors for _, errors in results[1:]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--movies",
+        type=int,
+        default=1000,
+        help="movies in the catalog, all returned by a large listing",
+    )
+    parser.add_argument("--description-length", type=int, default=2000)
+    parser.add_argument(
+        "--large-concurrency",
+        type=int,
+        default=2,
+        help="clients requesting full listings",
+    )
+    parser.add_argument(
+        "--small-concurrency",
+        type=int,
+        default=16,
+        help="clients requesting single movies",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20, help="seconds of measurement per mode"
+    )
+    parser.add_argument(
+        "--client-processes",
+        type=int,
+        default=2,
+        help="load generator processes for the small requests",
+    )
+    parser.add_argument("--port", type=int, default=18081)
+    arguments = parser.parse_args()
+
+    print(
+        f"{'offload':>8} {'large/s':>9} {'large p99':>10} {'small/s':>9}"
+        f" {'small p50':>10} {'small p99':>10} {'errors':>7}"
+    )
+    for offload in (False, True):
+        result = benchmark(
+            offload,
+            arguments.movies,
+            arguments.description_length,
+            arguments.large_concurrency,
+            arguments.small_concurrency,
+            arguments.duration,
+            arguments.client_processes,
+            # A fresh port per mode, the previous server may still be closing
+            arguments.port + offload,
+        )
+        print(
+            f"{str(result['offload']):>8} {result['large_per_s']:>9.1f}"
+            f" {result['large_p99_ms']:>10.1f} {result['small_per_s']:>9.0f}"
+            f" {result['small_p50_ms']:>10.1f} {result['small_p99_ms']:>10.1f}"
+            f" {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Helpers shared by the benchmarks: percentiles of latencies, and a closed
+loop HTTP load that can run in its own process.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Returns the `percent` percentile of `values` by nearest rank, NaN if empty."""
+
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def load(
+    url: str, concurrency: int, duration_s: float
+) -> tuple[list[float], int]:
+    """Runs `concurrency` clients in a closed loop.
+
+    Returns the latencies of the successful requests and the error count.
+    """
+
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration_s
+
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=concurrency), timeout=30
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(arguments: tuple) -> tuple[list[float], int]:
+    """`load` with its arguments as a tuple, for `multiprocessing.Pool.map`."""
+
+    return asyncio.run(load(*arguments))
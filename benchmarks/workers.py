@@ -0,0 +1,127 @@
+"""
+Throughput versus worker count of the production launcher.
+
+For every worker count the API is started with `main.py`, warmed up until
+`/health/ready` answers, then loaded by closed-loop HTTP clients for a
+fixed duration. The settings of the API, including the MongoDB it talks
+to, come from the environment or settings.env as usual.
+
+Usage:
+    python -m benchmarks.workers --workers 1 2 4 8 --concurrency 64 --duration 20
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.stats import load_process, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _wait_until_ready(base_url: str, timeout_s: float = 60):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/ready").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"the API at {base_url} wasn't ready within {timeout_s}s")
+
+
+def benchmark(
+    workers: int,
+    port: int,
+    path: str,
+    concurrency: int,
+    duration_s: float,
+    client_processes: int,
+) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=ROOT,
+        env={**os.environ, "SERVER_WORKERS": str(workers), "SERVER_PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_ready(base_url)
+        # Let every worker open its connections before measuring
+        load_process((base_url + path, concurrency, 2))
+
+        per_process = max(1, concurrency // client_processes)
+        with multiprocessing.Pool(client_processes) as pool:
+            results = pool.map(
+                load_process,
+                [(base_url + path, per_process, duration_s)] * client_processes,
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies = [
+        latency for process_latencies, _ in results for latency in process_latencies
+    ]
+    return {
+        "workers": workers,
+        "requests_per_s": len(latencies) / duration_s,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/api/v1/movie/?limit=10")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=20,
+        help="seconds of measurement per worker count",
+    )
+    parser.add_argument(
+        "--client-processes",
+        type=int,
+        default=2,
+        help="load generator processes, so the client isn't the bottleneck",
+    )
+    parser.add_argument("--port", type=int, default=18080)
+    arguments = parser.parse_args()
+
+    print(
+        f"{'workers':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}"
+        f" {'errors':>7}"
+    )
+    for workers in arguments.workers:
+        result = benchmark(
+            workers,
+            arguments.port,
+            arguments.path,
+            arguments.concurrency,
+            arguments.duration,
+            arguments.client_processes,
+        )
+        print(
+            f"{result['workers']:>8} {result['requests_per_s']:>10.0f}"
+            f" {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+            f" {result['mean_ms']:>9.1f} {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
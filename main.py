@@ -1,11 +1,8 @@
-import uvicorn
-
-from app.api import create_app
+from app.launcher import run
 
 
 def main():
-    app = create_app()
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    run()
 
 
 if __name__ == "__main__":